@@ -4,9 +4,690 @@
 ###### Copyright (c) 2016, Alexandre Popoff
 ###
 
+import os
+import hashlib
 import numpy as np
 import itertools
 import time
+from . import storage
+
+## Size (in words) under which the composition of packed relations is done
+## in a single broadcast operation.
+PACKED_BROADCAST_SIZE = 1<<16
+
+## Approximate number of bytes taken by each morphism during the generation of
+## a category, besides its mapping: the instance itself, its name, its entry in
+## the index of morphisms and its rows in the generation structures.
+GENERATION_OVERHEAD_BYTES = 600
+
+class GenerationLimitExceeded(Exception):
+    """Raised when the generation of a category action exceeds one of the
+    limits given to CategoryAction.iter_generate.
+    """
+    pass
+
+def _pack_columns(matrix):
+    """Packs the columns of a boolean matrix into 64-bit words.
+
+    Parameters
+    ----------
+    matrix: a boolean matrix (m,n)
+
+    Returns
+    -------
+    A uint64 array (n,w), with w=ceil(m/64), the i-th row of which holds the
+    bits of the i-th column of the matrix.
+    """
+    n_rows,n_cols = matrix.shape
+    n_words = (n_rows+63)//64
+    packed = np.zeros((n_cols,8*n_words),dtype=np.uint8)
+    packed[:,:(n_rows+7)//8] = np.packbits(matrix.T,axis=1,bitorder='little')
+    return packed.view(np.uint64)
+
+def _unpack_columns(words,n_rows):
+    """Unpacks 64-bit words into the columns of a boolean matrix.
+
+    Parameters
+    ----------
+    words: a uint64 array (n,w) as returned by _pack_columns
+    n_rows: the number of rows m of the boolean matrix
+
+    Returns
+    -------
+    The boolean matrix (m,n)
+    """
+    bits = np.unpackbits(words.view(np.uint8),axis=1,count=n_rows,bitorder='little')
+    return bits.T.astype(bool)
+
+def _compose_packed(words_g,words_f,n_middle):
+    """Composes two relations given by their packed columns, i.e. computes the
+    packed columns of g*f.
+
+    Parameters
+    ----------
+    words_g: the packed columns of g, a uint64 array (m,w)
+    words_f: the packed columns of f, a uint64 array (n,w')
+    n_middle: the cardinality m of the codomain of f (i.e. of the domain of g)
+
+    Returns
+    -------
+    The packed columns of g*f, a uint64 array (n,w). The column of an element
+    is the bitwise OR of the columns of g of all its images by f.
+    """
+    bits_f = _unpack_columns(words_f,n_middle).T
+    n_cols = words_f.shape[0]
+    n_words = words_g.shape[1]
+    if n_cols*n_middle*n_words<=PACKED_BROADCAST_SIZE:
+        return np.bitwise_or.reduce(np.where(bits_f[:,:,None],words_g[None,:,:],np.uint64(0)),
+                                    axis=1)
+    words = np.zeros((n_cols,n_words),dtype=np.uint64)
+    for j in range(n_middle):
+        words[bits_f[:,j]] |= words_g[j]
+    return words
+
+def _functional_images(matrix):
+    """Checks if a boolean matrix represents a (total) function, and returns
+    the corresponding images.
+
+    Parameters
+    ----------
+    matrix: a boolean matrix (m,n)
+
+    Returns
+    -------
+    An int32 array of length n, the i-th value of which is the index of the
+    unique image of the i-th element, or None if some element has zero or
+    several images.
+    """
+    if not np.all(np.count_nonzero(matrix,axis=0)==1):
+        return None
+    return np.argmax(matrix,axis=0).astype(np.int32)
+
+def _functional_images_from_words(words):
+    """Checks if packed columns represent a (total) function, and returns the
+    corresponding images.
+
+    Parameters
+    ----------
+    words: a uint64 array (n,w), as returned by _pack_columns
+
+    Returns
+    -------
+    An int32 array of length n, the i-th value of which is the index of the
+    unique image of the i-th element, or None if some element has zero or
+    several images.
+    """
+    nonzero = words!=0
+    if not np.all(np.count_nonzero(nonzero,axis=1)==1):
+        return None
+    idx_words = np.argmax(nonzero,axis=1)
+    bits = words[np.arange(len(words)),idx_words]
+    if np.any(bits & (bits-np.uint64(1))):
+        return None
+    ## The exponent of a power of two 2^k, as given by frexp, is k+1
+    exponents = np.frexp(bits.astype(np.float64))[1]-1
+    return (64*idx_words+exponents).astype(np.int32)
+
+def _strongly_connected_components(graph):
+    """Computes the strongly connected components of a directed graph, using
+    an iterative version of Tarjan's algorithm.
+
+    Parameters
+    ----------
+    graph: an integer array (n,d), the i-th row of which lists the successors
+           of the vertex i. Negative entries are ignored.
+
+    Returns
+    -------
+    An integer array of length n giving the index of the strongly connected
+    component of each vertex. Components are numbered in reverse topological
+    order, i.e. the successors of a component have lower indices.
+    """
+    successors = [[w for w in row if w>=0] for row in np.asarray(graph).tolist()]
+    N = len(successors)
+    index = [-1]*N
+    lowlink = [0]*N
+    on_stack = [False]*N
+    component = [-1]*N
+    stack = []
+    counter = 0
+    n_components = 0
+    for root in range(N):
+        if index[root]>=0:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root,0)]
+        while len(work):
+            v,i = work[-1]
+            if i<len(successors[v]):
+                work[-1] = (v,i+1)
+                w = successors[v][i]
+                if index[w]<0:
+                    index[w] = lowlink[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w,0))
+                elif on_stack[w]:
+                    lowlink[v] = min(lowlink[v],index[w])
+            else:
+                work.pop()
+                if len(work):
+                    u = work[-1][0]
+                    lowlink[u] = min(lowlink[u],lowlink[v])
+                if lowlink[v]==index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = n_components
+                        if w==v:
+                            break
+                    n_components += 1
+    return np.array(component,dtype=np.int32)
+
+def _closed_subsets(successors):
+    """Enumerates all subsets of the vertices of a directed acyclic graph which
+    are closed under successors, i.e. all down-sets of the corresponding order.
+
+    The enumeration picks a vertex all of whose successors have already been
+    included, and branches on whether it is included or not. When it is not
+    included, neither are its ancestors. Both branches always lead to at least
+    one closed subset, so that the running time is proportional to the
+    number of closed subsets rather than to the number of all subsets.
+
+    Parameters
+    ----------
+    successors: a list of sets, the i-th set containing the successors of the
+                vertex i.
+
+    Returns
+    -------
+    A list of frozensets, each one being a closed subset of vertices.
+    """
+    N = len(successors)
+    predecessors = [set() for i in range(N)]
+    for v,succ_v in enumerate(successors):
+        for w in succ_v:
+            predecessors[w].add(v)
+
+    closed_subsets = []
+    stack = [(frozenset(range(N)),frozenset())]
+    while len(stack):
+        remaining,included = stack.pop()
+        m = next((v for v in sorted(remaining) if not successors[v]&remaining),None)
+        if m is None:
+            closed_subsets.append(included)
+            continue
+        ancestors = set([m])
+        queue = [m]
+        while len(queue):
+            v = queue.pop()
+            for w in predecessors[v]:
+                if w in remaining and not w in ancestors:
+                    ancestors.add(w)
+                    queue.append(w)
+        stack.append((remaining-ancestors,included))
+        stack.append((remaining-set([m]),included|set([m])))
+    return closed_subsets
+
+def _search_functors(problem,first_candidates=None):
+    """Searches the functors between two category actions, described by the
+    plain arrays and lists of problem, so that branches of the search can be
+    sent to other processes.
+
+    The search assigns an image to each generator in turn, and propagates
+    each assignment through the Cayley tables to the morphisms generated so
+    far, i.e. F(a*x) = F(a)*F(x) for each assigned generator a. A branch is
+    abandoned as soon as one product is not preserved, or, for injective
+    functors, as soon as two morphisms or two objects have the same image.
+
+    Parameters
+    ----------
+    problem: a dictionary, with:
+             - "source_table", "target_table": the Cayley tables of the
+               source and target category actions
+             - "source_sources", "source_targets", "target_sources",
+               "target_targets": the indices of the source and target objects
+               of each morphism
+             - "source_identities", "target_identities": the index of the
+               identity of each object
+             - "gens": the indices of the generators of the source
+             - "candidates": for each generator, the list of the indices of its
+               possible images
+             - "injective": True if only injective functors are searched
+    first_candidates: optional list of indices, replacing the candidate images
+                      of the first generator.
+
+    Returns
+    -------
+    A generator of pairs (x,y), where:
+        - x is the list of the indices of the images of the morphisms
+        - y is the list of the indices of the images of the objects
+    """
+    N = problem["source_table"].shape[0]
+    N_target = problem["target_table"].shape[0]
+    source_table = memoryview(np.ascontiguousarray(problem["source_table"],dtype=np.int32).reshape(-1))
+    target_table = memoryview(np.ascontiguousarray(problem["target_table"],dtype=np.int32).reshape(-1))
+    sources = problem["source_sources"]
+    targets = problem["source_targets"]
+    image_sources = problem["target_sources"]
+    image_targets = problem["target_targets"]
+    identities = problem["source_identities"]
+    image_identities = problem["target_identities"]
+    gens = problem["gens"]
+    candidates = list(problem["candidates"])
+    if first_candidates is not None:
+        candidates[0] = first_candidates
+    injective = problem["injective"]
+
+    ## Partial functor, along with the morphisms and objects in the order
+    ## in which they have been mapped, so that assignments can be undone.
+    ## Preimages are only kept for injective functors.
+    image = [-1]*N
+    preimage = [-1]*N_target
+    object_image = [-1]*len(identities)
+    object_preimage = [-1]*len(image_identities)
+    mapped = []
+    mapped_objects = []
+    assigned_gens = []
+
+    def map_object(obj,image_obj):
+        if object_image[obj]>=0:
+            return object_image[obj]==image_obj
+        if injective:
+            if object_preimage[image_obj]>=0:
+                return False
+            object_preimage[image_obj] = obj
+        object_image[obj] = image_obj
+        mapped_objects.append(obj)
+        return map_morphism(identities[obj],image_identities[image_obj])
+
+    def map_morphism(x,y):
+        if image[x]>=0:
+            return image[x]==y
+        if injective:
+            if preimage[y]>=0:
+                return False
+            preimage[y] = x
+        image[x] = y
+        mapped.append(x)
+        return map_object(sources[x],image_sources[y]) and map_object(targets[x],image_targets[y])
+
+    def map_product(a,x):
+        ## F(a*x) = F(a)*F(x)
+        ax = source_table[a*N+x]
+        if ax<0:
+            return True
+        image_ax = target_table[image[a]*N_target+image[x]]
+        return image_ax>=0 and map_morphism(ax,image_ax)
+
+    def assign(g,y):
+        start = len(mapped)
+        if not map_morphism(g,y):
+            return False
+        assigned_gens.append(g)
+        for x in mapped[:start]:
+            if not map_product(g,x):
+                return False
+        i = start
+        while i<len(mapped):
+            x = mapped[i]
+            for a in assigned_gens:
+                if not map_product(a,x):
+                    return False
+            i = i+1
+        return True
+
+    def undo(n_mapped,n_objects,n_gens):
+        while len(mapped)>n_mapped:
+            x = mapped.pop()
+            if injective:
+                preimage[image[x]] = -1
+            image[x] = -1
+        while len(mapped_objects)>n_objects:
+            obj = mapped_objects.pop()
+            if injective:
+                object_preimage[object_image[obj]] = -1
+            object_image[obj] = -1
+        del assigned_gens[n_gens:]
+
+    def complete_objects():
+        ## Objects which are neither the source nor the target of a generator
+        ## can be mapped to any object
+        obj = next((i for i,image_obj in enumerate(object_image) if image_obj<0),None)
+        if obj is None:
+            ## All morphisms are generated, so that they are all mapped
+            if len(mapped)==N:
+                yield image[:],object_image[:]
+            return
+        for image_obj in range(len(image_identities)):
+            state = (len(mapped),len(mapped_objects),len(assigned_gens))
+            if map_object(obj,image_obj):
+                for result in complete_objects():
+                    yield result
+            undo(*state)
+
+    def search(depth):
+        if depth==len(gens):
+            for result in complete_objects():
+                yield result
+            return
+        for y in candidates[depth]:
+            state = (len(mapped),len(mapped_objects),len(assigned_gens))
+            if assign(gens[depth],y):
+                for result in search(depth+1):
+                    yield result
+            undo(*state)
+
+    return search(0)
+
+def _search_functors_branch(task):
+    """Searches the functors in one branch of the search tree, in a process
+    of a pool (see CategoryFunctor.enumerate).
+
+    Parameters
+    ----------
+    task: a pair (problem,first_candidates), the arguments of _search_functors
+
+    Returns
+    -------
+    The list of the results of _search_functors.
+    """
+    problem,first_candidates = task
+    return list(_search_functors(problem,first_candidates))
+
+def _generator_relations(table,gens,identities):
+    """Computes relations between the generators of a category, by a
+    breadth-first search of its left Cayley graph from the identities. Each
+    morphism is labelled by the first word in the generators reaching it, and
+    each other edge of the graph gives a relation.
+
+    Parameters
+    ----------
+    table: the Cayley table of the category
+    gens: the list of the indices of the generators
+    identities: the list of the indices of the identities
+
+    Returns
+    -------
+    A list of pairs (u,v) of words, i.e. lists of positions in gens, such that
+    the products of the generators along u and v are equal, the product along
+    (a_1,...,a_m) being a_1*...*a_m. The word v may be empty, in which case it
+    stands for the identity of the source of the last generator of u.
+    """
+    words = dict((x,[]) for x in identities)
+    queue = list(identities)
+    relations = []
+    for x in queue:
+        for p,g in enumerate(gens):
+            gx = table[g,x]
+            if gx<0:
+                continue
+            word = [p]+words[x]
+            if not gx in words:
+                words[gx] = word
+                queue.append(gx)
+            elif not words[gx]==word:
+                relations.append((word,words[gx]))
+    return relations
+
+def _arc_consistent_candidates(problem,relations):
+    """Reduces the candidate images of the generators in a search of functors
+    (see _search_functors) by arc consistency. The constraints are the
+    relations involving at most two generators, which must hold between their
+    images, and the equalities between the sources and targets of the
+    generators, which must hold between those of their images.
+
+    Parameters
+    ----------
+    problem: a dictionary describing the search (see _search_functors)
+    relations: a list of relations between the generators, as returned by
+               _generator_relations
+
+    Returns
+    -------
+    A list giving, for each generator, the list of the indices of its
+    remaining candidate images.
+    """
+    N_target = problem["target_table"].shape[0]
+    ## The extra row and column of -1 make the product with -1, i.e. with
+    ## the product of non-composable morphisms, equal to -1
+    table = -np.ones((N_target+1,N_target+1),dtype=np.int32)
+    table[:N_target,:N_target] = problem["target_table"]
+    image_ends = (np.asarray(problem["target_sources"]),np.asarray(problem["target_targets"]))
+    source_identities = np.asarray(problem["target_identities"])[image_ends[0]]
+    gens = problem["gens"]
+    ends = [(problem["source_sources"][g],problem["source_targets"][g]) for g in gens]
+    domains = [np.asarray(candidates,dtype=np.int64) for candidates in problem["candidates"]]
+
+    def evaluate(word,values):
+        product = values[word[-1]]
+        for p in reversed(word[:-1]):
+            product = table[values[p],product]
+        return product
+
+    def holds(u,v,values):
+        product_u = evaluate(u,values)
+        if len(v)==0:
+            product_v = source_identities[values[u[-1]]]
+        else:
+            product_v = evaluate(v,values)
+        return (product_u==product_v) & (product_u>=0)
+
+    unary = [[] for g in gens]
+    binary = {}
+    for u,v in relations:
+        letters = sorted(set(u+v))
+        if len(letters)==1:
+            unary[letters[0]].append((u,v))
+        elif len(letters)==2:
+            binary.setdefault(tuple(letters),[]).append((u,v))
+
+    for p in range(len(gens)):
+        consistent = np.ones(len(domains[p]),dtype=bool)
+        if ends[p][0]==ends[p][1]:
+            consistent &= image_ends[0][domains[p]]==image_ends[1][domains[p]]
+        for u,v in unary[p]:
+            consistent &= holds(u,v,{p:domains[p]})
+        domains[p] = domains[p][consistent]
+
+    ## Matrices of the pairs of images allowed by the binary constraints
+    allowed = {}
+    for p in range(len(gens)):
+        for q in range(p+1,len(gens)):
+            matrix = np.ones((len(domains[p]),len(domains[q])),dtype=bool)
+            constrained = False
+            for i in range(2):
+                for j in range(2):
+                    if ends[p][i]==ends[q][j]:
+                        matrix &= image_ends[i][domains[p]][:,None]==image_ends[j][domains[q]][None,:]
+                        constrained = True
+            for u,v in binary.get((p,q),[]):
+                matrix &= holds(u,v,{p:domains[p][:,None],q:domains[q][None,:]})
+                constrained = True
+            if constrained:
+                allowed[(p,q)] = matrix
+                allowed[(q,p)] = matrix.T
+
+    ## AC-3: removes the images without support for one of the constraints,
+    ## until no more image can be removed
+    alive = [np.ones(len(domain),dtype=bool) for domain in domains]
+    queue = set(allowed.keys())
+    while len(queue):
+        p,q = queue.pop()
+        supported = alive[p] & allowed[(p,q)][:,alive[q]].any(axis=1)
+        if not np.array_equal(supported,alive[p]):
+            alive[p] = supported
+            queue.update((r,s) for (r,s) in allowed if s==p and not r==q)
+    return [domain[alive_p].tolist() for domain,alive_p in zip(domains,alive)]
+
+def _rank_rows(rows):
+    """Numbers the distinct rows of an integer matrix in a canonical order, i.e.
+    an order which only depends on their content. Rows are compared as
+    big-endian bytes, so that rows whose first entries differ are ordered
+    according to these entries, provided they are non-negative.
+
+    Parameters
+    ----------
+    rows: an integer matrix
+
+    Returns
+    -------
+    An integer array giving the number of each row.
+    """
+    rows = np.ascontiguousarray(rows,dtype=">i8")
+    keys = rows.view(np.dtype((np.void,rows.shape[1]*rows.itemsize))).ravel()
+    return np.unique(keys,return_inverse=True)[1].ravel()
+
+def _refine_colors(colors,table,relation):
+    """Refines a coloring of the morphisms and elements of a category action
+    until it is stable, i.e. until two vertices of the same color cannot be
+    told apart by the colors of their products, or of the elements they
+    relate. The new colors are numbered in the order of the signatures of the
+    vertices, the first entry of which is their previous color, so that the
+    numbering does not depend on the order of the vertices.
+
+    Parameters
+    ----------
+    colors: an integer array giving the colors of the morphisms, then of the
+            elements. The colors of the morphisms should be lower than those
+            of the elements, and all colors should be numbered from 0.
+    table: the Cayley table of the category
+    relation: a boolean array of shape (N,E,E), whose entry (f,y,x) is True if
+              and only if the element y is in the image of the element x by
+              the morphism f
+
+    Returns
+    -------
+    The refined integer array of colors.
+    """
+    N = table.shape[0]
+    E = relation.shape[1]
+    composable = table>=0
+    products = np.where(composable,table,0)
+    n_colors = colors.max()+1
+    while True:
+        K = np.int64(colors.max()+1)
+        colors_m = colors[:N].astype(np.int64)
+        colors_e = colors[N:].astype(np.int64)
+        ## Pairs of colors (g,g*f) and (h,f*h), encoded as integers
+        product_colors = np.where(composable,colors_m[products],K)
+        left = np.sort((colors_m[:,None]*(K+1)+product_colors).T,axis=1)
+        right = np.sort(colors_m[None,:]*(K+1)+product_colors,axis=1)
+        ## Pairs of colors (x,y) of the related elements
+        action = np.where(relation,colors_e[None,None,:]*K+colors_e[None,:,None],-1)
+        new_colors = _rank_rows(np.hstack([colors_m[:,None],left,right,
+                                           np.sort(action.reshape(N,-1),axis=1)]))
+        if E>0:
+            outgoing = np.where(relation,colors_m[:,None,None]*K+colors_e[None,:,None],-1)
+            incoming = np.where(relation,colors_m[:,None,None]*K+colors_e[None,None,:],-1)
+            new_colors_e = _rank_rows(np.hstack([colors_e[:,None],
+                                                 np.sort(outgoing.transpose(2,0,1).reshape(E,-1),axis=1),
+                                                 np.sort(incoming.transpose(1,0,2).reshape(E,-1),axis=1)]))
+            new_colors = np.concatenate([new_colors,new_colors_e+new_colors.max()+1])
+        if new_colors.max()+1==n_colors:
+            return new_colors
+        colors = new_colors
+        n_colors = colors.max()+1
+
+def _canonical_labeling(table,relation,colors):
+    """Computes a canonical labeling of the morphisms and elements of a
+    category action, by individualization and refinement of a coloring (see
+    _refine_colors). When refinement alone does not distinguish all vertices,
+    each vertex of the first cell with several vertices is in turn given its
+    own color, and the coloring is refined again. The canonical labeling is
+    the leaf of this search tree which gives the smallest relabeled Cayley
+    table and action. The cell with the highest color is chosen, which is a
+    cell of elements as long as the elements are not all distinguished:
+    distinguishing one element usually distinguishes all the elements of
+    its orbit.
+
+    Two leaves giving the same relabeled structure yield an automorphism.
+    The search then returns to the node where the paths to these leaves
+    diverge, since the rest of the subtree is the image of a subtree already
+    explored, and the automorphisms found so far are used to skip the
+    children equivalent to those already explored.
+
+    Parameters
+    ----------
+    table: the Cayley table of the category
+    relation: a boolean array describing the action (see _refine_colors)
+    colors: an integer array giving the initial colors of the morphisms,
+            which should only depend on properties preserved by isomorphisms
+
+    Returns
+    -------
+    A pair (x,y), where x is the relabeled Cayley table, and y the relabeled
+    relation.
+    """
+    N = table.shape[0]
+    E = relation.shape[1]
+    composable = table>=0
+    products = np.where(composable,table,0)
+    best = {}
+    automorphisms = []
+
+    def relabel(labels):
+        labels_m = labels[:N]
+        labels_e = labels[N:]-N
+        new_table = -np.ones((N,N),dtype=np.int32)
+        new_table[labels_m[:,None],labels_m[None,:]] = np.where(composable,labels_m[products],-1)
+        new_relation = np.zeros((N,E,E),dtype=bool)
+        new_relation[labels_m[:,None,None],labels_e[None,:,None],labels_e[None,None,:]] = relation
+        return new_table,new_relation,new_table.astype("<i4").tobytes()+np.packbits(new_relation).tobytes()
+
+    def in_orbit(v,vertices,path):
+        ## Orbit of v under the automorphisms found so far fixing the path
+        generators = [a for a in automorphisms if np.array_equal(a[path],path)]
+        orbit = set([v])
+        queue = [v]
+        while len(queue):
+            w = queue.pop()
+            for a in generators:
+                if not a[w] in orbit:
+                    orbit.add(a[w])
+                    queue.append(a[w])
+        return any(w in orbit for w in vertices)
+
+    def search(colors,path):
+        ## Returns the depth to which the search should return, if any
+        colors = _refine_colors(colors,table,relation)
+        cell_sizes = np.bincount(colors)
+        if np.all(cell_sizes==1):
+            new_table,new_relation,certificate = relabel(colors)
+            if not best:
+                best.update(first=(certificate,colors,path))
+            for leaf_certificate,leaf_labels,leaf_path in [best["first"],best.get("best",best["first"])]:
+                if certificate==leaf_certificate and not path==leaf_path:
+                    inverse = np.empty_like(colors)
+                    inverse[leaf_labels] = np.arange(len(colors))
+                    automorphisms.append(inverse[colors])
+                    depth = 0
+                    while path[depth]==leaf_path[depth]:
+                        depth = depth+1
+                    return depth
+            if not "best" in best or certificate<best["best"][0]:
+                best.update(best=(certificate,colors,path),form=(new_table,new_relation))
+            return None
+        cell = np.nonzero(cell_sizes>1)[0][-1]
+        explored = []
+        for v in np.nonzero(colors==cell)[0].tolist():
+            if len(explored) and in_orbit(v,explored,path):
+                continue
+            individualized = 2*colors+1
+            individualized[v] -= 1
+            depth = search(np.unique(individualized,return_inverse=True)[1].ravel(),path+[v])
+            explored.append(v)
+            if depth is not None and depth<len(path):
+                return depth
+        return None
+
+    colors = np.concatenate([colors,np.full(E,colors.max()+1 if N>0 else 0)])
+    search(np.unique(colors,return_inverse=True)[1].ravel(),[])
+    return best["form"]
 
 class CatObject(object):
     def __init__(self,name,elements):
@@ -100,7 +781,7 @@ class CatObject(object):
         return elem in self.dict_elem2idx
 
 class CatMorphism(object):
-    def __init__(self,name,source,target,mapping=None):
+    def __init__(self,name,source,target,mapping=None,packed=False):
         """Initializes a category morphism between two objects
 
         Parameters
@@ -112,6 +793,9 @@ class CatMorphism(object):
         mapping: optional argument representing the mapping of elements
                  between the domain and the codomain. The mapping can be
                  given as a NumPy array matrix or as a dictionary.
+        packed: optional boolean indicating whether the mapping should be stored
+                in bit-packed form, each column of the relation being stored
+                as 64-bit words. Products of packed morphisms are packed.
 
         Returns
         -------
@@ -124,6 +808,10 @@ class CatMorphism(object):
         self.name = name
         self.source = source
         self.target = target
+        self.packed = packed
+        self._matrix = None
+        self._words = None
+        self._images = None
         if mapping is not None:
             if isinstance(mapping,np.ndarray)==False:
                 self.set_mapping(mapping)
@@ -160,7 +848,40 @@ class CatMorphism(object):
         if not (self.source==self.target):
             raise Exception("Source and target should be identical")
         card_source = self.source.get_cardinality()
-        self.matrix = np.eye(card_source,dtype=bool)
+        self.set_mapping_matrix(np.eye(card_source,dtype=bool))
+
+    def set_packed(self,packed):
+        """Sets whether the mapping of the morphism is stored in bit-packed form.
+
+        Parameters
+        ----------
+        packed: a boolean
+
+        Returns
+        -------
+        None
+        """
+        if self._matrix is not None or self._words is not None:
+            matrix = self.get_mapping_matrix()
+            self.packed = packed
+            self.set_mapping_matrix(matrix)
+        else:
+            self.packed = packed
+
+    def _is_functional(self):
+        """Checks if the morphism is a (total) function, in which case it is
+        stored as an array of images instead of a relation.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        True if each element of the domain has exactly one image, False
+        otherwise.
+        """
+        return self._images is not None
 
     def set_mapping(self,mapping):
         """Sets the mapping of elements between the domain and the codomain
@@ -180,12 +901,13 @@ class CatMorphism(object):
         """
         card_source = self.source.get_cardinality()
         card_target = self.target.get_cardinality()
-        self.matrix = np.zeros((card_target,card_source),dtype=bool)
+        matrix = np.zeros((card_target,card_source),dtype=bool)
         for elem,images in sorted(mapping.items()):
             id_elem = self.source.get_idx_by_name(elem)
             for image in images:
                 id_image = self.target.get_idx_by_name(image)
-                self.matrix[id_image,id_elem] = True
+                matrix[id_image,id_elem] = True
+        self.set_mapping_matrix(matrix)
 
     def set_mapping_matrix(self,matrix):
         """Sets the mapping of elements between the domain and the codomain
@@ -195,11 +917,107 @@ class CatMorphism(object):
         matrix: a boolean matrix (m,n), where m is the cardinality of the codomain
         and n the cardinality of the domain, indicating the image of the elements.
 
+        If the matrix represents a function, the morphism is stored as the
+        array of the images of the elements of the domain.
+
+        Returns
+        -------
+        None
+        """
+        images = _functional_images(matrix)
+        if images is not None:
+            self._set_images(images)
+        elif self.packed:
+            self._matrix = None
+            self._words = _pack_columns(np.asarray(matrix,dtype=bool))
+            self._images = None
+        else:
+            self._matrix = matrix
+            self._words = None
+            self._images = None
+
+    def _set_images(self,images):
+        """Sets the mapping of elements from the images of a function.
+
+        Parameters
+        ----------
+        images: an int32 array of length n, where n is the cardinality of the
+                domain, the i-th value of which is the index of the image of the
+                i-th element.
+
+        Returns
+        -------
+        None
+        """
+        self._matrix = None
+        self._words = None
+        self._images = images
+
+    def _set_words(self,words):
+        """Sets the mapping of elements from the packed columns of the relation.
+
+        Parameters
+        ----------
+        words: a uint64 array (n,w), as returned by _pack_columns, where n is
+               the cardinality of the domain.
+
         Returns
         -------
         None
         """
-        self.matrix = matrix
+        images = _functional_images_from_words(words)
+        if images is not None:
+            self._set_images(images)
+        elif self.packed:
+            self._matrix = None
+            self._words = words
+            self._images = None
+        else:
+            self._matrix = _unpack_columns(words,self.target.get_cardinality())
+            self._words = None
+            self._images = None
+
+    def _get_words(self):
+        """Retrieves the mapping as packed columns
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A uint64 array (n,w), where n is the cardinality of the domain, the i-th
+        row of which holds the bits of the images of the i-th element.
+        """
+        if self._words is not None:
+            return self._words
+        if self._images is not None:
+            n_words = (self.target.get_cardinality()+63)//64
+            words = np.zeros((len(self._images),n_words),dtype=np.uint64)
+            words[np.arange(len(self._images)),self._images//64] = \
+                np.left_shift(np.uint64(1),(self._images%64).astype(np.uint64))
+            return words
+        return _pack_columns(np.asarray(self._matrix,dtype=bool))
+
+    @property
+    def matrix(self):
+        """The boolean matrix (m,n) representing the morphism in Rel. For a
+        packed or functional morphism, the matrix is rebuilt on each access:
+        the returned array is then a copy, and in-place writes such as
+        m.matrix[i,j] = True are lost. Use set_mapping_matrix (or assign
+        m.matrix) to change the mapping.
+        """
+        if self._images is not None:
+            matrix = np.zeros((self.target.get_cardinality(),len(self._images)),dtype=bool)
+            matrix[self._images,np.arange(len(self._images))] = True
+            return matrix
+        if self._matrix is not None or self._words is None:
+            return self._matrix
+        return _unpack_columns(self._words,self.target.get_cardinality())
+
+    @matrix.setter
+    def matrix(self,matrix):
+        self.set_mapping_matrix(matrix)
 
     def get_mapping(self):
         """Retrieves the mapping in the form of a dictionary
@@ -214,6 +1032,9 @@ class CatMorphism(object):
                 - keys: the element names in the domain of the morphism
                 - values: a list of element names in the codomain of the morphism
         """
+        if self._images is not None:
+            return dict([(self.source.get_name_by_idx(i),[self.target.get_name_by_idx(x)])
+                         for i,x in enumerate(self._images)])
         dest_cardinality,source_cardinality = self.matrix.shape
         return dict([(self.source.get_name_by_idx(i),
                 [self.target.get_name_by_idx(x) for x in np.where(self.matrix[:,i])[0]]) \
@@ -243,8 +1064,10 @@ class CatMorphism(object):
         -------
         A new instance of CatMorphism with the same domain, codomain, and mapping
         """
-        U = CatMorphism(self.name,self.source,self.target)
-        U.set_mapping_matrix(self.get_mapping_matrix())
+        U = CatMorphism(self.name,self.source,self.target,packed=self.packed)
+        U._matrix = self._matrix
+        U._words = self._words
+        U._images = self._images
 
         return U
 
@@ -259,9 +1082,62 @@ class CatMorphism(object):
         -------
         True if the morphism is left total, False otherwise.
         """
-
+        if self._images is not None:
+            return True
+        if self._words is not None:
+            return bool(np.all(np.any(self._words,axis=1)))
         return np.all(np.sum(self.matrix,axis=0))
 
+    def _get_nbytes(self):
+        """Returns the number of bytes taken by the mapping of the morphism.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        An integer
+        """
+        for array in (self._images,self._words,self._matrix):
+            if array is not None:
+                return np.asarray(array).nbytes
+        return 0
+
+    def _key(self):
+        """Returns a hashable key identifying the morphism by its content
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A tuple made of the names of the domain and codomain, the cardinality
+        of the codomain and the bytes of the images of the function or of the
+        packed columns of the relation. Two morphisms are equal if and only if
+        they have the same key.
+        """
+        if self._images is not None:
+            return (self.source.name,self.target.name,self.target.get_cardinality(),
+                    True,self._images.tobytes())
+        return (self.source.name,self.target.name,self.target.get_cardinality(),
+                False,self._get_words().tobytes())
+
+    def __hash__(self):
+        """Returns a hash of the morphism computed from its packed columns,
+        consistent with the '==' operator.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        An integer
+        """
+        return hash(self._key())
+
 
     def __str__(self):
         """Returns a verbose description of the morphism
@@ -293,7 +1169,14 @@ class CatMorphism(object):
         The image of elem by the current morphism
         """
         idx_elem = self.source.get_idx_by_name(elem)
-        return [self.target.get_name_by_idx(x) for x in np.where(self.matrix[:,idx_elem])[0]]
+        if self._images is not None:
+            return [self.target.get_name_by_idx(self._images[idx_elem])]
+        if self._words is not None:
+            column = _unpack_columns(self._words[idx_elem:idx_elem+1],
+                                     self.target.get_cardinality())[:,0]
+        else:
+            column = self.matrix[:,idx_elem]
+        return [self.target.get_name_by_idx(x) for x in np.where(column)[0]]
 
     def __pow__(self,int_power):
         """Raise the morphism to the power int_power
@@ -336,8 +1219,23 @@ class CatMorphism(object):
 
         if not morphism.target==self.source:
             return None
-        new_morphism =  CatMorphism(self.name+morphism.name,morphism.source,self.target)
-        new_morphism.set_mapping_matrix((self.matrix.dot(morphism.matrix))>0)
+        new_morphism =  CatMorphism(self.name+morphism.name,morphism.source,self.target,
+                                    packed=(self.packed or morphism.packed))
+        if self._images is not None and morphism._images is not None:
+            new_morphism._set_images(self._images[morphism._images])
+        elif morphism._images is not None:
+            ## The images of an element are the images by self of its
+            ## unique image by morphism
+            if self._words is not None:
+                new_morphism._set_words(self._words[morphism._images])
+            else:
+                new_morphism.set_mapping_matrix(self.matrix[:,morphism._images])
+        elif self._words is not None or morphism._words is not None:
+            new_morphism._set_words(_compose_packed(self._get_words(),
+                                                    morphism._get_words(),
+                                                    self.source.get_cardinality()))
+        else:
+            new_morphism.set_mapping_matrix((self.matrix.dot(morphism.matrix))>0)
 
         return new_morphism
 
@@ -357,9 +1255,16 @@ class CatMorphism(object):
            raise Exception("RHS is not a valid CatMorphism class\n")
         if self is None or morphism is None:
            return False
-        return (self.source == morphism.source) and \
-               (self.target == morphism.target) and \
-               (np.array_equal(self.matrix,morphism.matrix))
+        if not ((self.source == morphism.source) and (self.target == morphism.target)):
+            return False
+        if self._images is not None and morphism._images is not None:
+            return np.array_equal(self._images,morphism._images)
+        ## A function may also be held as a matrix or as packed words, if its
+        ## storage was set directly: compare the relations then
+        if self._images is not None or morphism._images is not None or \
+           self._words is not None or morphism._words is not None:
+            return np.array_equal(self._get_words(),morphism._get_words())
+        return np.array_equal(self.matrix,morphism.matrix)
 
     def __le__(self, morphism):
         """Checks if the given morphism is included in 'morphism', i.e. if there
@@ -380,6 +1285,10 @@ class CatMorphism(object):
             return False
         if not (self.source == morphism.source) and (self.target == morphism.target):
             raise Exception("Morphisms should have the same domain and codomain")
+        if self._images is not None and morphism._images is not None:
+            return np.array_equal(self._images,morphism._images)
+        if self._words is not None or morphism._words is not None:
+            return not np.any(self._get_words() & ~morphism._get_words())
         return np.array_equal(self.matrix,self.matrix & morphism.matrix)
 
     def __lt__(self, morphism):
@@ -404,7 +1313,8 @@ class CatMorphism(object):
 
 
 class CategoryAction(object):
-    def __init__(self,objects=None,generators=None,generate=True):
+    def __init__(self,objects=None,generators=None,generate=True,
+                 use_cayley_table=False):
         """Instantiates a CategoryAction class
 
         Parameters
@@ -418,14 +1328,21 @@ class CategoryAction(object):
         generator: optional boolean indicating whether the category
                    should be generated upon instantiation.
 
+        use_cayley_table: optional boolean indicating whether the Cayley table
+                          of the category should be built upon generation.
+                          Otherwise, products of generated morphisms are
+                          computed from the right Cayley graph, which only
+                          takes memory proportional to the number of
+                          morphisms times the number of generators.
+
         Returns
         -------
         None
         """
         self.objects={}
         self.generators={}
-        self.morphisms={}
-        self.equivalences=[]
+        self.use_cayley_table = use_cayley_table
+        self._clear_morphisms()
         if objects is not None:
             self.set_objects(objects)
         if generators is not None:
@@ -449,8 +1366,7 @@ class CategoryAction(object):
         """
         self.objects={}
         self.generators={}
-        self.morphisms={}
-        self.equivalences=[]
+        self._clear_morphisms()
 
         ob_names = [catobject.name for catobject in list_objects]
         if not len(ob_names)==len(np.unique(ob_names)):
@@ -522,8 +1438,7 @@ class CategoryAction(object):
         otherwise.
         """
         self.generators={}
-        self.morphisms={}
-        self.equivalences=[]
+        self._clear_morphisms()
 
         all_gennames = [m.name for m in list_morphisms]
         if not len(all_gennames)==len(np.unique(all_gennames)):
@@ -567,11 +1482,12 @@ class CategoryAction(object):
                 raise Exception("Domain or codomain of a generator is not present in the category")
             if m.name in cat_mor_names:
                 raise Exception("Morphisms should have distinct names")
-            self.morphisms[m.name] = m
+            self._store_morphism(m)
+        self._clear_cayley_graphs()
 
-    def _add_identities(self):
-        """Automatically add identity morphisms on each object of the category
-        action
+    def _clear_morphisms(self):
+        """Erases all morphisms of the category action, along with the
+        equivalences, the index of morphisms and the Cayley table.
 
         Parameters
         ----------
@@ -581,17 +1497,23 @@ class CategoryAction(object):
         -------
         None
         """
-        for name,catobject in sorted(self.objects.items()):
-            identity_morphism = CatMorphism("id_"+name,catobject,catobject)
-            identity_morphism.set_to_identity()
-            self._add_morphisms([identity_morphism])
-
-    def generate_category(self):
-        """Generates all morphisms in the category based on the given list of
-        generators. The generation proceeds by successive multiplication of
-        generators and morphisms until completion. This is suited to small
-        category action, but the performance would be prohibitive for very
-        large categories containing many morphisms.
+        self.morphisms={}
+        self.equivalences=[]
+        self.cayley_table=None
+        self._cache_key=None
+        self._action_index=None
+        self._canonical_form=None
+        self._padded_matrices=None
+        self._morphism_index={}
+        self._morphism_names=[]
+        self._morphism_idx={}
+        self._identities={}
+        self._clear_cayley_graphs()
+
+    def _clear_cayley_graphs(self):
+        """Erases the structure built by the generation of the category, i.e.
+        the left and right Cayley graphs and the normal forms of the morphisms,
+        along with the Green classes computed from them.
 
         Parameters
         ----------
@@ -601,141 +1523,1207 @@ class CategoryAction(object):
         -------
         None
         """
-        self.morphisms = self.generators.copy()
-        self._add_identities()
-        new_liste = self.generators.copy()
-        added_liste = self.generators.copy()
-        while(len(added_liste)>0):
-            added_liste = {}
-            for name_x,morphism_x in sorted(new_liste.items()):
-                for name_g,morphism_g in self.get_generators():
-                    new_morphism = morphism_g*morphism_x
-                    if not new_morphism is None:
-                        c=0
-                        for name_y,morphism_y in self.get_morphisms():
-                            if new_morphism==morphism_y:
-                                c=1
-                                self.equivalences.append([new_morphism.name,morphism_y.name])
-                        if c==0:
-                            added_liste[new_morphism.name] = new_morphism
-                            self.morphisms[new_morphism.name] = new_morphism
-            new_liste = added_liste
-
-    def mult(self,name_g,name_f):
-        """Multiplies two morphisms and returns the corresponding morphism.
+        self._green_classes=None
+        self._graph_views=None
+        self._letters=None
+        self._left_graph=None
+        self._right_graph=None
+        self._first=None
+        self._suffix=None
+        self._last=None
+        self._prefix=None
+
+    def _store_morphism(self,morphism):
+        """Stores a morphism in the category action and registers it in the
+        content-addressed index of morphisms. Each morphism is given an integer
+        index, corresponding to its order of insertion, which is used to
+        address the rows and columns of the Cayley table.
 
         Parameters
         ----------
-        name_g, name_f: a string representing the names of the morphisms
-                        to be multiplied.
+        morphism: an instance of CatMorphism
 
         Returns
         -------
-        A string representing the name of the morphism corresponding
-        to name_g*name_f.
+        None
         """
-        new_morphism = self.morphisms[name_g]*self.morphisms[name_f]
-        if new_morphism is None:
-            return new_morphism
+        self.morphisms[morphism.name] = morphism
+        ## Identities take precedence in the index over the other morphisms
+        ## with the same content, e.g. a generator acting as an identity
+        if morphism.name=="id_"+morphism.source.name:
+            self._morphism_index[morphism._key()] = morphism.name
         else:
-            return [name_x for name_x,x in self.get_morphisms() if x==new_morphism][0]
+            self._morphism_index.setdefault(morphism._key(),morphism.name)
+        self._morphism_idx[morphism.name] = len(self._morphism_names)
+        self._morphism_names.append(morphism.name)
+        self.cayley_table = None
+        self._cache_key = None
+        self._action_index = None
+        self._canonical_form = None
+        self._padded_matrices = None
 
-    def apply_operation(self,name_f,element):
-        """Applies a morphism to a given element.
+    def _find_morphism(self,morphism):
+        """Finds the name of the morphism of the category action which is
+        equal to the given morphism, using the content-addressed index of
+        morphisms.
 
         Parameters
         ----------
-        name_f: a string representing the name of the morphisms to be applied.
-        elem: a string representing the name of the element.
+        morphism: an instance of CatMorphism
 
         Returns
         -------
-        A list of strings representing the images of elem by name_f
+        A string representing the name of the equal morphism in the category
+        action, or None if no such morphism exists. If several morphisms are
+        equal to the given morphism, this is the identity if it is one of
+        them, and the first of them to have been added otherwise.
         """
-        return self.morphisms[name_f](element)
+        return self._morphism_index.get(morphism._key())
 
-    def get_operation(self,element_1,element_2):
-        """Returns the operations taking the element element_1 to the element
-        element_2.
+    def _add_identities(self):
+        """Automatically add identity morphisms on each object of the category
+        action
 
         Parameters
         ----------
-        element_1,element_2 : strings representing the name of the elements.
+        None
 
         Returns
         -------
-        A list of strings representing the morphisms f such that element_2 is
-        an image of element_1 by f.
+        None
         """
-        res = []
-        for name_f,f in self.get_morphisms():
-            try:
-                if element_2 in f(element_1):
-                    res.append(name_f)
-            except:
-                pass
-        return res
+        for name,catobject in sorted(self.objects.items()):
+            identity_morphism = CatMorphism("id_"+name,catobject,catobject)
+            identity_morphism.set_to_identity()
+            self._add_morphisms([identity_morphism])
+            self._identities[name] = self._morphism_idx[identity_morphism.name]
 
-    def rename_operation(self,name_f,new_name):
-        """Renames a morphism in the category
+    def generate_category(self,checkpoint=None,checkpoint_interval=60.):
+        """Generates all morphisms in the category based on the given list of
+        generators. The generation proceeds by successive multiplication of
+        generators and morphisms until completion, in the manner of the
+        Froidure-Pin algorithm.
+
+        Each morphism x is generated as a product a*s of a generator a and of a
+        shorter morphism s, the name of x being the concatenation of the names
+        of the generators in this word. Each morphism is also recorded as a
+        product p*b, where b is the last generator of the word. The left
+        Cayley graph (the products g*x for all generators g) and the right
+        Cayley graph (the products x*g) are built along the generation. A
+        product g*x can then be obtained without any composition of mappings
+        as (g*p)*b, as soon as the right Cayley graph is known for g*p, i.e.
+        whenever g*p is shorter than g*x: in this case g*x cannot be a new
+        morphism.
+
+        When a product has to be computed, it is looked up in a
+        content-addressed index of the morphisms, so that checking whether it
+        already exists does not depend on the number of morphisms generated so
+        far. Products equal to an existing morphism are recorded as
+        equivalences, i.e. defining rules of the category.
+
+        If the on-disk cache is enabled (see opycleid.storage.set_cache_dir),
+        the category is loaded from the cache whenever it has already been
+        generated from the same objects and generators, and saved in the
+        cache otherwise.
+
+        The generation is done by iter_generate, without any limit.
 
         Parameters
         ----------
-        name_f: a string representing the name of the morphism to be renamed.
-        new_name: a string representing the new name of the morphism.
+        checkpoint: optional string representing the path of a checkpoint
+                    file (see iter_generate).
+        checkpoint_interval: optional float, the minimal time in seconds
+                             between two checkpoints.
 
         Returns
         -------
         None
         """
-        if not name_f in self.morphisms:
-            raise Exception("The specified operation cannot be found")
-        new_op = self.morphisms[name_f].copy()
-        new_op.set_name(new_name)
-        del self.morphisms[name_f]
-        self.morphisms[new_name] = new_op
+        for name_f,f in self.iter_generate(checkpoint=checkpoint,
+                                           checkpoint_interval=checkpoint_interval):
+            pass
+
+    def iter_generate(self,max_morphisms=None,max_time=None,max_memory=None,
+                      checkpoint=None,checkpoint_interval=60.):
+        """Generates all morphisms in the category as generate_category does,
+        and yields them as they are found, i.e. layer by layer of the
+        generation. The generators are yielded first, then the identities, and
+        then the products of increasing length.
+
+        The generation can be stopped early, either by the caller or when one
+        of the given limits is exceeded. In this case, the category action
+        only holds the morphisms found so far, without the Cayley graphs of the
+        category, which are only set once the generation is complete. It can
+        still be used, but mult then composes the mappings of the morphisms,
+        and raises an Exception if their product has not been found yet.
+        Calling generate_category afterwards generates the whole category.
+
+        If a checkpoint file is given, the state of the generation (the
+        morphisms found so far, the equivalences, the partial Cayley graphs
+        and the position in the current layer) is periodically saved in this
+        file, in the array format of opycleid.storage, as well as when the
+        maximal duration is exceeded. If the file exists when
+        the generation starts, the generation resumes from the saved state,
+        and the morphisms it holds are yielded first. The file is removed once
+        the generation is complete.
 
-    def rewrite_operations(self):
-        """Rewrites morphism names in the category action by trying to reduce
-        repeated substrings.
+        Parameters
+        ----------
+        max_morphisms: optional integer, the maximal number of morphisms.
+        max_time: optional float, the maximal duration of the generation in
+                  seconds.
+        max_memory: optional integer, the maximal number of bytes taken by the
+                    morphisms. This is an estimate, based on the size of their
+                    mappings and on GENERATION_OVERHEAD_BYTES per morphism.
+        checkpoint: optional string representing the path of the checkpoint
+                    file.
+        checkpoint_interval: optional float, the minimal time in seconds
+                             between two checkpoints.
+
+        Yields
+        -------
+        Pairs (x,y), where:
+            - x is the name of the morphism
+            - y is the corresponding instance of CatMorphism
+        Raises a GenerationLimitExceeded exception if one of the limits is
+        exceeded.
+        Raises an Exception if the checkpoint file has been written for another
+        category action.
+        """
+        start_time = time.time()
+        self._clear_morphisms()
+        generators = self.get_generators()
+
+        cache_key = None
+        if storage.get_cache_dir() is not None or checkpoint is not None:
+            cache_key = storage.category_key([x for name_x,x in self.get_objects()],
+                                             [m for name_m,m in generators])
+        if storage.get_cache_dir() is not None:
+            arrays = storage.load_cache_entry(cache_key)
+            if arrays is not None:
+                self._set_from_arrays(arrays)
+                self._cache_key = cache_key
+                n_bytes = 0
+                for name_f in self._morphism_names:
+                    n_bytes += self.morphisms[name_f]._get_nbytes()+GENERATION_OVERHEAD_BYTES
+                self._check_generation_limits(max_morphisms,max_time,max_memory,start_time,n_bytes)
+                if self.use_cayley_table:
+                    self._get_cayley_table()
+                for name_f in list(self._morphism_names):
+                    yield name_f,self.morphisms[name_f]
+                return
+
+        N_gen = len(generators)
+
+        state = None
+        if checkpoint is not None:
+            state = storage.load_checkpoint(checkpoint)
+            if state is not None and not str(state["key"][()])==cache_key:
+                raise Exception("The checkpoint file was written for another category action")
+
+        if state is not None:
+            self._set_from_arrays(state)
+            self._clear_cayley_graphs()
+            left = np.asarray(state["left_graph"]).tolist()
+            right = np.asarray(state["right_graph"]).tolist()
+            right_known = np.asarray(state["right_known"]).tolist()
+            first = np.asarray(state["first"]).tolist()
+            suffix = np.asarray(state["suffix"]).tolist()
+            last = np.asarray(state["last"]).tolist()
+            prefix = np.asarray(state["prefix"]).tolist()
+            layer = np.asarray(state["layer"]).tolist()
+            position = int(state["position"])
+            next_layer = np.asarray(state["next_layer"]).tolist()
+        else:
+            self._add_morphisms([m for name_m,m in generators])
+            self._add_identities()
+            names = self._morphism_names
+
+            ## Rows of the left and right Cayley graphs, indexed by morphism.
+            ## Rows of the right Cayley graph are only complete once all
+            ## morphisms of a given length have been generated.
+            left = [[-1]*N_gen for i in range(len(names))]
+            right = [[-1]*N_gen for i in range(len(names))]
+            right_known = [False]*len(names)
+            first = [-1]*len(names)
+            suffix = [-1]*len(names)
+            last = [-1]*len(names)
+            prefix = [-1]*len(names)
+
+            for name_obj,catobject in self.get_objects():
+                x = self._morphism_idx["id_"+name_obj]
+                for a,(name_g,g) in enumerate(generators):
+                    if g.source==catobject:
+                        left[x][a] = a
+                    if g.target==catobject:
+                        right[x][a] = a
+                right_known[x] = True
+            for a,(name_g,g) in enumerate(generators):
+                first[a] = a
+                last[a] = a
+                suffix[a] = self._morphism_idx["id_"+g.source.name]
+                prefix[a] = self._morphism_idx["id_"+g.target.name]
+
+            ## Position of the next morphism to be multiplied in the layer
+            layer = list(range(N_gen))
+            position = 0
+            next_layer = []
+
+        names = self._morphism_names
+        n_bytes = 0
+        for name_f in names:
+            n_bytes += self.morphisms[name_f]._get_nbytes()+GENERATION_OVERHEAD_BYTES
+        try:
+            self._check_generation_limits(max_morphisms,max_time,max_memory,start_time,n_bytes)
+        except GenerationLimitExceeded:
+            ## Keeps the work done since the last checkpoint
+            if checkpoint is not None:
+                self._save_checkpoint(checkpoint,cache_key,N_gen,
+                                      [left,right,right_known,first,suffix,last,prefix],
+                                      layer,position,next_layer)
+            raise
+        for name_f in list(names):
+            yield name_f,self.morphisms[name_f]
+
+        last_checkpoint = time.time()
+        while(len(layer)>0):
+            layer = sorted(layer,key=lambda i:names[i])
+            while position<len(layer):
+                if checkpoint is not None and time.time()-last_checkpoint>checkpoint_interval:
+                    self._save_checkpoint(checkpoint,cache_key,N_gen,
+                                          [left,right,right_known,first,suffix,last,prefix],
+                                          layer,position,next_layer)
+                    last_checkpoint = time.time()
+                x = layer[position]
+                try:
+                    self._check_generation_limits(None,max_time,None,start_time,n_bytes)
+                except GenerationLimitExceeded:
+                    ## Keeps the work done since the last checkpoint
+                    if checkpoint is not None:
+                        self._save_checkpoint(checkpoint,cache_key,N_gen,
+                                              [left,right,right_known,first,suffix,last,prefix],
+                                              layer,position,next_layer)
+                    raise
+                morphism_x = self.morphisms[names[x]]
+                for a,(name_g,morphism_g) in enumerate(generators):
+                    if not morphism_x.target==morphism_g.source:
+                        continue
+                    ## Products already found before the checkpoint was saved
+                    if left[x][a]>=0:
+                        continue
+                    ## g*x = (g*p)*b, where x = p*b
+                    gp = left[prefix[x]][a]
+                    if right_known[gp]:
+                        y = right[gp][last[x]]
+                        self.equivalences.append([name_g+names[x],names[y]])
+                    else:
+                        new_morphism = morphism_g*morphism_x
+                        name_y = self._find_morphism(new_morphism)
+                        if name_y is not None:
+                            self.equivalences.append([new_morphism.name,name_y])
+                            y = self._morphism_idx[name_y]
+                        else:
+                            self._store_morphism(new_morphism)
+                            y = len(names)-1
+                            left.append([-1]*N_gen)
+                            right.append([-1]*N_gen)
+                            right_known.append(False)
+                            first.append(a)
+                            suffix.append(x)
+                            last.append(last[x])
+                            prefix.append(gp)
+                            next_layer.append(y)
+                            left[x][a] = y
+                            n_bytes += new_morphism._get_nbytes()+GENERATION_OVERHEAD_BYTES
+                            try:
+                                self._check_generation_limits(max_morphisms,max_time,max_memory,
+                                                              start_time,n_bytes)
+                            except GenerationLimitExceeded:
+                                ## Keeps the work done since the last checkpoint,
+                                ## including the morphism just found
+                                if checkpoint is not None:
+                                    self._save_checkpoint(checkpoint,cache_key,N_gen,
+                                                          [left,right,right_known,first,suffix,last,prefix],
+                                                          layer,position,next_layer)
+                                raise
+                            yield new_morphism.name,new_morphism
+                    left[x][a] = y
+                position = position+1
+
+            ## x*b = a*(s*b), where x = a*s
+            for x in layer:
+                for b in range(N_gen):
+                    sb = right[suffix[x]][b]
+                    if sb>=0:
+                        right[x][b] = left[sb][first[x]]
+                right_known[x] = True
+            layer = next_layer
+            position = 0
+            next_layer = []
+
+        self._letters = np.arange(N_gen,dtype=np.int32)
+        self._left_graph = np.array(left,dtype=np.int32).reshape(len(names),N_gen)
+        self._right_graph = np.array(right,dtype=np.int32).reshape(len(names),N_gen)
+        self._first = np.array(first,dtype=np.int32)
+        self._suffix = np.array(suffix,dtype=np.int32)
+        self._last = np.array(last,dtype=np.int32)
+        self._prefix = np.array(prefix,dtype=np.int32)
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        if storage.get_cache_dir() is not None:
+            storage.save_cache_entry(cache_key,self._get_arrays())
+            self._cache_key = cache_key
+
+        if self.use_cayley_table:
+            self._build_cayley_table()
+
+    def _save_checkpoint(self,path,key,N_gen,generation_lists,layer,position,next_layer):
+        """Saves the state of the generation of the category in a checkpoint
+        file (see iter_generate).
 
         Parameters
         ----------
-        None
+        path: a string representing the path of the checkpoint file.
+        key: the key of the category action (see opycleid.storage.category_key)
+        N_gen: the number of generators
+        generation_lists: the lists left,right,right_known,first,suffix,last,
+                          prefix built by the generation.
+        layer: the sorted list of the morphisms of the current layer
+        position: the position in the layer of the next morphism to be
+                  multiplied
+        next_layer: the list of the morphisms of the next layer found so far
 
         Returns
         -------
         None
         """
-        operation_names = sorted(self.morphisms.keys())
-        for op_name in operation_names:
-            self.rename_operation(op_name,self._rewrite(op_name))
+        left,right,right_known,first,suffix,last,prefix = generation_lists
+        N = len(self._morphism_names)
+        arrays = self._get_arrays()
+        arrays["key"] = np.array(key)
+        arrays["letters"] = np.arange(N_gen,dtype=np.int32)
+        arrays["left_graph"] = np.array(left,dtype=np.int32).reshape(N,N_gen)
+        arrays["right_graph"] = np.array(right,dtype=np.int32).reshape(N,N_gen)
+        arrays["right_known"] = np.array(right_known,dtype=bool)
+        arrays["first"] = np.array(first,dtype=np.int32)
+        arrays["suffix"] = np.array(suffix,dtype=np.int32)
+        arrays["last"] = np.array(last,dtype=np.int32)
+        arrays["prefix"] = np.array(prefix,dtype=np.int32)
+        arrays["layer"] = np.array(layer,dtype=np.int32)
+        arrays["position"] = np.array(position)
+        arrays["next_layer"] = np.array(next_layer,dtype=np.int32)
+        storage.save_checkpoint(path,arrays)
+
+    def _check_generation_limits(self,max_morphisms,max_time,max_memory,start_time,n_bytes):
+        """Checks whether the generation of the category exceeds the limits
+        given to iter_generate.
 
-        equivalences_new=[]
-        for x,y in self.equivalences:
-            equivalences_new.append([self._rewrite(x),self._rewrite(y)])
-        self.equivalences = equivalences_new
+        Parameters
+        ----------
+        max_morphisms,max_time,max_memory: the limits given to iter_generate,
+                                           None meaning no limit.
+        start_time: the time at which the generation started.
+        n_bytes: the estimated number of bytes taken by the morphisms.
 
-    def _rewrite(self,the_string):
-        """Rewrites a string by trying to reduce repeated patterns of the
-        category action generator names.
+        Returns
+        -------
+        None
+        Raises a GenerationLimitExceeded exception if one of the limits is
+        exceeded.
+        """
+        if max_morphisms is not None and len(self._morphism_names)>max_morphisms:
+            raise GenerationLimitExceeded("The category has more than {} morphisms".format(max_morphisms))
+        if max_time is not None and time.time()-start_time>max_time:
+            raise GenerationLimitExceeded("The generation took more than {} seconds".format(max_time))
+        if max_memory is not None and n_bytes>max_memory:
+            raise GenerationLimitExceeded("The morphisms take more than {} bytes".format(max_memory))
+
+    def add_generators(self,list_morphisms):
+        """Adds generators to the category action, and extends the morphisms
+        with those generated by the new generators. If the category has been
+        generated, the existing morphisms, along with their names and indices,
+        are kept, and only the products involving the new generators are
+        computed. The new morphisms are appended to the index of morphisms, and
+        the Cayley graphs and the Cayley table (if built) are extended.
+        Otherwise, the whole category is generated.
+
+        The new morphisms are the products c*x, where c is any generator and x
+        is either a new morphism or the product b*y of a new generator b and of
+        an existing morphism y. Their names are thus the words in which they are
+        first found this way, and may differ from the names obtained by
+        generating the category from scratch with all the generators.
 
         Parameters
         ----------
-        None
+        list_morphisms: a list of CatMorphism instances representing the
+                        generator morphisms to be added.
 
         Returns
         -------
         None
+        Checks if sources and targets of generators are objects present
+        in the category, raises an Exception otherwise
+        Checks if all generators and morphisms have distinct names, raises an
+        Exception otherwise.
         """
-        if "id" in the_string:
-            return the_string
-
-        generator_names = sorted(self.generators.keys())
+        all_gennames = list(self.generators.keys())+[m.name for m in list_morphisms]
+        if not len(all_gennames)==len(np.unique(all_gennames)):
+            raise Exception("Generators must have distinct names")
 
-        count_list=[["",0]]
-        while(len(the_string)):
-            flag=0
+        cat_obj_names = [x[0] for x in self.get_objects()]
+        for m in list_morphisms:
+            if not isinstance(m,CatMorphism):
+                raise Exception("Generator is not a valid CatMorphism class\n")
+            if not m.source.name in cat_obj_names:
+                raise Exception("Domain or codomain of a generator is not present in the category")
+            if not m.target.name in cat_obj_names:
+                raise Exception("Domain or codomain of a generator is not present in the category")
+            if m.name in self.morphisms:
+                raise Exception("Morphisms should have distinct names")
+
+        if self._left_graph is None:
+            for m in list_morphisms:
+                self.generators[m.name] = m
+            self.generate_category()
+            return
+
+        names = self._morphism_names
+        N_old = len(names)
+        k_old = len(self._letters)
+        N_gen = k_old+len(list_morphisms)
+        letters = self._letters.tolist()
+        left = [row+[-1]*len(list_morphisms) for row in self._left_graph.tolist()]
+        right = [row+[-1]*len(list_morphisms) for row in self._right_graph.tolist()]
+        first = self._first.tolist()
+        suffix = self._suffix.tolist()
+        last = self._last.tolist()
+        prefix = self._prefix.tolist()
+        cayley_table = self.cayley_table
+
+        for m in sorted(list_morphisms,key=lambda x:x.name):
+            self.generators[m.name] = m
+            self._store_morphism(m)
+            letters.append(len(names)-1)
+            left.append([-1]*N_gen)
+            right.append([-1]*N_gen)
+            first.append(len(letters)-1)
+            suffix.append(self._morphism_idx["id_"+m.source.name])
+            last.append(len(letters)-1)
+            prefix.append(self._morphism_idx["id_"+m.target.name])
+        generators = [self.morphisms[names[a]] for a in letters]
+
+        for name_obj,catobject in self.get_objects():
+            x = self._morphism_idx["id_"+name_obj]
+            for b in range(k_old,N_gen):
+                if generators[b].source==catobject:
+                    left[x][b] = letters[b]
+                if generators[b].target==catobject:
+                    right[x][b] = letters[b]
+
+        def left_product(c,x):
+            morphism_x = self.morphisms[names[x]]
+            if not morphism_x.target==generators[c].source:
+                return -1
+            new_morphism = generators[c]*morphism_x
+            name_y = self._find_morphism(new_morphism)
+            if name_y is not None:
+                self.equivalences.append([new_morphism.name,name_y])
+                return self._morphism_idx[name_y]
+            self._store_morphism(new_morphism)
+            left.append([-1]*N_gen)
+            right.append([-1]*N_gen)
+            first.append(c)
+            suffix.append(x)
+            last.append(last[x])
+            prefix.append(-1)
+            return len(names)-1
+
+        ## Products b*y, where b is a new generator and y an existing morphism
+        for x in range(N_old):
+            if first[x]>=0:
+                for b in range(k_old,N_gen):
+                    left[x][b] = left_product(b,x)
+        ## Products c*x, where x is a new morphism
+        x = N_old
+        while x<len(names):
+            for c in range(N_gen):
+                left[x][c] = left_product(c,x)
+            x = x+1
+
+        ## c*x = (c*p)*l, where x = p*l
+        for x in range(N_old+len(list_morphisms),len(names)):
+            prefix[x] = left[prefix[suffix[x]]][first[x]]
+        ## x*b = a*(s*b), where x = a*s. Apart from generators, whose suffix is
+        ## an identity, suffixes have smaller indices than their morphisms.
+        for x in range(len(names)):
+            if first[x]<0:
+                continue
+            for b in range(N_gen) if x>=N_old else range(k_old,N_gen):
+                sb = right[suffix[x]][b]
+                if sb>=0:
+                    right[x][b] = left[sb][first[x]]
+
+        self._letters = np.array(letters,dtype=np.int32)
+        self._left_graph = np.array(left,dtype=np.int32).reshape(len(names),N_gen)
+        self._right_graph = np.array(right,dtype=np.int32).reshape(len(names),N_gen)
+        self._first = np.array(first,dtype=np.int32)
+        self._suffix = np.array(suffix,dtype=np.int32)
+        self._last = np.array(last,dtype=np.int32)
+        self._prefix = np.array(prefix,dtype=np.int32)
+        self._green_classes = None
+        self._graph_views = None
+
+        if cayley_table is not None:
+            self._extend_cayley_table(cayley_table)
+
+    def _extend_cayley_table(self,cayley_table):
+        """Extends the Cayley table after morphisms have been added by
+        add_generators. The entries of the previous table are kept, and the
+        others are obtained from the right Cayley graph, as g*(a*s) = (g*a)*s,
+        where a*s is the normal form of a morphism.
+
+        Parameters
+        ----------
+        cayley_table: the previous Cayley table, whose morphisms are the first
+                      morphisms of the category
+
+        Returns
+        -------
+        None
+        """
+        names = self._morphism_names
+        N = len(names)
+        N_old = len(cayley_table)
+        table = -np.ones((N,N),dtype=np.int32)
+        table[:N_old,:N_old] = cayley_table
+
+        obj_idx = dict((name,i) for i,(name,catobject) in enumerate(self.get_objects()))
+        sources = np.array([obj_idx[self.morphisms[name].source.name] for name in names])
+        identities = [y for y in range(N) if self._first[y]<0]
+        others = [y for y in range(N) if self._first[y]>=0]
+        for y in identities+others:
+            rows = np.arange(N) if y>=N_old else np.arange(N_old,N)
+            if self._first[y]<0:
+                source_y = obj_idx[self.morphisms[names[y]].source.name]
+                table[rows,y] = np.where(sources[rows]==source_y,rows,-1)
+            else:
+                ga = self._right_graph[rows,self._first[y]]
+                column = -np.ones(len(rows),dtype=np.int32)
+                column[ga>=0] = table[ga[ga>=0],self._suffix[y]]
+                table[rows,y] = column
+
+        self.cayley_table = table
+
+    def _get_arrays(self):
+        """Returns the morphisms of the category action, along with the
+        equivalences and the structure built by the generation, as a collection
+        of flat arrays which can be saved and memory-mapped (see
+        opycleid.storage).
+
+        Functional morphisms are stored as arrays of images, and relations as
+        packed columns, concatenated in the order of the morphism indices.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A dictionary, with:
+            - keys: the names of the arrays
+            - values: NumPy arrays
+        """
+        obj_idx = dict((name,i) for i,(name,catobject) in enumerate(self.get_objects()))
+        morphisms = [self.morphisms[name] for name in self._morphism_names]
+        functional = np.array([m._is_functional() for m in morphisms],dtype=bool)
+        images = [m._images if m._is_functional() else np.zeros(0,dtype=np.int32)
+                  for m in morphisms]
+        words = [np.zeros(0,dtype=np.uint64) if m._is_functional() else m._get_words().ravel()
+                 for m in morphisms]
+
+        arrays = {}
+        arrays["names"] = np.array(self._morphism_names,dtype=str)
+        arrays["sources"] = np.array([obj_idx[m.source.name] for m in morphisms],dtype=np.int32)
+        arrays["targets"] = np.array([obj_idx[m.target.name] for m in morphisms],dtype=np.int32)
+        arrays["packed"] = np.array([m.packed for m in morphisms],dtype=bool)
+        arrays["functional"] = functional
+        arrays["images"] = np.concatenate([np.zeros(0,dtype=np.int32)]+images).astype(np.int32)
+        arrays["image_offsets"] = np.cumsum([0]+[len(x) for x in images]).astype(np.int64)
+        arrays["words"] = np.concatenate([np.zeros(0,dtype=np.uint64)]+words).astype(np.uint64)
+        arrays["word_offsets"] = np.cumsum([0]+[len(x) for x in words]).astype(np.int64)
+        arrays["equivalences"] = np.array(self.equivalences,dtype=str).reshape(-1,2)
+        arrays["identities"] = np.array([self._identities.get(name,-1) for name,catobject
+                                         in self.get_objects()],dtype=np.int32)
+        if self._left_graph is not None:
+            arrays["letters"] = self._letters
+            arrays["left_graph"] = self._left_graph
+            arrays["right_graph"] = self._right_graph
+            arrays["first"] = self._first
+            arrays["suffix"] = self._suffix
+            arrays["last"] = self._last
+            arrays["prefix"] = self._prefix
+        if self.cayley_table is not None:
+            arrays["cayley_table"] = self.cayley_table
+        return arrays
+
+    def _set_from_arrays(self,arrays):
+        """Sets the morphisms of the category action, along with the
+        equivalences and the structure built by the generation, from a
+        collection of arrays returned by _get_arrays. The objects and the
+        generators must already be set. The arrays are used without copy, so
+        that memory-mapped arrays stay shared between processes.
+
+        Parameters
+        ----------
+        arrays: a dictionary of NumPy arrays (see _get_arrays)
+
+        Returns
+        -------
+        None
+        """
+        self._clear_morphisms()
+        objects = [catobject for name,catobject in self.get_objects()]
+        sources = np.asarray(arrays["sources"])
+        targets = np.asarray(arrays["targets"])
+        packed = np.asarray(arrays["packed"])
+        functional = np.asarray(arrays["functional"])
+        images = np.asarray(arrays["images"])
+        image_offsets = np.asarray(arrays["image_offsets"])
+        words = np.asarray(arrays["words"])
+        word_offsets = np.asarray(arrays["word_offsets"])
+
+        for i,name in enumerate(np.asarray(arrays["names"]).tolist()):
+            if name in self.generators:
+                morphism = self.generators[name]
+            else:
+                source = objects[sources[i]]
+                morphism = CatMorphism(name,source,objects[targets[i]],packed=bool(packed[i]))
+                if functional[i]:
+                    morphism._set_images(images[image_offsets[i]:image_offsets[i+1]])
+                else:
+                    morphism._set_words(words[word_offsets[i]:word_offsets[i+1]].reshape(
+                        source.get_cardinality(),-1))
+            self._store_morphism(morphism)
+
+        self.equivalences = [list(x) for x in np.asarray(arrays["equivalences"]).tolist()]
+        for catobject,x in zip(objects,np.asarray(arrays["identities"]).tolist()):
+            if x>=0:
+                self._identities[catobject.name] = x
+        if "left_graph" in arrays:
+            self._letters = np.asarray(arrays["letters"])
+            self._left_graph = np.asarray(arrays["left_graph"])
+            self._right_graph = np.asarray(arrays["right_graph"])
+            self._first = np.asarray(arrays["first"])
+            self._suffix = np.asarray(arrays["suffix"])
+            self._last = np.asarray(arrays["last"])
+            self._prefix = np.asarray(arrays["prefix"])
+        if "cayley_table" in arrays:
+            self.cayley_table = np.asarray(arrays["cayley_table"])
+
+    def _get_cayley_graphs(self):
+        """Returns the left and right Cayley graphs of the category.
+
+        If the category has been generated, these are the graphs built during
+        the generation, with one edge per generator. Otherwise, they are read
+        off the Cayley table, with one edge per morphism.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A pair of integer arrays (left,right), each row of which corresponds to
+        a morphism x. The row of left lists the indices of the products g*x,
+        and the row of right the indices of the products x*g, -1 indicating
+        non-composable morphisms. For the graphs built during the generation,
+        the column of a generator g is its letter (see _letters).
+        """
+        if self._left_graph is not None:
+            return self._left_graph,self._right_graph
+        table = self._get_cayley_table()
+        return table.T,table
+
+    def _get_word(self,idx):
+        """Returns the normal form of a generated morphism, i.e. the word in the
+        generators found by the generation of the category.
+
+        Parameters
+        ----------
+        idx: the index of the morphism
+
+        Returns
+        -------
+        A list of letters, i.e. of columns of the Cayley graphs, such that the
+        morphism is the product of the corresponding generators (the morphism
+        index of the generator of a letter being given by _letters). The list
+        is empty for identities.
+        """
+        word = []
+        while self._first[idx]>=0:
+            word.append(int(self._first[idx]))
+            idx = self._suffix[idx]
+        return word
+
+    def _build_cayley_table(self):
+        """Builds the Cayley table of the category, i.e. an integer matrix whose
+        entry (i,j) is the index of the product of the morphisms of indices i
+        and j, or -1 if these morphisms are not composable.
+
+        The columns of the generators are first read off the right Cayley
+        graph if the category has been generated, or computed by composing the
+        morphisms otherwise. The column of a product a*x, where a is a
+        generator, is then obtained without any composition, since
+        g*(a*x) = (g*a)*x is read off the columns of a and x.
+
+        If the category has been loaded from or saved in the on-disk cache, the
+        table is also read from the cache when available, and saved in it
+        otherwise.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self._cache_key is not None:
+            arrays = storage.load_cache_entry(self._cache_key)
+            if arrays is not None and "cayley_table" in arrays:
+                self.cayley_table = np.asarray(arrays["cayley_table"])
+                return
+
+        names = self._morphism_names
+        N = len(names)
+        table = -np.ones((N,N),dtype=np.int32)
+
+        def product_column(f):
+            column = -np.ones(N,dtype=np.int32)
+            for i,name_g in enumerate(names):
+                name_prod = self._mult_morphisms(name_g,names[f])
+                if name_prod is not None:
+                    column[i] = self._morphism_idx[name_prod]
+            return column
+
+        done = np.zeros(N,dtype=bool)
+        for name_obj,catobject in self.get_objects():
+            id_name = "id_"+name_obj
+            if id_name in self._morphism_idx:
+                f = self._morphism_idx[id_name]
+                for i,name_g in enumerate(names):
+                    if self.morphisms[name_g].source==catobject:
+                        table[i,f] = i
+                done[f] = True
+
+        if self._right_graph is not None:
+            gen_indices = self._letters.tolist()
+        else:
+            gen_indices = [self._morphism_idx[name_a] for name_a,a in self.get_generators()
+                           if self._morphism_idx.get(name_a) is not None]
+        queue = []
+        for k,a in enumerate(gen_indices):
+            if not done[a]:
+                if self._right_graph is not None:
+                    table[:,a] = self._right_graph[:,k]
+                else:
+                    table[:,a] = product_column(a)
+                done[a] = True
+            queue.append(a)
+
+        while len(queue):
+            x = queue.pop()
+            for a in gen_indices:
+                y = table[a,x]
+                if y>=0 and not done[y]:
+                    ## g*(a*x) = (g*a)*x
+                    ga = table[:,a]
+                    column = -np.ones(N,dtype=np.int32)
+                    column[ga>=0] = table[ga[ga>=0],x]
+                    table[:,y] = column
+                    done[y] = True
+                    queue.append(y)
+
+        ## Morphisms which cannot be reached from the generators
+        for f in np.where(~done)[0]:
+            table[:,f] = product_column(f)
+
+        self.cayley_table = table
+        if self._cache_key is not None:
+            storage.add_to_cache_entry(self._cache_key,"cayley_table",table)
+
+    def _get_cayley_table(self):
+        """Returns the Cayley table of the category, building it first if needed.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        The Cayley table of the category as an integer matrix (see
+        _build_cayley_table).
+        """
+        if self.cayley_table is None:
+            self._build_cayley_table()
+        return self.cayley_table
+
+    def _mult_morphisms(self,name_g,name_f):
+        """Multiplies two morphisms by composing their mappings, and returns
+        the name of the corresponding morphism.
+
+        Parameters
+        ----------
+        name_g, name_f: a string representing the names of the morphisms
+                        to be multiplied.
+
+        Returns
+        -------
+        A string representing the name of the morphism corresponding
+        to name_g*name_f, or None if the morphisms are not composable.
+        """
+        new_morphism = self.morphisms[name_g]*self.morphisms[name_f]
+        if new_morphism is None:
+            return new_morphism
+        name_prod = self._find_morphism(new_morphism)
+        if name_prod is None:
+            raise Exception("The product is not a morphism of the category action")
+        return name_prod
+
+    def _mult_cayley_graph(self,idx_g,idx_f):
+        """Multiplies two morphisms by following the right Cayley graph along
+        the normal form of the second morphism, i.e. if f is the word a_1...a_m
+        in the generators, g*f is obtained as (...((g*a_1)*a_2)...)*a_m. This
+        requires the category to have been generated.
+
+        Parameters
+        ----------
+        idx_g, idx_f: the indices of the morphisms to be multiplied.
+
+        Returns
+        -------
+        The index of the morphism corresponding to g*f, or -1 if the morphisms
+        are not composable.
+        """
+        ## The walk is done on flat memoryviews of the arrays, whose items are
+        ## accessed much faster than those of NumPy arrays.
+        if self._graph_views is None:
+            self._graph_views = tuple(memoryview(np.ascontiguousarray(x,dtype=np.int32).reshape(-1))
+                                      for x in (self._right_graph,self._first,self._suffix))
+        right,first,suffix = self._graph_views
+        N_gen = self._right_graph.shape[1]
+        if first[idx_f]<0:
+            ## f is an identity
+            name_f = self._morphism_names[idx_f]
+            name_g = self._morphism_names[idx_g]
+            if self.morphisms[name_g].source==self.morphisms[name_f].target:
+                return idx_g
+            return -1
+        cur = idx_g
+        while first[idx_f]>=0 and cur>=0:
+            cur = right[cur*N_gen+first[idx_f]]
+            idx_f = suffix[idx_f]
+        return cur
+
+    def mult(self,name_g,name_f):
+        """Multiplies two morphisms and returns the corresponding morphism.
+        If the Cayley table has been built, the product is directly read from
+        the table. Otherwise, if the category has been generated, the product is
+        obtained from the right Cayley graph (see _mult_cayley_graph).
+
+        Parameters
+        ----------
+        name_g, name_f: a string representing the names of the morphisms
+                        to be multiplied.
+
+        Returns
+        -------
+        A string representing the name of the morphism corresponding
+        to name_g*name_f.
+        """
+        if self.cayley_table is not None:
+            idx_prod = self.cayley_table[self._morphism_idx[name_g],
+                                         self._morphism_idx[name_f]]
+        elif self._right_graph is not None:
+            idx_prod = self._mult_cayley_graph(self._morphism_idx[name_g],
+                                               self._morphism_idx[name_f])
+        else:
+            return self._mult_morphisms(name_g,name_f)
+        if idx_prod<0:
+            return None
+        return self._morphism_names[idx_prod]
+
+    def apply_operation(self,name_f,element):
+        """Applies a morphism to a given element.
+
+        Parameters
+        ----------
+        name_f: a string representing the name of the morphisms to be applied.
+        elem: a string representing the name of the element.
+
+        Returns
+        -------
+        A list of strings representing the images of elem by name_f
+        """
+        return self.morphisms[name_f](element)
+
+    def _get_action_index(self):
+        """Returns the inverse action index of the category action, building it
+        first if needed. The index lists, for each pair of elements (x,y), the
+        morphisms f such that y is an image of x by f.
+
+        Elements are identified by their names across all objects, and each
+        pair of elements is given the integer id i*N+j, where i and j are the
+        ids of the elements and N the number of distinct element names. The
+        morphisms of all pairs are stored contiguously, sorted by pair id, and
+        by morphism name within each pair.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A dictionary, with:
+            - 'elements': a dictionary from element names to element ids
+            - 'pairs': the sorted array of the ids of the pairs having at least
+                       one morphism
+            - 'offsets': an array such that the morphisms of the k-th pair are
+                         stored between offsets[k] and offsets[k+1]
+            - 'operations': the array of the indices of these morphisms
+            - 'positions': a dictionary from pair ids to their position k
+            - 'keys': the sorted array of the ids p*M+f of all the triples of
+                      a pair id p and of the index f of one of its morphisms,
+                      M being the number of morphisms (see _in_action)
+            - 'image_keys': the sorted array of the ids (i*M+f)*N+j of the same
+                            triples, so that the images of an element by a
+                            morphism are stored contiguously (see _get_images)
+        """
+        if self._action_index is not None:
+            return self._action_index
+
+        elements = {}
+        object_ids = {}
+        for name_obj,catobject in self.get_objects():
+            names_obj = [catobject.get_name_by_idx(i) for i in range(catobject.get_cardinality())]
+            for elem in names_obj:
+                elements.setdefault(elem,len(elements))
+            object_ids[name_obj] = np.array([elements[elem] for elem in names_obj],dtype=np.int64)
+        N = len(elements)
+
+        pair_ids = [np.zeros(0,dtype=np.int64)]
+        operations = [np.zeros(0,dtype=np.int32)]
+        for name_f,f in self.get_morphisms():
+            if f._is_functional():
+                idx_source = np.arange(len(f._images))
+                idx_target = f._images
+            else:
+                idx_target,idx_source = np.nonzero(f.get_mapping_matrix())
+            pair_ids.append(object_ids[f.source.name][idx_source]*N+object_ids[f.target.name][idx_target])
+            operations.append(np.full(len(idx_source),self._morphism_idx[name_f],dtype=np.int32))
+        pair_ids = np.concatenate(pair_ids)
+        operations = np.concatenate(operations)
+
+        order = np.argsort(pair_ids,kind="stable")
+        pair_ids = pair_ids[order]
+        pairs,starts = np.unique(pair_ids,return_index=True)
+        keys = np.sort(pair_ids*len(self._morphism_names)+operations[order])
+        image_keys = np.sort(((pair_ids//N)*len(self._morphism_names)+operations[order])*N+pair_ids%N)
+
+        self._action_index = {"elements":elements,
+                              "pairs":pairs,
+                              "offsets":np.append(starts,len(pair_ids)),
+                              "operations":operations[order],
+                              "positions":dict((p,k) for k,p in enumerate(pairs.tolist())),
+                              "keys":keys,
+                              "image_keys":image_keys}
+        return self._action_index
+
+    def _in_action(self,morphisms,elements_1,elements_2):
+        """Checks at once, for each k, if the element elements_2[k] is an
+        image of the element elements_1[k] by the morphism morphisms[k]. This
+        is a lookup in the inverse action index, without any composition of
+        morphisms.
+
+        Parameters
+        ----------
+        morphisms: an integer array of morphism indices
+        elements_1,elements_2: integer arrays of element ids, as given by
+                               the inverse action index (see
+                               _get_action_index)
+
+        Returns
+        -------
+        A boolean array, whose entry k is True if and only if elements_2[k] is
+        an image of elements_1[k] by morphisms[k].
+        """
+        index = self._get_action_index()
+        keys = index["keys"]
+        if not len(keys):
+            return np.zeros(len(morphisms),dtype=bool)
+        N = len(index["elements"])
+        queries = (np.asarray(elements_1,dtype=np.int64)*N+np.asarray(elements_2,dtype=np.int64))* \
+                  len(self._morphism_names)+np.asarray(morphisms,dtype=np.int64)
+        positions = np.minimum(np.searchsorted(keys,queries),len(keys)-1)
+        return keys[positions]==queries
+
+    def _get_images(self,morphisms,elements):
+        """Returns at once, for each k, the images of the element elements[k]
+        by the morphism morphisms[k]. This is a lookup in the inverse action
+        index, without any composition of morphisms.
+
+        Parameters
+        ----------
+        morphisms: an integer array of morphism indices
+        elements: an integer array of element ids, as given by the inverse
+                  action index (see _get_action_index)
+
+        Returns
+        -------
+        A pair of integer arrays (images,offsets), such that the ids of the
+        images of elements[k] by morphisms[k] are images[offsets[k]:offsets[k+1]],
+        in increasing order.
+        """
+        index = self._get_action_index()
+        image_keys = index["image_keys"]
+        N = len(index["elements"])
+        queries = (np.asarray(elements,dtype=np.int64)*len(self._morphism_names)+
+                   np.asarray(morphisms,dtype=np.int64))*N
+        starts = np.searchsorted(image_keys,queries)
+        counts = np.searchsorted(image_keys,queries+N)-starts
+        offsets = np.append(0,np.cumsum(counts))
+        positions = np.repeat(starts-offsets[:-1],counts)+np.arange(offsets[-1])
+        return image_keys[positions]%N,offsets
+
+    def get_operation(self,element_1,element_2):
+        """Returns the operations taking the element element_1 to the element
+        element_2.
+
+        Parameters
+        ----------
+        element_1,element_2 : strings representing the name of the elements.
+
+        Returns
+        -------
+        A list of strings representing the morphisms f such that element_2 is
+        an image of element_1 by f.
+        """
+        index = self._get_action_index()
+        elements = index["elements"]
+        if not element_1 in elements or not element_2 in elements:
+            return []
+        k = index["positions"].get(elements[element_1]*len(elements)+elements[element_2])
+        if k is None:
+            return []
+        ops = index["operations"][index["offsets"][k]:index["offsets"][k+1]]
+        return [self._morphism_names[i] for i in ops]
+
+    def get_operations(self,list_pairs):
+        """Returns the operations taking element_1 to element_2, for each pair
+        (element_1,element_2) in a list. This is equivalent to calling
+        get_operation for each pair, but the lookups are done at once.
+
+        Parameters
+        ----------
+        list_pairs: a list of pairs of strings representing the names of the
+                    elements.
+
+        Returns
+        -------
+        A list of lists of strings, the k-th list representing the morphisms f
+        such that the second element of the k-th pair is an image of the first
+        element by f.
+        """
+        index = self._get_action_index()
+        elements = index["elements"]
+        N = len(elements)
+        pairs = index["pairs"]
+        if not len(pairs):
+            return [[] for x in list_pairs]
+
+        pair_ids = np.array([elements[x]*N+elements[y] if (x in elements and y in elements) else -1
+                             for x,y in list_pairs],dtype=np.int64)
+        positions = np.minimum(np.searchsorted(pairs,pair_ids),len(pairs)-1)
+        found = pairs[positions]==pair_ids
+        starts = index["offsets"][positions]
+        ends = index["offsets"][positions+1]
+
+        res = []
+        for k in range(len(pair_ids)):
+            if found[k]:
+                res.append([self._morphism_names[i] for i in index["operations"][starts[k]:ends[k]]])
+            else:
+                res.append([])
+        return res
+
+    def rename_operation(self,name_f,new_name):
+        """Renames a morphism in the category
+
+        Parameters
+        ----------
+        name_f: a string representing the name of the morphism to be renamed.
+        new_name: a string representing the new name of the morphism.
+
+        Returns
+        -------
+        None
+        """
+        if not name_f in self.morphisms:
+            raise Exception("The specified operation cannot be found")
+        new_op = self.morphisms[name_f].copy()
+        new_op.set_name(new_name)
+        del self.morphisms[name_f]
+        self.morphisms[new_name] = new_op
+        if self._morphism_index.get(new_op._key())==name_f:
+            self._morphism_index[new_op._key()] = new_name
+        idx = self._morphism_idx.pop(name_f)
+        self._morphism_idx[new_name] = idx
+        self._morphism_names[idx] = new_name
+        self._action_index = None
+
+    def rewrite_operations(self):
+        """Rewrites morphism names in the category action by trying to reduce
+        repeated substrings.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        operation_names = sorted(self.morphisms.keys())
+        for op_name in operation_names:
+            self.rename_operation(op_name,self._rewrite(op_name))
+
+        equivalences_new=[]
+        for x,y in self.equivalences:
+            equivalences_new.append([self._rewrite(x),self._rewrite(y)])
+        self.equivalences = equivalences_new
+
+    def _rewrite(self,the_string):
+        """Rewrites a string by trying to reduce repeated patterns of the
+        category action generator names.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if "id" in the_string:
+            return the_string
+
+        generator_names = sorted(self.generators.keys())
+
+        count_list=[["",0]]
+        while(len(the_string)):
+            flag=0
             for name_g in generator_names:
                 if the_string[:len(name_g)]==name_g:
                     flag=1
@@ -768,8 +2756,14 @@ class CategoryAction(object):
         """
         return str(self.morphisms[name_f])
 
-    def get_automorphisms(self):
-        """Returns all automorphisms of the category action.
+    def _get_identities(self):
+        """Returns the indices of the identities of the objects. The index of
+        an identity is recorded when it is added by _add_identities, so that it
+        is found even if it has been renamed, or if another morphism, such as
+        a generator, acts as the identity. Identities which have not been
+        added by _add_identities, e.g. when the morphisms of the category
+        action have been given explicitly, are looked up by content. The
+        result should not be modified.
 
         Parameters
         ----------
@@ -777,23 +2771,251 @@ class CategoryAction(object):
 
         Returns
         -------
-        A list of CategoryFunctor instances corresponding to an automorphism.
+        A dictionary, the keys of which are object names, the values of which
+        are the indices of the corresponding identities.
         """
-        l1 = sorted(self.generators.keys())
-        l2 = sorted(self.morphisms.keys())
-        list_automorphisms = []
+        for name_obj,catobject in self.get_objects():
+            if not name_obj in self._identities:
+                identity_morphism = CatMorphism("id_"+name_obj,catobject,catobject)
+                identity_morphism.set_to_identity()
+                self._identities[name_obj] = self._morphism_idx[self._find_morphism(identity_morphism)]
+        return self._identities
+
+    def _get_action_relation(self):
+        """Returns the action of the morphisms on the elements of all objects,
+        as a single boolean array. Elements are indexed object by object, in
+        the order of the objects names.
 
-        ## Get all maps from the generator set to itself
-        for mapping in itertools.permutations(l2,len(l1)):
-            ## Builds a dictionary representing the generator mapping
-            gen_mapping=dict(zip(l1,mapping))
+        Parameters
+        ----------
+        None
 
-            N = CategoryFunctor(self,self)
-            if N.set_from_generator_mapping(gen_mapping):
-                ## Tests if the given map of generators is indeed an automorphism...
-                if N.is_automorphism():
-                    list_automorphisms.append(N)
-        return list_automorphisms
+        Returns
+        -------
+        A boolean array of shape (N,E,E), where N is the number of morphisms
+        and E the total number of elements, whose entry (f,y,x) is True if and
+        only if the element y is in the image of the element x by the
+        morphism f.
+        """
+        offsets = {}
+        E = 0
+        for name_obj,catobject in self.get_objects():
+            offsets[name_obj] = E
+            E = E+catobject.get_cardinality()
+        relation = np.zeros((len(self._morphism_names),E,E),dtype=bool)
+        for i,name_f in enumerate(self._morphism_names):
+            f = self.morphisms[name_f]
+            s = offsets[f.source.name]
+            t = offsets[f.target.name]
+            relation[i,t:t+f.target.get_cardinality(),s:s+f.source.get_cardinality()] = \
+                f.get_mapping_matrix()
+        return relation
+
+    def _get_padded_matrices(self,indices):
+        """Returns the mapping matrices of the given morphisms, padded with
+        zeros to the largest cardinality of the objects and stacked in a 3-D
+        boolean array. The padded matrices are cached, as the same morphisms
+        are used to check many category action functors.
+
+        Parameters
+        ----------
+        indices: an integer array of morphism indices
+
+        Returns
+        -------
+        A boolean array of shape (n,K,K), where n is the number of indices and
+        K the largest cardinality of the objects.
+        """
+        if self._padded_matrices is None:
+            self._padded_matrices = {}
+        size = max([catobject.get_cardinality() for name_obj,catobject in self.get_objects()]+[0])
+        matrices = np.zeros((len(indices),size,size),dtype=bool)
+        for i,idx in enumerate(indices):
+            matrix = self._padded_matrices.get(idx)
+            if matrix is None:
+                matrix = np.zeros((size,size),dtype=bool)
+                mapping = self.morphisms[self._morphism_names[idx]].get_mapping_matrix()
+                matrix[:mapping.shape[0],:mapping.shape[1]] = mapping
+                self._padded_matrices[idx] = matrix
+            matrices[i] = matrix
+        return matrices
+
+    def get_canonical_form(self):
+        """Returns a canonical form of the category action, i.e. its Cayley
+        table and its action on elements, with morphisms and elements
+        relabeled so that two category actions have the same canonical form if
+        and only if they are isomorphic. An isomorphism is an isomorphism of
+        the categories, along with bijections between the sets of the
+        corresponding objects which are compatible with the action. Names of
+        objects, elements and morphisms are ignored.
+
+        The canonical labeling is computed by partition refinement over the
+        Cayley table and the action (see _canonical_labeling). The result is
+        cached.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A pair (x,y), where:
+            - x is the relabeled Cayley table
+            - y is the relabeled action, as a boolean array (see
+              _get_action_relation)
+        """
+        if self._canonical_form is None:
+            ## The initial colors only use the invariants of the category,
+            ## so that the canonical form does not depend on the class of the
+            ## category action
+            invariants = CategoryAction._get_morphism_invariants(self)
+            ranks = dict((x,i) for i,x in enumerate(sorted(set(invariants))))
+            self._canonical_form = _canonical_labeling(np.asarray(self._get_cayley_table()),
+                                                       self._get_action_relation(),
+                                                       np.array([ranks[x] for x in invariants],dtype=np.int64))
+        return self._canonical_form
+
+    def get_canonical_hash(self):
+        """Returns a hash of the canonical form of the category action (see
+        get_canonical_form). Isomorphic category actions have the same hash,
+        which does not depend on the process or the platform, so that a
+        collection of category actions can be bucketed by hash before testing
+        isomorphism.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A string representing the hexadecimal digest of the canonical form.
+        """
+        table,relation = self.get_canonical_form()
+        digest = hashlib.sha256()
+        digest.update(repr(relation.shape).encode("utf-8"))
+        digest.update(table.astype("<i4").tobytes())
+        digest.update(np.packbits(relation).tobytes())
+        return digest.hexdigest()
+
+    def is_isomorphic(self,cat_action):
+        """Tests if two category actions are isomorphic, by comparing their
+        canonical forms (see get_canonical_form).
+
+        Parameters
+        ----------
+        cat_action: an instance of CategoryAction
+
+        Returns
+        -------
+        True if the category actions are isomorphic, False otherwise.
+        """
+        table_1,relation_1 = self.get_canonical_form()
+        table_2,relation_2 = cat_action.get_canonical_form()
+        return relation_1.shape==relation_2.shape and \
+               np.array_equal(table_1,table_2) and np.array_equal(relation_1,relation_2)
+
+    def _get_morphism_invariants(self):
+        """Computes, for each morphism, a tuple of properties which are
+        preserved by the automorphisms of the category: whether the morphism
+        is an endomorphism, the number of morphisms with the same source and
+        target, whether it is idempotent, and the index and period of its
+        powers if it is an endomorphism.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A list of tuples, indexed by morphism.
+        """
+        table = self._get_cayley_table()
+        names = self._morphism_names
+        hom_sizes = {}
+        for name_f in names:
+            f = self.morphisms[name_f]
+            hom_sizes[(f.source,f.target)] = hom_sizes.get((f.source,f.target),0)+1
+
+        invariants = []
+        for x,name_x in enumerate(names):
+            f = self.morphisms[name_x]
+            index = period = 0
+            if f.source==f.target:
+                ## Computes x, x^2, x^3... until the first repetition
+                powers = {x:1}
+                power_x = x
+                while True:
+                    power_x = int(table[power_x,x])
+                    if power_x in powers:
+                        break
+                    powers[power_x] = len(powers)+1
+                index = powers[power_x]
+                period = len(powers)+1-index
+            invariants.append((f.source==f.target,hom_sizes[(f.source,f.target)],
+                               int(table[x,x])==x,index,period))
+        return invariants
+
+    def get_automorphisms(self,as_group=False):
+        """Returns all automorphisms of the category action.
+
+        The automorphisms are found by a backtracking search, which assigns an
+        image to each generator in turn. Only morphisms with the same
+        invariants as the generator are tried (see _get_morphism_invariants),
+        and each assignment is propagated through the Cayley table to the
+        morphisms generated so far, so that a branch is abandoned as soon as
+        one product is not preserved, or two morphisms have the same image.
+
+        Parameters
+        ----------
+        as_group: optional boolean. If True, the automorphisms are returned as
+                  an AutomorphismGroup instance, i.e. as permutations of the
+                  indices of morphisms, instead of CategoryFunctor instances.
+
+        Returns
+        -------
+        A list of CategoryFunctor instances corresponding to an automorphism,
+        or an instance of AutomorphismGroup if as_group is True.
+        """
+        names = self._morphism_names
+        invariants = self._get_morphism_invariants()
+        gens = [self._morphism_idx[name_g] for name_g in sorted(self.generators.keys())]
+        sorted_idx = [self._morphism_idx[name_f] for name_f in sorted(names)]
+
+        problem = self._get_search_data(self)
+        problem["gens"] = gens
+        problem["candidates"] = [[y for y in sorted_idx if invariants[y]==invariants[g]] for g in gens]
+        problem["injective"] = True
+
+        list_permutations = [image for image,object_image in _search_functors(problem)]
+        group = AutomorphismGroup(self,np.array(list_permutations,dtype=np.int32).reshape(-1,len(names)))
+        if as_group:
+            return group
+        return [group.get_functor(permutation) for permutation in group]
+
+    def _get_search_data(self,cat_action_target):
+        """Returns the arrays describing the source and target category actions
+        in a search of functors (see _search_functors).
+
+        Parameters
+        ----------
+        cat_action_target: an instance of CategoryAction, the target of the
+                           functors
+
+        Returns
+        -------
+        A dictionary of arrays and lists, which can be sent to other processes.
+        """
+        data = {}
+        for prefix,cat_action in [("source",self),("target",cat_action_target)]:
+            objects = [name_obj for name_obj,catobject in cat_action.get_objects()]
+            object_idx = dict((name_obj,i) for i,name_obj in enumerate(objects))
+            identities = cat_action._get_identities()
+            names = cat_action._morphism_names
+            data[prefix+"_table"] = np.asarray(cat_action._get_cayley_table(),dtype=np.int32)
+            data[prefix+"_sources"] = [object_idx[cat_action.morphisms[name_f].source.name] for name_f in names]
+            data[prefix+"_targets"] = [object_idx[cat_action.morphisms[name_f].target.name] for name_f in names]
+            data[prefix+"_identities"] = [identities[name_obj] for name_obj in objects]
+        return data
 
 class MonoidAction(CategoryAction):
     """Defines a monoid action,
@@ -817,9 +3039,7 @@ class MonoidAction(CategoryAction):
                         simply transitive or not.
     """
     def __init__(self,use_cayley_table=False):
-        super(MonoidAction,self).__init__()
-        self.cayley_table = None
-        self.use_cayley_table = use_cayley_table
+        super(MonoidAction,self).__init__(use_cayley_table=use_cayley_table)
 
     def set_objects(self,list_objects):
         """Add musical objects to the monoid action.
@@ -832,14 +3052,38 @@ class MonoidAction(CategoryAction):
         -------
         None
         """
+        equivalences = self.equivalences
         self.objects={}
         self.generators={}
-        self.morphisms={}
+        self._clear_morphisms()
+        self.equivalences = equivalences
         if len(list_objects)>1:
             raise Exception("A monoid must have a single object")
         for catobject in list_objects:
             self.objects[catobject.name] = catobject
 
+    def _get_morphism_invariants(self):
+        """Computes, for each operation, a tuple of properties which are
+        preserved by the automorphisms of the monoid. In addition to those of
+        CategoryAction._get_morphism_invariants, these include the sizes of the
+        R, L, H and D classes of the operation.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A list of tuples, indexed by operation.
+        """
+        invariants = super(MonoidAction,self)._get_morphism_invariants()
+        green_classes = self._get_green_classes()
+        class_sizes = []
+        for relation in ['R','L','H','D']:
+            class_idx = green_classes[relation]
+            class_sizes.append(np.bincount(class_idx)[class_idx].tolist())
+        return [x+y for x,y in zip(invariants,zip(*class_sizes))]
+
     def get_object(self):
         """Returns the unique object of the monoid.
 
@@ -853,25 +3097,6 @@ class MonoidAction(CategoryAction):
         """
         return self.get_objects()[0]
 
-    def generate_category(self):
-        super().generate_category()
-        self.cayley_table = None
-        if self.use_cayley_table:
-            self._build_cayley_table()
-
-    def _build_cayley_table(self):
-        d={}
-        for name_f,f in self.get_morphisms():
-            for name_g,g in self.get_morphisms():
-                d[(name_f,name_g)] = self.mult(name_f,name_g)
-        self.cayley_table = d
-
-    def mult(self,name_g,name_f):
-        if self.cayley_table is None:
-            return super().mult(name_g,name_f)
-        else:
-            return self.cayley_table[(name_g,name_f)]
-
 
     def is_simplytransitive(self):
         """Checks if the monoid action is simply transitive.
@@ -891,6 +3116,99 @@ class MonoidAction(CategoryAction):
             M += (f.get_mapping_matrix()).astype(int)
         return np.array_equal(M,np.ones((N,N)))
 
+    def _get_green_classes(self):
+        """Computes Green's relations of the monoid. Two operations are
+        R-related (resp. L-related) if and only if they lie in the same strongly
+        connected component of the right (resp. left) Cayley graph, and
+        J-related if and only if they lie in the same strongly connected
+        component of the union of both graphs. The result is cached.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A dictionary whose keys are 'R', 'L', 'H', 'D' and 'J', and whose
+        values are integer arrays giving the index of the class of each
+        operation. As the monoid is finite, the D and J relations coincide.
+        """
+        if self._green_classes is None:
+            left,right = self._get_cayley_graphs()
+            R = _strongly_connected_components(right)
+            L = _strongly_connected_components(left)
+            J = _strongly_connected_components(np.hstack([left,right]))
+            H = np.unique(np.stack([R,L],axis=1),axis=0,return_inverse=True)[1].ravel()
+            self._green_classes = {'R':R,'L':L,'H':H,'D':J,'J':J}
+        return self._green_classes
+
+    def _get_classes(self,relation):
+        """Returns the classes of one of Green's relations.
+
+        Parameters
+        ----------
+        relation: one of 'R', 'L', 'H', 'D' or 'J'
+
+        Returns
+        -------
+        A list of lists, each list being a class. Operations in each class are
+        sorted by name, and classes are sorted by the name of their first
+        operation.
+        """
+        class_idx = self._get_green_classes()[relation]
+        classes = {}
+        for name_f in sorted(self.morphisms.keys()):
+            classes.setdefault(class_idx[self._morphism_idx[name_f]],[]).append(name_f)
+        return list(classes.values())
+
+    def _get_element_class(self,relation,op_name):
+        """Returns the class of a given operation for one of Green's relations.
+
+        Parameters
+        ----------
+        relation: one of 'R', 'L', 'H', 'D' or 'J'
+        op_name : a string describing an operation of the monoid.
+
+        Returns
+        -------
+        A list of operations related to op_name, sorted by name.
+        """
+        class_idx = self._get_green_classes()[relation]
+        c = class_idx[self._morphism_idx[op_name]]
+        return [name_g for name_g in sorted(self.morphisms.keys())
+                if class_idx[self._morphism_idx[name_g]]==c]
+
+    def _get_ideals(self,relation):
+        """Computes all left or right ideals of the monoid, as the unions of
+        L classes (resp. R classes) which are closed in the left (resp. right)
+        Cayley graph.
+
+        Parameters
+        ----------
+        relation: 'L' for left ideals, 'R' for right ideals
+
+        Returns
+        -------
+        A list of lists, each list being an ideal given as the concatenation of
+        its classes. Ideals are sorted by their number of classes, then by the
+        positions of their classes in the list of classes.
+        """
+        left,right = self._get_cayley_graphs()
+        graph = left if relation=='L' else right
+        class_idx = self._get_green_classes()[relation]
+        classes = self._get_classes(relation)
+        position = dict((class_idx[self._morphism_idx[c[0]]],i) for i,c in enumerate(classes))
+
+        successors = [set() for c in classes]
+        for x,row in enumerate(graph):
+            for y in row:
+                if y>=0 and not class_idx[x]==class_idx[y]:
+                    successors[position[class_idx[x]]].add(position[class_idx[y]])
+
+        ideals = sorted([sorted(c) for c in _closed_subsets(successors)],
+                        key=lambda c:(len(c),c))
+        return [list(itertools.chain.from_iterable(classes[i] for i in c)) for c in ideals]
+
     def element_Rclass(self,op_name):
         """Generates the R class for a given operation x in the monoid,
         i.e. all elements y of the monoid such that
@@ -906,13 +3224,7 @@ class MonoidAction(CategoryAction):
         -------
         A list of operations related to op_name by Green's R relation.
         """
-        list_Req = []
-        I1 = np.unique([self.mult(op_name,name_x) for name_x,x in self.get_morphisms()])
-        for name_g,g in self.get_morphisms():
-            I2 = np.unique([self.mult(name_g,name_x) for name_x,x in self.get_morphisms()])
-            if sorted(I2) == sorted(I1):
-                list_Req.append(name_g)
-        return list_Req
+        return self._get_element_class('R',op_name)
 
     def element_Lclass(self,op_name):
         """Generates the L class for a given operation x in the monoid,
@@ -929,13 +3241,7 @@ class MonoidAction(CategoryAction):
         -------
         A list of operations related to op_name by Green's L relation.
         """
-        list_Req = []
-        I1 = np.unique([self.mult(name_x,op_name) for name_x,x in self.get_morphisms()])
-        for name_g,g in self.get_morphisms():
-            I2 = np.unique([self.mult(name_x,name_g) for name_x,x in self.get_morphisms()])
-            if sorted(I2) == sorted(I1):
-                list_Req.append(name_g)
-        return list_Req
+        return self._get_element_class('L',op_name)
 
     def get_Rclasses(self):
         """Computes all R classes for the monoid.
@@ -948,17 +3254,7 @@ class MonoidAction(CategoryAction):
         -------
         A list of lists, each list being an R class.
         """
-        list_op = list(zip(sorted(self.morphisms.keys()),
-                           [0]*len(self.morphisms.keys())))
-        R_classes = []
-        for x,visited in list_op:
-            if not visited:
-                R_class = self.element_Rclass(x)
-                R_classes.append(R_class)
-                for i,(y,flag) in enumerate(list_op):
-                    if y in R_class:
-                        list_op[i]=(y,1)
-        return R_classes
+        return self._get_classes('R')
 
     def get_Lclasses(self):
         """Computes all L classes for the monoid.
@@ -971,17 +3267,50 @@ class MonoidAction(CategoryAction):
         -------
         A list of lists, each list being an L class.
         """
-        list_op = list(zip(sorted(self.morphisms.keys()),
-                           [0]*len(self.morphisms.keys())))
-        L_classes = []
-        for x,visited in list_op:
-            if not visited:
-                L_class = self.element_Lclass(x)
-                L_classes.append(L_class)
-                for i,(y,flag) in enumerate(list_op):
-                    if y in L_class:
-                        list_op[i]=(y,1)
-        return L_classes
+        return self._get_classes('L')
+
+    def get_Hclasses(self):
+        """Computes all H classes for the monoid, i.e. the intersections of
+        R classes and L classes.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A list of lists, each list being an H class.
+        """
+        return self._get_classes('H')
+
+    def get_Dclasses(self):
+        """Computes all D classes for the monoid. Recall that we have xDy if
+        there exists z such that xRz and zLy. As the monoid is finite, the D
+        classes coincide with the J classes.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A list of lists, each list being a D class.
+        """
+        return self._get_classes('D')
+
+    def get_Jclasses(self):
+        """Computes all J classes for the monoid.
+        Recall that we have xJy if SxS=SyS where S is the monoid.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A list of lists, each list being a J class.
+        """
+        return self._get_classes('J')
 
     def get_leftIdeals(self):
         """Computes all left ideals for the monoid.
@@ -998,16 +3327,7 @@ class MonoidAction(CategoryAction):
         -------
         A list of lists, each list being a left ideal of the monoid.
         """
-        leftIdeals = []
-
-        L_classes = self.get_Lclasses()
-        for i in range(len(L_classes)+1):
-            for x in itertools.combinations(L_classes, i):
-                subset = list(itertools.chain.from_iterable(x))
-                if self.is_leftIdeal(subset):
-                    leftIdeals.append(subset)
-
-        return leftIdeals
+        return self._get_ideals('L')
 
     def is_leftIdeal(self,S):
         """Checks if a subset S is a left ideal.
@@ -1020,12 +3340,9 @@ class MonoidAction(CategoryAction):
         -------
         A boolean indicating if S is a left ideal.
         """
-        for m in S:
-            for name_f,f in self.get_morphisms():
-                t = self.mult(name_f,m)
-                if not t in S:
-                    return False
-        return True
+        table = self._get_cayley_table()
+        indices = [self._morphism_idx[m] for m in S]
+        return bool(np.all(np.isin(table[:,indices],indices)))
 
     def get_rightIdeals(self):
         """Computes all right ideals for the monoid.
@@ -1042,16 +3359,7 @@ class MonoidAction(CategoryAction):
         -------
         A list of lists, each list being a right ideal of the monoid.
         """
-        rightIdeals = []
-
-        R_classes = self.get_Rclasses()
-        for i in range(len(R_classes)+1):
-            for x in itertools.combinations(R_classes, i):
-                subset = list(itertools.chain.from_iterable(x))
-                if self.is_rightIdeal(subset):
-                    rightIdeals.append(subset)
-
-        return rightIdeals
+        return self._get_ideals('R')
 
     def is_rightIdeal(self,S):
         """Checks if a subset S is a right ideal.
@@ -1064,12 +3372,9 @@ class MonoidAction(CategoryAction):
         -------
         A boolean indicating if S is a right ideal.
         """
-        for m in S:
-            for name_f,f in self.get_morphisms():
-                t = self.mult(m,name_f)
-                if not t in S:
-                    return False
-        return True
+        table = self._get_cayley_table()
+        indices = [self._morphism_idx[m] for m in S]
+        return bool(np.all(np.isin(table[indices,:],indices)))
 
 
 class CategoryFunctor(object):
@@ -1097,6 +3402,121 @@ class CategoryFunctor(object):
         self.morphisms_mapping = None
         self.generators_mapping = None
 
+    @staticmethod
+    def enumerate(cat_action_source,cat_action_target,pool=None):
+        """Static method enumerating all functors between two category actions,
+        for example all homomorphisms between two monoids.
+
+        The candidate images of the generators are first reduced by arc
+        consistency over the relations between the generators. The functors
+        are then found by a backtracking search, which assigns an image to each
+        generator in turn, and abandons a branch as soon as one product is not
+        preserved (see _search_functors).
+
+        Parameters
+        ----------
+        cat_action_source, cat_action_target: instances of CategoryAction, the
+                                              domain and codomain of the functors
+        pool: optional pool of processes, such as a multiprocessing.Pool or a
+              concurrent.futures.ProcessPoolExecutor. If given, the search is
+              split according to the image of the first generator, and the
+              branches are searched in the processes of the pool.
+
+        Yields
+        -------
+        CategoryFunctor instances, ordered by the names of the images of the
+        generators (taken in the order of their names).
+        """
+        if not isinstance(cat_action_source,CategoryAction):
+           raise Exception("Source is not a valid CategoryAction class\n")
+        if not isinstance(cat_action_target,CategoryAction):
+            raise Exception("Target is not a valid CategoryAction class\n")
+
+        gen_names = sorted(cat_action_source.generators.keys())
+        target_names = cat_action_target._morphism_names
+        problem = cat_action_source._get_search_data(cat_action_target)
+        problem["gens"] = [cat_action_source._morphism_idx[name_g] for name_g in gen_names]
+        problem["candidates"] = [[cat_action_target._morphism_idx[name_f] for name_f in sorted(target_names)]
+                                 for name_g in gen_names]
+        problem["injective"] = False
+        relations = _generator_relations(problem["source_table"],problem["gens"],
+                                         problem["source_identities"])
+        problem["candidates"] = _arc_consistent_candidates(problem,relations)
+
+        if pool is None or len(gen_names)==0:
+            results = _search_functors(problem)
+        else:
+            tasks = [(problem,[y]) for y in problem["candidates"][0]]
+            branches = getattr(pool,"imap",pool.map)(_search_functors_branch,tasks)
+            results = (result for branch in branches for result in branch)
+
+        source_objects = [name_obj for name_obj,catobject in cat_action_source.get_objects()]
+        target_objects = [name_obj for name_obj,catobject in cat_action_target.get_objects()]
+        for image,object_image in results:
+            N_functor = CategoryFunctor(cat_action_source,cat_action_target)
+            N_functor._set_morphism_array(image)
+            N_functor.object_mapping = dict((name_obj,target_objects[i])
+                                            for name_obj,i in zip(source_objects,object_image))
+            N_functor.generators_mapping = dict((name_g,target_names[image[g]])
+                                                for name_g,g in zip(gen_names,problem["gens"]))
+            yield N_functor
+
+    @property
+    def morphisms_mapping(self):
+        """The mapping of the morphisms, as a dictionary whose keys are the
+        names of the morphisms of the source category action, and whose values
+        are the names of their images. If the functor has been set from an
+        array of indices, the dictionary is built on first access. The
+        dictionary should not be modified in place.
+        """
+        if self._morphisms_mapping is None and self._morphism_array is not None:
+            names = self.cat_action_target._morphism_names
+            self._morphisms_mapping = dict((name_f,names[y]) for name_f,y in
+                                           zip(self.cat_action_source._morphism_names,
+                                               self._morphism_array.tolist()))
+        return self._morphisms_mapping
+
+    @morphisms_mapping.setter
+    def morphisms_mapping(self,morphisms_mapping):
+        self._morphisms_mapping = morphisms_mapping
+        self._morphism_array = None
+
+    def _set_morphism_array(self,morphism_array):
+        """Sets the mapping of the morphisms from an array of indices.
+
+        Parameters
+        ----------
+        morphism_array: an integer array, whose entry x is the index of the
+                        image of the morphism of index x in the source category
+                        action.
+
+        Returns
+        -------
+        None
+        """
+        self._morphisms_mapping = None
+        self._morphism_array = np.asarray(morphism_array,dtype=np.int32)
+
+    def _get_morphism_array(self):
+        """Returns the mapping of the morphisms as an array of indices, building
+        it from the dictionary of the mapping if needed.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        An integer array, whose entry x is the index of the image of the
+        morphism of index x in the source category action.
+        """
+        if self._morphism_array is None:
+            morphism_idx = self.cat_action_target._morphism_idx
+            self._morphism_array = np.array([morphism_idx[self._morphisms_mapping[name_f]]
+                                             for name_f in self.cat_action_source._morphism_names],
+                                            dtype=np.int32)
+        return self._morphism_array
+
 
     def set_fullmapping(self,object_mapping,morphism_mapping):
         """Sets the mapping of morphisms and objects between the domain and
@@ -1160,37 +3580,49 @@ class CategoryFunctor(object):
         if not len(object_mapping)==num_objects:
             return False
 
-        full_mapping = gen_mapping.copy()
+        source = self.cat_action_source
+        target = self.cat_action_target
+        F = -np.ones(len(source._morphism_names),dtype=np.int32)
+        source_identities = source._get_identities()
+        target_identities = target._get_identities()
         for obj,image_obj in object_mapping:
-            full_mapping["id_"+obj] = "id_"+image_obj
+            F[source_identities[obj]] = target_identities[image_obj]
+            ## The identity is also seeded by name, should its content be
+            ## held by another morphism, such as a generator
+            if "id_"+obj in source._morphism_idx:
+                F[source._morphism_idx["id_"+obj]] = target_identities[image_obj]
+        gens = np.array([source._morphism_idx[name_g] for name_g,g in source.get_generators()],dtype=np.int32)
+        F[gens] = [target._morphism_idx[gen_mapping[name_g]] for name_g,g in source.get_generators()]
 
-        new_liste = self.cat_action_source.generators.copy()
-        added_liste = self.cat_action_source.generators.copy()
+        source_table = source._get_cayley_table()
+        target_table = target._get_cayley_table()
 
         ## This is a variant of the category action generation method.
-        ## It generates the category and their images by the map of generators.
-        ## If it does not give a multi-valued function, we get the corresponding
-        ## functor.
-
-        while(len(added_liste)>0):
-            added_liste = []
-            for name_x in new_liste:
-                for name_g,g in self.cat_action_source.get_generators():
-                    name_product = self.cat_action_source.mult(name_g,name_x)
-                    name_imageproduct = self.cat_action_target.mult(full_mapping[name_g],full_mapping[name_x])
-                    if name_product is not None and name_imageproduct is not None:
-                        if not name_product in full_mapping:
-                            added_liste.append(name_product)
-                            full_mapping[name_product] = name_imageproduct
-                        elif not full_mapping[name_product] == name_imageproduct:
-                            ## If the generated element already exists, we check that its existing image corresponds
-                            ## to the image which has just been calculated
-                            return False
-            new_liste = added_liste[:]
+        ## It generates the category and their images by the map of generators,
+        ## all the products g*x of a generation being computed at once on the
+        ## Cayley tables. If it does not give a multi-valued function, we get
+        ## the corresponding functor.
+        new_liste = gens
+        while len(new_liste)>0:
+            products = source_table[gens[:,None],new_liste[None,:]]
+            image_products = target_table[F[gens][:,None],F[new_liste][None,:]]
+            composable = (products>=0) & (image_products>=0)
+            products = products[composable]
+            image_products = image_products[composable]
+            added = F[products]<0
+            F[products[added]] = image_products[added]
+            ## If the generated element already exists, or has been generated
+            ## several times, we check that its image corresponds to the image
+            ## which has just been calculated
+            if not np.all(F[products]==image_products):
+                return False
+            new_liste = np.unique(products[added])
 
+        if np.any(F<0):
+            return False
         self.generators_mapping = gen_mapping.copy()
         self.object_mapping = dict(object_mapping)
-        self.morphisms_mapping = full_mapping.copy()
+        self._set_morphism_array(F)
 
         ## By construction, this is functorial, so there is no need to check
         ## with the is_valid() method
@@ -1209,12 +3641,9 @@ class CategoryFunctor(object):
         A string representing the image of the object by this functor.
         """
 
-        source_obj_names = [x[0] for x in self.cat_action_source.get_objects()]
-        source_mor_names = [x[0] for x in self.cat_action_source.get_morphisms()]
-
-        if rhs in source_obj_names:
+        if rhs in self.cat_action_source.objects:
             return self.get_image_object(rhs)
-        elif rhs in source_mor_names:
+        elif rhs in self.cat_action_source.morphisms:
             return self.get_image_morphism(rhs)
         else:
             raise Exception("Not an object or a morphism")
@@ -1287,36 +3716,34 @@ class CategoryFunctor(object):
         ## We first need that the source and targets of each morphisms
         ## are correctly mapped, i.e. to check that for f:X->Y in the source
         ## category, the image N(f) is a morphism from N(X) to N(Y)
-
-        for name_f,f in self.cat_action_source.get_morphisms():
-            source_name = f.source.name
-            target_name = f.target.name
-
-            image_name_f = self(name_f)
-
-            source_image_name = self.cat_action_target.morphisms[image_name_f].source.name
-            target_image_name = self.cat_action_target.morphisms[image_name_f].target.name
-            if not ((self(source_name)==source_image_name) and \
-                    (self(target_name)==target_image_name)):
-                return False
+        source = self.cat_action_source
+        target = self.cat_action_target
+        F = self._get_morphism_array()
+        target_objects = [name_obj for name_obj,catobject in target.get_objects()]
+        object_idx = dict((name_obj,i) for i,name_obj in enumerate(target_objects))
+        try:
+            image_objects = [(object_idx[self.object_mapping[source.morphisms[name_f].source.name]],
+                              object_idx[self.object_mapping[source.morphisms[name_f].target.name]])
+                             for name_f in source._morphism_names]
+        except KeyError:
+            return False
+        objects_of_images = [(object_idx[target.morphisms[name_f].source.name],
+                              object_idx[target.morphisms[name_f].target.name])
+                             for name_f in target._morphism_names]
+        if not np.array_equal(np.array(image_objects,dtype=np.int32).reshape(-1,2),
+                              np.array(objects_of_images,dtype=np.int32).reshape(-1,2)[F]):
+            return False
 
         ## Then we need to check if N is an actual functor, i.e. for all
-        ## f:X->Y and g:Y->Z in the source category, we have N(gf)=N(g)N(f)
-
-        for name_f,f in self.cat_action_source.get_morphisms():
-            for name_g,g in self.cat_action_source.get_morphisms():
-                prod = self.cat_action_source.mult(name_g,name_f)
-                if prod is not None:
-                    image_name_f = self(name_f)
-                    image_name_g = self(name_g)
-                    image_prod = self.cat_action_target.mult(image_name_g,image_name_f)
-                    if image_prod is None:
-                        ## N(g) and N(f) are not composable, so this is not a functor
-                        return False
-                    ## Finally we check if we indeed have N(gf)=N(g)N(f)
-                    if not self(prod)==image_prod:
-                        return False
-        return True
+        ## f:X->Y and g:Y->Z in the source category, we have N(gf)=N(g)N(f).
+        ## This is checked on the whole Cayley tables at once: if N(g) and
+        ## N(f) are not composable, the entry of the target table is -1 and
+        ## cannot be equal to N(gf)
+        source_table = source._get_cayley_table()
+        target_table = target._get_cayley_table()
+        composable = source_table>=0
+        image_products = target_table[F[:,None],F[None,:]]
+        return bool(np.all(F[source_table[composable]]==image_products[composable]))
 
     def is_automorphism(self):
         """Checks if the specified functor is an automorphism.
@@ -1342,13 +3769,8 @@ class CategoryFunctor(object):
 
         ## Then we need to check if the morphism mapping is bijective
 
-        num_morphisms = len(self.cat_action_source.get_morphisms())
-
-        if not (len(set(self.morphisms_mapping.keys()))==num_morphisms and \
-               len(set(self.morphisms_mapping.values()))==num_morphisms):
-            return False
-
-        return True
+        F = self._get_morphism_array()
+        return len(np.unique(F))==len(F)
 
     def __mul__(self,cat_functor):
         """Compose two category functors
@@ -1369,11 +3791,11 @@ class CategoryFunctor(object):
 
         new_cat_functor =  CategoryFunctor(cat_functor.cat_action_source,
                                            self.cat_action_target)
-        gen_mapping = {}
-        for name_g,g in cat_functor.cat_action_source.get_generators():
-            image_name_g = cat_functor(name_g)
-            gen_mapping[name_g] = self(image_name_g)
-        new_cat_functor.set_from_generator_mapping(gen_mapping)
+        new_cat_functor._set_morphism_array(self._get_morphism_array()[cat_functor._get_morphism_array()])
+        new_cat_functor.object_mapping = dict((name_obj,self.object_mapping[image_obj])
+                                              for name_obj,image_obj in cat_functor.object_mapping.items())
+        new_cat_functor.generators_mapping = dict((name_g,new_cat_functor(name_g))
+                                                  for name_g in cat_functor.cat_action_source.generators)
 
         return new_cat_functor
 
@@ -1394,8 +3816,253 @@ class CategoryFunctor(object):
         if self is None or cat_functor is None:
             return False
 
+        if cat_functor.cat_action_source is self.cat_action_source and \
+           cat_functor.cat_action_target is self.cat_action_target:
+            return np.array_equal(cat_functor._get_morphism_array(),self._get_morphism_array())
         return cat_functor.morphisms_mapping==self.morphisms_mapping
 
+class AutomorphismGroup(object):
+    def __init__(self,cat_action,permutations):
+        """Instantiates an AutomorphismGroup class, i.e. the group of the
+        automorphisms of a category action, as returned by
+        CategoryAction.get_automorphisms. Each automorphism is represented by
+        the permutation of the indices of morphisms it induces, so that
+        automorphisms can be enumerated, composed, inverted and applied in bulk
+        without building a CategoryFunctor for each of them.
+
+        Parameters
+        ----------
+        cat_action: an instance of CategoryAction
+        permutations: an integer array whose rows are the automorphisms, such
+                      that permutations[i,x] is the index of the image of the
+                      morphism of index x by the i-th automorphism.
+
+        Returns
+        -------
+        None
+        """
+        if not isinstance(cat_action,CategoryAction):
+            raise Exception("Not a valid CategoryAction class\n")
+        self.cat_action = cat_action
+        self.permutations = np.asarray(permutations,dtype=np.int32)
+        self._identities = cat_action._get_identities()
+        self._generators = None
+        self._index = None
+
+    def __len__(self):
+        """Returns the order of the automorphism group.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        An integer representing the number of automorphisms.
+        """
+        return self.permutations.shape[0]
+
+    def __iter__(self):
+        """Iterates over the automorphisms.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        An iterator over the automorphisms, as permutation arrays.
+        """
+        return iter(self.permutations)
+
+    def __getitem__(self,i):
+        """Returns the i-th automorphism.
+
+        Parameters
+        ----------
+        i: an integer
+
+        Returns
+        -------
+        The automorphism as a permutation array.
+        """
+        return self.permutations[i]
+
+    def _get_permutation(self,automorphism):
+        """Converts an automorphism to a permutation array.
+
+        Parameters
+        ----------
+        automorphism: a permutation array, or an instance of CategoryFunctor
+                      from the category action to itself
+
+        Returns
+        -------
+        An integer array representing the permutation of the indices of
+        morphisms.
+        """
+        if isinstance(automorphism,CategoryFunctor):
+            return automorphism._get_morphism_array()
+        return np.asarray(automorphism,dtype=np.int32)
+
+    def index(self,automorphism):
+        """Returns the position of an automorphism in the group.
+
+        Parameters
+        ----------
+        automorphism: a permutation array, or an instance of CategoryFunctor
+
+        Returns
+        -------
+        An integer i such that self[i] is the given automorphism, or None if
+        it does not belong to the group.
+        """
+        if self._index is None:
+            self._index = dict((permutation.tobytes(),i)
+                               for i,permutation in enumerate(self.permutations))
+        permutation = self._get_permutation(automorphism)
+        if not permutation.shape==self.permutations.shape[1:]:
+            return None
+        return self._index.get(permutation.tobytes())
+
+    def __contains__(self,automorphism):
+        """Tests if an automorphism belongs to the group.
+
+        Parameters
+        ----------
+        automorphism: a permutation array, or an instance of CategoryFunctor
+
+        Returns
+        -------
+        True if the automorphism belongs to the group, False otherwise.
+        """
+        return self.index(automorphism) is not None
+
+    def compose(self,automorphism_1,automorphism_2):
+        """Composes two automorphisms.
+
+        Parameters
+        ----------
+        automorphism_1, automorphism_2: permutation arrays
+
+        Returns
+        -------
+        The permutation array of automorphism_1 * automorphism_2, i.e. of the
+        automorphism obtained by applying automorphism_2 first.
+        """
+        return np.asarray(automorphism_1)[np.asarray(automorphism_2)]
+
+    def invert(self,automorphism):
+        """Inverts an automorphism.
+
+        Parameters
+        ----------
+        automorphism: a permutation array
+
+        Returns
+        -------
+        The permutation array of the inverse automorphism.
+        """
+        automorphism = np.asarray(automorphism)
+        inverse = np.empty_like(automorphism)
+        inverse[automorphism] = np.arange(len(automorphism),dtype=automorphism.dtype)
+        return inverse
+
+    def sample(self,k,seed=None):
+        """Draws automorphisms uniformly at random, with replacement.
+
+        Parameters
+        ----------
+        k: an integer, the number of automorphisms to draw
+        seed: optional integer, the seed of the random number generator
+
+        Returns
+        -------
+        An integer array whose k rows are the drawn automorphisms.
+        """
+        random_state = np.random.RandomState(seed)
+        return self.permutations[random_state.randint(len(self),size=k)]
+
+    def get_generators(self):
+        """Returns a small generating set of the automorphism group. It is
+        built greedily, by adding automorphisms which do not belong to the
+        subgroup generated so far, so that it has at most log2(|G|) elements.
+        The subgroup is extended incrementally each time a generator is added.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A list of permutation arrays.
+        """
+        if self._generators is None:
+            self._generators = []
+            elements = [np.arange(self.permutations.shape[1],dtype=np.int32)]
+            subgroup = set([elements[0].tobytes()])
+            for permutation in self.permutations:
+                if len(subgroup)==len(self):
+                    break
+                if permutation.tobytes() in subgroup:
+                    continue
+                self._generators.append(permutation)
+                ## The subgroup is closed under the previous generators: only
+                ## its products by the new generator, and the products of the
+                ## new elements by all generators, have to be computed
+                N_old = len(elements)
+                for i in range(N_old):
+                    product = permutation[elements[i]]
+                    if not product.tobytes() in subgroup:
+                        subgroup.add(product.tobytes())
+                        elements.append(product)
+                i = N_old
+                while i<len(elements):
+                    for generator in self._generators:
+                        product = generator[elements[i]]
+                        if not product.tobytes() in subgroup:
+                            subgroup.add(product.tobytes())
+                            elements.append(product)
+                    i = i+1
+        return self._generators
+
+    def get_orbit(self,name_f):
+        """Returns the orbit of a morphism under the automorphism group.
+
+        Parameters
+        ----------
+        name_f: a string representing the name of a morphism
+
+        Returns
+        -------
+        A list of the names of the images of the morphism, sorted by name.
+        """
+        names = self.cat_action._morphism_names
+        images = np.unique(self.permutations[:,self.cat_action._morphism_idx[name_f]])
+        return sorted(names[x] for x in images)
+
+    def get_functor(self,automorphism):
+        """Builds the category functor corresponding to an automorphism.
+
+        Parameters
+        ----------
+        automorphism: a permutation array
+
+        Returns
+        -------
+        An instance of CategoryFunctor.
+        """
+        cat_action = self.cat_action
+        names = cat_action._morphism_names
+        automorphism = np.asarray(automorphism).tolist()
+        N_functor = CategoryFunctor(cat_action,cat_action)
+        N_functor.generators_mapping = dict((name_g,names[automorphism[cat_action._morphism_idx[name_g]]])
+                                            for name_g in sorted(cat_action.generators.keys()))
+        N_functor.object_mapping = dict((name_obj,cat_action.morphisms[names[automorphism[x]]].source.name)
+                                        for name_obj,x in self._identities.items())
+        N_functor._set_morphism_array(automorphism)
+        return N_functor
+
 class CategoryActionFunctor(object):
     def __init__(self,cat_action_source,cat_action_target,
                       cat_functor,nat_transform):
@@ -1455,19 +4122,62 @@ class CategoryActionFunctor(object):
         """
         if not self.cat_functor.is_valid():
             return False
+        return len(self.get_violations())==0
+
+    def get_violations(self):
+        """Returns the morphisms of the source category action for which the
+        lax naturality condition does not hold (see is_valid). The condition
+        is checked for all morphisms at once: the matrices of the morphisms
+        and of the components of the natural transformation are stacked in
+        3-D arrays (see CategoryAction._get_padded_matrices), and all the
+        products are computed in a single matmul.
+        The category functor is assumed to be valid.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        An integer array of the indices of the morphisms f of the source
+        category action for which N_Y*F(f) is not included in G(f)*N_X, or for
+        which N_X or N_Y is missing or does not have the expected source and
+        target, in the order of the morphisms of the source category action.
+        """
+        source = self.cat_action_source
+        target = self.cat_action_target
+        source_objects = [name_obj for name_obj,catobject in source.get_objects()]
+        object_idx = dict((name_obj,i) for i,name_obj in enumerate(source_objects))
+        morphisms = [source.morphisms[name_f] for name_f in source._morphism_names]
+        F = self.cat_functor._get_morphism_array()
+        n_source = max([catobject.get_cardinality() for name_obj,catobject in source.get_objects()]+[0])
+        n_target = max([catobject.get_cardinality() for name_obj,catobject in target.get_objects()]+[0])
+
+        ## Components of the natural transformation, one per object. Objects
+        ## with a missing or ill-typed component make all the morphisms from
+        ## or to them invalid.
+        components = np.zeros((len(source_objects),n_target,n_source),dtype=bool)
+        valid_objects = np.zeros(len(source_objects),dtype=bool)
+        for i,name_obj in enumerate(source_objects):
+            component = self.nat_transform.get(name_obj)
+            if component is None or not component.source.name==name_obj or \
+               not component.target.name==self.cat_functor.object_mapping.get(name_obj):
+                continue
+            matrix = component.get_mapping_matrix()
+            components[i,:matrix.shape[0],:matrix.shape[1]] = matrix
+            valid_objects[i] = True
+
+        sources = np.array([object_idx[f.source.name] for f in morphisms],dtype=np.int32)
+        targets = np.array([object_idx[f.target.name] for f in morphisms],dtype=np.int32)
+        source_matrices = source._get_padded_matrices(range(len(morphisms)))
+        image_matrices = target._get_padded_matrices(F)
 
         ## see def of Rel_PKNets
-        ## names of cat_action_1
-        for name_f,f in self.cat_action_source.get_morphisms():
-            source_name = f.source.name
-            target_name = f.target.name
-            nat_transform_source = self.nat_transform[source_name]
-            nat_transform_target = self.nat_transform[target_name]
-            image_name_f = self.cat_functor(name_f)
-            image_morphism = self.cat_action_target.morphisms[image_name_f]
-            if not (nat_transform_target*f)<=(image_morphism*nat_transform_source):
-                return False
-        return True
+        lhs = np.matmul(components[targets],source_matrices)
+        rhs = np.matmul(image_matrices,components[sources])
+        violations = np.any(lhs & ~rhs,axis=(1,2))
+        violations |= ~(valid_objects[sources] & valid_objects[targets])
+        return np.nonzero(violations)[0]
 
     def __mul__(self,cat_action_functor):
         """Compose two category action functors
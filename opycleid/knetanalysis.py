@@ -4,8 +4,15 @@
 ###### Copyright (c) 2016, Alexandre Popoff
 ###
 
+import os
+import json
+import shutil
+import tempfile
+import itertools
+import multiprocessing
 import numpy as np
-from .categoryaction import CatObject,CatMorphism,CategoryAction,CategoryFunctor,CategoryActionFunctor
+from . import storage
+from .categoryaction import CatObject,CatMorphism,CategoryAction,MonoidAction,CategoryFunctor,CategoryActionFunctor,AutomorphismGroup
 
 class PKNet(object):
     """The class PKNet defines a relational PK-Net (Poly-Klumpenhouwer network)
@@ -40,7 +47,33 @@ class PKNet(object):
         """
         self.diagram_action = None
         self.context_action = context_action
-        self.cat_action_functor = None
+        self._cat_action_functor = None
+        ## Data of the PK-Net when the objects of the diagram action are
+        ## singletons (see _set_singleton_functor)
+        self._singletons = None
+        self._cat_functor = None
+        self._node_elements = None
+
+    @property
+    def cat_action_functor(self):
+        """The category action functor defining the PK-Net. When the objects
+        of the diagram action are singletons, it is only built when first
+        accessed (see _set_singleton_functor).
+        """
+        if self._cat_action_functor is None and self._node_elements is not None:
+            phi = self._get_components(self._cat_functor.get_object_mapping(),
+                                       self.get_elements_mapping())
+            self._cat_action_functor = CategoryActionFunctor(self.diagram_action,
+                                                             self.context_action,
+                                                             self._cat_functor,phi)
+        return self._cat_action_functor
+
+    @cat_action_functor.setter
+    def cat_action_functor(self,cat_action_functor):
+        self._cat_action_functor = cat_action_functor
+        self._singletons = None
+        self._cat_functor = None
+        self._node_elements = None
 
 
     def set_edges(self,list_edges):
@@ -93,10 +126,37 @@ class PKNet(object):
         if not F.set_from_generator_mapping(edges_map):
             raise Exception("Edge mapping is not valid")
         object_mapping = F.get_object_mapping()
-        print(">>>>",object_mapping)
 
-        ## We now build the natural transformation, component by component, i.e.
-        ## object by object in the diagram action.
+        singletons = self._get_singletons()
+        if singletons is None:
+            phi = self._get_components(object_mapping,elements_map)
+            self._set_functor(F,phi)
+        else:
+            node_elements = self._get_node_elements(object_mapping,elements_map,singletons)
+            self._set_singleton_functor(F,node_elements,singletons)
+
+    def _get_components(self,object_mapping,elements_map):
+        """Builds the components of the natural transformation of the category
+        action functor, object by object in the diagram action.
+
+        Parameters
+        ----------
+        object_mapping : a dictionary, the keys of which are the names of the
+                         objects of the diagram action, the values of which
+                         are the names of their images in the context action.
+
+        elements_map : a dictionary, the keys of which are the names of the
+                       elements in the objects of the diagram action, the values
+                       of which are lists of elements names in the objects of
+                       the context action.
+
+        Returns
+        -------
+        A dictionary, the keys of which are the names of the objects of the
+        diagram action, the values of which are the corresponding components
+        as instances of CatMorphism. Raises an exception if the mapping of
+        elements is not left total.
+        """
         phi = {}
         for name_obj,obj in self.diagram_action.get_objects():
             target_obj = self.context_action.objects[object_mapping[name_obj]]
@@ -109,13 +169,183 @@ class PKNet(object):
             if not phi_component._is_lefttotal():
                 raise Exception("Element mappings must be left total")
             phi[name_obj] = phi_component
+        return phi
+
+    def _set_functor(self,cat_functor,phi):
+        """Defines the category action functor from a category functor and the
+        components of a natural transformation.
+
+        Parameters
+        ----------
+        cat_functor : an instance of CategoryFunctor from the diagram action
+                      to the context action.
 
+        phi : a dictionary of components, as returned by _get_components.
+
+        Returns
+        -------
+        None. Raises an exception if the category action functor is not valid.
+        """
         self.cat_action_functor = CategoryActionFunctor(self.diagram_action,
                                                         self.context_action,
-                                                        F,phi)
+                                                        cat_functor,phi)
         if not self.cat_action_functor.is_valid():
             raise Exception("Element mapping is not valid")
 
+    def _get_singletons(self):
+        """Returns the structure of the diagram action used by the PK-Nets
+        whose diagram objects are singletons (see _set_singleton_functor).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None if an object of the diagram action is not a singleton, otherwise
+        a dictionary with:
+            - 'objects': the list of the names of the objects
+            - 'elements': the list of the names of their unique elements
+            - 'sources','targets': integer arrays giving, for each morphism of
+                                   the diagram action, the position in
+                                   'objects' of its source and target
+            - 'related': a boolean array indicating, for each morphism of the
+                         diagram action, whether it relates the element of its
+                         source to the element of its target
+        """
+        objects = self.diagram_action.get_objects()
+        if not all(catobject.get_cardinality()==1 for name_obj,catobject in objects):
+            return None
+        position = dict((name_obj,i) for i,(name_obj,catobject) in enumerate(objects))
+        morphisms = [self.diagram_action.morphisms[name_f] for name_f in self.diagram_action._morphism_names]
+        return {"objects":[name_obj for name_obj,catobject in objects],
+                "elements":[catobject.get_name_by_idx(0) for name_obj,catobject in objects],
+                "sources":np.array([position[f.source.name] for f in morphisms],dtype=np.int64),
+                "targets":np.array([position[f.target.name] for f in morphisms],dtype=np.int64),
+                "related":np.array([bool(f.get_mapping_matrix()[0,0]) for f in morphisms],dtype=bool)}
+
+    def _get_node_elements(self,object_mapping,elements_map,singletons):
+        """Returns the images of the elements of a diagram action whose
+        objects are singletons, as ids of the inverse action index of the
+        context action.
+
+        Parameters
+        ----------
+        object_mapping : a dictionary, the keys of which are the names of the
+                         objects of the diagram action, the values of which
+                         are the names of their images in the context action.
+
+        elements_map : a dictionary, the keys of which are the names of the
+                       elements in the objects of the diagram action, the values
+                       of which are lists of elements names in the objects of
+                       the context action.
+
+        singletons : the structure of the diagram action, as returned by
+                     _get_singletons.
+
+        Returns
+        -------
+        A list of integer arrays, one per object of the diagram action in the
+        order of singletons['objects'], giving the ids of the images of its
+        element, in the order of the elements of the image object. Raises an
+        exception if the mapping of elements is not left total, or if an image
+        is not an element of the image object.
+        """
+        element_ids = self.context_action._get_action_index()["elements"]
+        node_elements = []
+        for name_obj,elem in zip(singletons["objects"],singletons["elements"]):
+            target_obj = self.context_action.objects[object_mapping[name_obj]]
+            images = elements_map[elem]
+            if not len(images):
+                raise Exception("Element mappings must be left total")
+            if not all(target_obj.is_in(x) for x in images):
+                raise Exception("Element mapping is not valid")
+            images = sorted(set(images),key=target_obj.get_idx_by_name)
+            node_elements.append(np.array([element_ids[x] for x in images],dtype=np.int64))
+        return node_elements
+
+    def _set_singleton_functor(self,cat_functor,node_elements,singletons):
+        """Defines the PK-Net when the objects of the diagram action are
+        singletons, from a category functor and the images of the elements,
+        without building the components of the natural transformation. The
+        category action functor is only built when accessed.
+
+        Parameters
+        ----------
+        cat_functor : an instance of CategoryFunctor from the diagram action
+                      to the context action, which is assumed to be valid
+                      (as is the case when it is set by
+                      set_from_generator_mapping).
+
+        node_elements : a list of integer arrays, as returned by
+                        _get_node_elements.
+
+        singletons : the structure of the diagram action, as returned by
+                     _get_singletons.
+
+        Returns
+        -------
+        None. Raises an exception if the PK-Net is not valid.
+        """
+        if len(self._get_singleton_violations(cat_functor,node_elements,singletons)):
+            raise Exception("Element mapping is not valid")
+        self.cat_action_functor = None
+        self._singletons = singletons
+        self._cat_functor = cat_functor
+        self._node_elements = node_elements
+
+    def _get_singleton_violations(self,cat_functor,node_elements,singletons):
+        """Returns the morphisms of a diagram action whose objects are
+        singletons for which the lax naturality condition does not hold (see
+        CategoryActionFunctor.get_violations). For a morphism f from {x} to
+        {y} relating x to y, the condition states that each image of y should
+        be an image by N(f) of an image of x: all the triples (image of x,
+        N(f), image of y) are looked up at once in the inverse action index of
+        the context action.
+
+        Parameters
+        ----------
+        cat_functor : an instance of CategoryFunctor from the diagram action
+                      to the context action.
+
+        node_elements : a list of integer arrays, as returned by
+                        _get_node_elements.
+
+        singletons : the structure of the diagram action, as returned by
+                     _get_singletons.
+
+        Returns
+        -------
+        An integer array of the indices of the violating morphisms of the
+        diagram action.
+        """
+        F = cat_functor._get_morphism_array()
+        sizes = np.array([len(x) for x in node_elements],dtype=np.int64)
+        offsets = np.cumsum(sizes)-sizes
+        flat_elements = np.concatenate([np.zeros(0,dtype=np.int64)]+node_elements)
+        edges = np.nonzero(singletons["related"])[0]
+        sources = singletons["sources"][edges]
+        targets = singletons["targets"][edges]
+
+        ## One group per morphism f and image y' of y, one pair per image x'
+        ## of x in each group
+        group_sizes = sizes[targets]
+        group_edges = np.repeat(np.arange(len(edges)),group_sizes)
+        group_starts = np.cumsum(group_sizes)-group_sizes
+        group_images = flat_elements[offsets[targets][group_edges]+
+                                     np.arange(len(group_edges))-group_starts[group_edges]]
+        pair_sizes = sizes[sources][group_edges]
+        pair_groups = np.repeat(np.arange(len(group_edges)),pair_sizes)
+        pair_starts = np.cumsum(pair_sizes)-pair_sizes
+        pair_edges = group_edges[pair_groups]
+        pair_images = flat_elements[offsets[sources][pair_edges]+
+                                    np.arange(len(pair_groups))-pair_starts[pair_groups]]
+
+        found = self.context_action._in_action(F[edges][pair_edges],pair_images,
+                                               group_images[pair_groups])
+        group_found = np.bincount(pair_groups,weights=found,minlength=len(group_edges))>0
+        return np.unique(edges[group_edges[~group_found]])
+
     def get_edge_mapping(self):
         """Gets the mapping of *all* edges in the diagram action.
 
@@ -130,7 +360,24 @@ class PKNet(object):
         action by the category functor of the category action functor which
         defines this PK-Net.
         """
-        return self.cat_action_functor.cat_functor.get_morphism_mapping()
+        return self._get_cat_functor().get_morphism_mapping()
+
+    def _get_cat_functor(self):
+        """Returns the category functor of the category action functor
+        defining the PK-Net, without building the latter if the objects of the
+        diagram action are singletons.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        An instance of CategoryFunctor.
+        """
+        if self._cat_functor is not None:
+            return self._cat_functor
+        return self.cat_action_functor.cat_functor
 
     def get_elements_mapping(self):
         """Gets the mapping of all elements in the diagram action.
@@ -146,6 +393,13 @@ class PKNet(object):
         in the context action by the natural transformation of the category
         action functor which defines this PK-Net.
         """
+        if self._node_elements is not None:
+            element_ids = self.context_action._get_action_index()["elements"]
+            names = [None]*len(element_ids)
+            for name,i in element_ids.items():
+                names[i] = name
+            return dict((elem,[names[i] for i in ids])
+                        for elem,ids in zip(self._singletons["elements"],self._node_elements))
         return {k:v for obj,morph in self.cat_action_functor.nat_transform.items()
                       for k,v in morph.get_mapping().items()}
 
@@ -167,6 +421,77 @@ class PKNet(object):
         elements[i] and elements[i+1].
         Raises an exception if no transformation exists between consecutive
         elements.
+
+        All the yielded PK-Nets share the same diagram action, along with its
+        Cayley table, and the same images of the elements: they only differ
+        by their category functor. These shared objects should not be
+        modified.
+        """
+        return self._from_operations(elements,self._possible_operations(elements))
+
+    def count_progressions(self,elements):
+        """Counts the PK-Nets yielded by from_progression, without building
+        them. This is the product of the numbers of transformations between
+        consecutive elements.
+
+        Parameters
+        ----------
+        elements: a list of element names in the objects of the context action.
+
+        Returns
+        -------
+        An integer, the number of PK-Nets with n objects and n-1 edges, each
+        edge f_i corresponding to a transformation in the context action
+        between elements[i] and elements[i+1].
+        Raises an exception if no transformation exists between consecutive
+        elements.
+        """
+        count = 1
+        for next_ops in self._step_operations(elements):
+            count = count*len(next_ops)
+        return count
+
+    def sample_progressions(self,elements,k,seed=None):
+        """Draws PK-Nets uniformly at random, with replacement, among the
+        PK-Nets yielded by from_progression, without enumerating them. The
+        transformation of each edge is drawn independently among the
+        transformations between the corresponding elements.
+
+        Parameters
+        ----------
+        elements: a list of element names in the objects of the context action.
+        k: an integer, the number of PK-Nets to draw
+        seed: optional integer, the seed of the random number generator
+
+        Yields
+        -------
+        The next drawn PK-Net. As for from_progression, the drawn PK-Nets share
+        the same diagram action.
+        Raises an exception if no transformation exists between consecutive
+        elements.
+        """
+        all_ops = self._step_operations(elements)
+        random_state = np.random.RandomState(seed)
+        choices = [random_state.randint(len(next_ops),size=k) for next_ops in all_ops]
+        list_operations = ([next_ops[c[j]] for next_ops,c in zip(all_ops,choices)]
+                           for j in range(k))
+        return self._from_operations(elements,list_operations)
+
+    def _from_operations(self,elements,operations):
+        """Yields the PK-Nets built on the ordinal n category from a list of n
+        element names and from lists of transformations between consecutive
+        elements (see from_progression).
+
+        Parameters
+        ----------
+        elements: a list of element names in the objects of the context action.
+        operations: an iterable of lists of morphism names, such that the i-th
+                    morphism is a transformation in the context action between
+                    elements[i] and elements[i+1].
+
+        Yields
+        -------
+        The PK-Net corresponding to the next list of transformations.
         """
         singletons = [CatObject("X_{}".format(i),["x_{}".format(i)]) for i in range(len(elements))]
         edges = []
@@ -176,15 +501,50 @@ class PKNet(object):
             edges.append(f)
 
         elements_mapping = {"x_{}".format(i):[v] for i,v in enumerate(elements)}
-        for list_operations in self._possible_operations(elements):
+        diagram = PKNet(self.context_action)
+        diagram.set_edges(edges)
+        diagram.diagram_action._get_cayley_table()
+        singletons = diagram._get_singletons()
+        node_elements = None
+        for list_operations in operations:
             transf_mapping = {"f_{}".format(i):v for i,v in enumerate(list_operations)}
+            F = CategoryFunctor(diagram.diagram_action,self.context_action)
+            if not F.set_from_generator_mapping(transf_mapping):
+                raise Exception("Edge mapping is not valid")
+            if node_elements is None:
+                ## The objects containing the elements do not depend on the
+                ## operations
+                node_elements = diagram._get_node_elements(F.get_object_mapping(),
+                                                           elements_mapping,singletons)
             pknet = PKNet(self.context_action)
-            pknet.set_edges(edges)
-            pknet.set_mappings(transf_mapping,elements_mapping)
+            pknet.diagram_action = diagram.diagram_action
+            pknet._set_singleton_functor(F,node_elements,singletons)
 
             yield pknet
 
-    def _possible_operations(self,elements,list_op=[]):
+    def _step_operations(self,elements):
+        """From a list of n element names, returns the transformations between
+        each pair of consecutive elements. They are looked up at once in the
+        inverse action index of the context action.
+
+        Parameters
+        ----------
+        elements: a list of element names in the objects of the context action.
+
+        Returns
+        -------
+        A list of n-1 lists of morphism names, the i-th list containing the
+        transformations in the context action between elements[i] and
+        elements[i+1]. Raises an exception if no transformation exists between
+        consecutive elements.
+        """
+        all_ops = self.context_action.get_operations(list(zip(elements[:-1],elements[1:])))
+        for i,next_ops in enumerate(all_ops):
+            if not len(next_ops):
+                raise Exception("No transformation can be found between elements {} and {}".format(elements[i],elements[i+1]))
+        return [list(next_ops) for next_ops in all_ops]
+
+    def _possible_operations(self,elements):
         """From a list of n element names, yields all transformations between
         consecutive elements.
 
@@ -199,16 +559,8 @@ class PKNet(object):
         elements[i+1]. Raises an exception if no transformation exists between
         consecutive elements.
         """
-        next_ops = self.context_action.get_operation(elements[0],elements[1])
-        if not len(next_ops):
-            raise Exception("No transformation can be found between elements {} and {}".format(elements[0],elements[1]))
-        if len(elements)>2:
-            for op in next_ops:
-                for thelist in self._possible_operations(elements[1:],list_op+[op]):
-                    yield thelist
-        else:
-            for op in next_ops:
-                yield list_op+[op]
+        for list_op in itertools.product(*self._step_operations(elements)):
+            yield list(list_op)
 
     def global_transform(self,cat_action_functor):
         """Apply a category action functor and returns the corresponding new
@@ -295,6 +647,309 @@ class PKNet(object):
         return new_PKNet
 
 
+    def get_key(self):
+        """Returns a key identifying the PK-Net, i.e. a hashable object such
+        that two PK-Nets with the same diagram action and context action have
+        the same key if and only if they map the generating edges and the
+        elements in the same way.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A pair of tuples, the first one listing the pairs (edge,image) for the
+        generating edges, the second one the pairs (element,images) for the
+        elements of the diagram action, images being a sorted tuple of element
+        names in the context action.
+        """
+        edge_mapping = self.get_edge_mapping()
+        return (tuple((name_g,edge_mapping[name_g]) for name_g in sorted(self.diagram_action.generators.keys())),
+                tuple((elem,tuple(sorted(images))) for elem,images in sorted(self.get_elements_mapping().items())))
+
+    def get_orbit(self,automorphisms=None):
+        """Returns the orbit of the PK-Net under local transformations, i.e.
+        all the PK-Nets obtained by local_transform, for all the automorphisms
+        of the context action in a group and all the natural transformations
+        compatible with them.
+
+        Local transformations are applied in bulk, on the indices of the
+        morphisms and elements of the context action: for each automorphism,
+        the compatible natural transformations are all found at once on the
+        Cayley table (see _get_local_transforms), and their action on the
+        elements is looked up in the inverse action index of the context
+        action. Each resulting PK-Net is reduced to a key of indices, and only
+        one PK-Net is built per distinct key. No intermediate category action
+        functor is built.
+
+        Local transformations which send an element to no element are left
+        out, since they do not give a valid PK-Net.
+
+        Parameters
+        ----------
+        automorphisms: optional instance of AutomorphismGroup, or list of
+                       CategoryFunctor instances, which should be
+                       automorphisms of the context action. By default, the
+                       group of all automorphisms of the context action (see
+                       CategoryAction.get_automorphisms).
+
+        Returns
+        -------
+        A pair (orbit,stabilizer_size), where:
+            - orbit is a dictionary, the keys of which are the keys of the
+              PK-Nets of the orbit (see get_key), the values of which are the
+              corresponding PK-Nets, sharing the diagram action of this PK-Net
+            - stabilizer_size is the number of local transformations which
+              leave the PK-Net unchanged.
+        When the context action is a group action, the size of the orbit times
+        the size of the stabilizer is the number of local transformations.
+        """
+        context = self.context_action
+        diagram = self.diagram_action
+        if automorphisms is None:
+            automorphisms = context.get_automorphisms(as_group=True)
+        if isinstance(automorphisms,AutomorphismGroup):
+            permutations = automorphisms.permutations
+        else:
+            permutations = np.array([f._get_morphism_array() for f in automorphisms],
+                                    dtype=np.int32).reshape(-1,len(context._morphism_names))
+
+        cat_functor = self._get_cat_functor()
+        F = cat_functor._get_morphism_array()
+        gen_names = sorted(diagram.generators.keys())
+        gens = np.array([diagram._morphism_idx[name_g] for name_g in gen_names],dtype=np.int64)
+        context_objects = [name_obj for name_obj,catobject in context.get_objects()]
+        identities = context._get_identities()
+        context_identities = np.array([identities[name_obj] for name_obj in context_objects],dtype=np.int64)
+        data = self._get_transform_data()
+
+        elements,element_objects,element_images = self._get_element_images()
+        sizes = np.array([len(x) for x in element_images],dtype=np.int64)
+        flat_images = np.concatenate([np.zeros(0,dtype=np.int64)]+element_images)
+        flat_elements = np.repeat(np.arange(len(elements)),sizes)
+        n_ids = len(context._get_action_index()["elements"])
+
+        def encode(gen_images,states):
+            ## Rows of bytes made of the images of the generators and of the
+            ## sets of images of the elements, after a leading byte so that
+            ## rows are not empty when the diagram action has no object
+            keys = np.concatenate([np.zeros((len(states),1),dtype=np.uint8),
+                                   np.ascontiguousarray(gen_images,dtype="<i4").view(np.uint8),
+                                   np.packbits(states.reshape(len(states),-1),axis=1)],axis=1)
+            return np.ascontiguousarray(keys)
+
+        state = np.zeros((1,len(elements),n_ids),dtype=bool)
+        state[0,flat_elements,flat_images] = True
+        key = encode(F[gens][None,:],state)[0].tobytes()
+
+        found = {}
+        stabilizer_size = 0
+        for permutation in permutations:
+            ## The image of an object by the automorphism is the source of the
+            ## image of its identity
+            new_objects = data["sources"][permutation[context_identities[data["image_objects"]]]]
+            etas = self._get_local_transforms(permutation,new_objects,data)
+            if not len(etas):
+                continue
+            T = len(etas)
+            images,offsets = context._get_images(etas[:,element_objects[flat_elements]].ravel(),
+                                                 np.tile(flat_images,T))
+            queries = np.repeat(np.arange(T*len(flat_images)),np.diff(offsets))
+            states = np.zeros((T,len(elements),n_ids),dtype=bool)
+            states[queries//len(flat_images),flat_elements[queries%len(flat_images)],images] = True
+            ## Each element should have at least one image
+            left_total = np.all(np.any(states,axis=2),axis=1)
+            if not np.any(left_total):
+                continue
+            states = states[left_total]
+            keys = encode(np.repeat(permutation[F[gens]][None,:],len(states),axis=0),states)
+            first,counts = np.unique(keys.view(np.dtype((np.void,keys.shape[1]))).ravel(),
+                                     return_index=True,return_counts=True)[1:]
+            for i,count in zip(first,counts):
+                new_key = keys[i].tobytes()
+                if new_key==key:
+                    stabilizer_size = stabilizer_size+int(count)
+                if not new_key in found:
+                    found[new_key] = (permutation,new_objects,states[i])
+
+        element_names = [None]*n_ids
+        for name,i in context._get_action_index()["elements"].items():
+            element_names[i] = name
+        singletons = self._get_singletons()
+        orbit = {}
+        for permutation,new_objects,state in found.values():
+            new_F = permutation[F]
+            new_cat_functor = CategoryFunctor(diagram,context)
+            new_cat_functor.generators_mapping = dict((name_g,context._morphism_names[new_F[g]])
+                                                      for name_g,g in zip(gen_names,gens))
+            new_cat_functor.object_mapping = dict((name_obj,context_objects[new_objects[i]])
+                                                  for i,(name_obj,catobject) in enumerate(diagram.get_objects()))
+            new_cat_functor._set_morphism_array(new_F)
+            elements_map = dict((elem,[element_names[i] for i in np.nonzero(state[d])[0]])
+                                for d,elem in enumerate(elements))
+            new_PKNet = PKNet(context)
+            new_PKNet.diagram_action = diagram
+            if singletons is None:
+                new_PKNet._set_functor(new_cat_functor,
+                                       new_PKNet._get_components(new_cat_functor.object_mapping,elements_map))
+            else:
+                new_PKNet._set_singleton_functor(new_cat_functor,
+                                                 new_PKNet._get_node_elements(new_cat_functor.object_mapping,
+                                                                              elements_map,singletons),
+                                                 singletons)
+            orbit[new_PKNet.get_key()] = new_PKNet
+        return orbit,stabilizer_size
+
+    def _get_element_images(self):
+        """Returns the images of the elements of the diagram action, as ids of
+        the inverse action index of the context action.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A tuple (elements,objects,images), where elements is the list of the
+        names of the elements of the diagram action, objects an integer array
+        giving the position of their object in the objects of the diagram
+        action, and images a list of integer arrays giving the ids of their
+        images.
+        """
+        element_ids = self.context_action._get_action_index()["elements"]
+        elements_mapping = self.get_elements_mapping()
+        elements = []
+        objects = []
+        images = []
+        for i,(name_obj,catobject) in enumerate(self.diagram_action.get_objects()):
+            for elem in catobject.get_elements():
+                elements.append(elem)
+                objects.append(i)
+                images.append(np.array(sorted(element_ids[x] for x in elements_mapping[elem]),dtype=np.int64))
+        return elements,np.array(objects,dtype=np.int64),images
+
+    def _get_transform_data(self):
+        """Returns the data of the PK-Net and of its context action used to
+        find its local transformations (see _get_local_transforms).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A dictionary, with:
+            - 'table': the Cayley table of the context action
+            - 'sources','targets': integer arrays giving, for each morphism of
+                                   the context action, the position of its
+                                   source and target in the objects of the
+                                   context action
+            - 'image_objects': an integer array giving, for each object X of
+                               the diagram action, the position of N(X)
+            - 'edges': a list of triples (s,t,m) giving, for each generating
+                       edge f of the diagram action, the positions of its
+                       source and target, and the index of N(f)
+            - 'order': the list of the positions of the objects of the diagram
+                       action in the order of a breadth-first search of the
+                       diagram, so that each object, but the first one of each
+                       connected component, is linked by an edge to a
+                       previous object
+        """
+        context = self.context_action
+        diagram = self.diagram_action
+        cat_functor = self._get_cat_functor()
+        F = cat_functor._get_morphism_array()
+        objects = [name_obj for name_obj,catobject in diagram.get_objects()]
+        position = dict((name_obj,i) for i,name_obj in enumerate(objects))
+        context_position = dict((name_obj,i) for i,(name_obj,catobject) in enumerate(context.get_objects()))
+        edges = [(position[g.source.name],position[g.target.name],int(F[diagram._morphism_idx[name_g]]))
+                 for name_g,g in diagram.get_generators()]
+
+        order = []
+        for start in range(len(objects)):
+            if start in order:
+                continue
+            order.append(start)
+            for o in order:
+                for s,t,m in edges:
+                    for u,v in [(s,t),(t,s)]:
+                        if u==o and not v in order:
+                            order.append(v)
+
+        return {"table":context._get_cayley_table(),
+                "sources":np.array([context_position[context.morphisms[name_f].source.name]
+                                    for name_f in context._morphism_names],dtype=np.int64),
+                "targets":np.array([context_position[context.morphisms[name_f].target.name]
+                                    for name_f in context._morphism_names],dtype=np.int64),
+                "image_objects":np.array([context_position[cat_functor.object_mapping[name_obj]]
+                                          for name_obj in objects],dtype=np.int64),
+                "edges":edges,
+                "order":order}
+
+    def _get_local_transforms(self,permutation,new_objects,data):
+        """Returns all the natural transformations eta such that the local
+        transformation given by an automorphism and eta can be applied to the
+        PK-Net (see local_transform), i.e. such that
+        eta_Y * N(f) = A(N(f)) * eta_X for all generating edges f: X->Y, where
+        N is the category functor of the PK-Net and A the automorphism.
+
+        The components are assigned object by object, following the edges of
+        the diagram action. All the partial assignments are extended at once:
+        the components of a new object compatible with the component of a
+        previous object along an edge are found by a lookup in the sorted
+        products of the candidates, and the other edges are then checked on
+        the Cayley table of the context action.
+
+        Parameters
+        ----------
+        permutation: an integer array, the automorphism as a permutation of
+                     the indices of the morphisms of the context action
+        new_objects: an integer array giving, for each object X of the diagram
+                     action, the position of A(N(X)) in the objects of the
+                     context action
+        data: a dictionary, as returned by _get_transform_data
+
+        Returns
+        -------
+        An integer array, each row of which gives the indices of the
+        components of a natural transformation, in the order of the objects of
+        the diagram action.
+        """
+        table = data["table"]
+        columns = {}
+        rows = np.zeros((1,0),dtype=np.int64)
+        for o in data["order"]:
+            candidates = np.nonzero((data["sources"]==data["image_objects"][o]) &
+                                    (data["targets"]==new_objects[o]))[0]
+            links = [(s,t,m) for s,t,m in data["edges"] if (s==o and t in columns) or (t==o and s in columns)]
+            if len(links):
+                ## eta_Y * N(f) = A(N(f)) * eta_X, with either X or Y the new object
+                s,t,m = links[0]
+                if t==o:
+                    keys = table[candidates,m]
+                    values = table[permutation[m],rows[:,columns[s]]]
+                else:
+                    keys = table[permutation[m],candidates]
+                    values = table[rows[:,columns[t]],m]
+                order = np.argsort(keys,kind="stable")
+                sorted_keys = keys[order]
+                starts = np.searchsorted(sorted_keys,values,side="left")
+                counts = np.searchsorted(sorted_keys,values,side="right")-starts
+                counts[values<0] = 0
+                offsets = np.cumsum(counts)-counts
+                matches = order[np.repeat(starts-offsets,counts)+np.arange(counts.sum())]
+                rows = np.concatenate([np.repeat(rows,counts,axis=0),candidates[matches][:,None]],axis=1)
+            else:
+                rows = np.concatenate([np.repeat(rows,len(candidates),axis=0),
+                                       np.tile(candidates,len(rows))[:,None]],axis=1)
+            columns[o] = len(columns)
+            for s,t,m in links[1:]+[(s,t,m) for s,t,m in data["edges"] if s==o and t==o]:
+                lhs = table[rows[:,columns[t]],m]
+                rhs = table[permutation[m],rows[:,columns[s]]]
+                rows = rows[(lhs==rhs) & (lhs>=0)]
+        return rows[:,[columns[o] for o in range(len(columns))]]
+
     def __str__(self):
         """Returns a verbose description of the PK-Net.
         Overloads the 'str' operator of Python
@@ -319,3 +974,195 @@ class PKNet(object):
             str_rep += "{} -- {} --> {}\n".format(f.source.name,edge_name,f.target.name)
             str_rep+="{} -> {}\n".format(source_elements,target_elements)
         return str_rep
+
+
+## PK-Net of the context action in a worker process of analyze_progressions
+_worker_pknet = None
+
+def _init_worker(objects,generators,is_monoid,path):
+    """Initializes a worker process of analyze_progressions, by rebuilding the
+    context action from its objects, its generators, and its arrays saved in
+    the given directory. The arrays are memory-mapped, and thus shared between
+    all the worker processes.
+
+    Parameters
+    ----------
+    objects: a list of CatObject instances
+    generators: a list of CatMorphism instances
+    is_monoid: a boolean indicating whether the context action is a
+               MonoidAction
+    path: a string representing the path of the directory of arrays
+
+    Returns
+    -------
+    None
+    """
+    global _worker_pknet
+    context_action = MonoidAction() if is_monoid else CategoryAction()
+    context_action.set_objects(objects)
+    context_action.set_generators(generators)
+    context_action._set_from_arrays(storage.load_arrays(path))
+    _worker_pknet = PKNet(context_action)
+
+def _analyze_progression(task):
+    """Analyzes a progression in a worker process of analyze_progressions.
+
+    Parameters
+    ----------
+    task: a tuple (index,elements,sample,seed), where index is the position of
+          the progression in the corpus, and elements a list of element names.
+          If sample is None, all PK-Nets of the progression are listed,
+          otherwise sample PK-Nets are drawn with the seed (seed,index).
+
+    Returns
+    -------
+    A dictionary representing the result (see analyze_progressions).
+    """
+    index,elements,sample,seed = task
+    record = {"index":index,"elements":list(elements),"count":0,"pknets":[],"error":None}
+    try:
+        record["count"] = _worker_pknet.count_progressions(elements)
+        if sample is None:
+            pknets = _worker_pknet.from_progression(elements)
+        else:
+            pknets = _worker_pknet.sample_progressions(elements,sample,
+                                                       None if seed is None else [seed,index])
+        for pknet in pknets:
+            edge_mapping = pknet.get_edge_mapping()
+            record["pknets"].append([edge_mapping["f_{}".format(i)] for i in range(len(elements)-1)])
+    except Exception as e:
+        record["count"] = 0
+        record["pknets"] = []
+        record["error"] = str(e)
+    return record
+
+class _JSONLinesWriter(object):
+    """Writes the results of analyze_progressions as JSON Lines, i.e. one JSON
+    object per line, flushed as soon as it is written.
+    """
+    def __init__(self,path):
+        self.f = open(path,"w")
+
+    def write(self,record):
+        self.f.write(json.dumps(record)+"\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+class _ParquetWriter(object):
+    """Writes the results of analyze_progressions as a Parquet file, one row
+    group per batch of results. Since counts may not fit in 64 bits, they are
+    stored as strings. Requires pyarrow.
+    """
+    def __init__(self,path,batch_size):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required to write Parquet files")
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([("index",pyarrow.int64()),
+                                      ("elements",pyarrow.list_(pyarrow.string())),
+                                      ("count",pyarrow.string()),
+                                      ("pknets",pyarrow.list_(pyarrow.list_(pyarrow.string()))),
+                                      ("error",pyarrow.string())])
+        self.writer = pyarrow.parquet.ParquetWriter(path,self.schema)
+        self.batch_size = batch_size
+        self.batch = []
+
+    def write(self,record):
+        record = dict(record)
+        record["count"] = str(record["count"])
+        self.batch.append(record)
+        if len(self.batch)>=self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.batch):
+            self.writer.write_table(self.pa.Table.from_pylist(self.batch,schema=self.schema))
+            self.batch = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+def analyze_progressions(progressions,context_action,output,output_format=None,
+                         processes=None,sample=None,seed=None,chunksize=1,
+                         batch_size=1000):
+    """Analyzes a corpus of progressions with PK-Nets (see
+    PKNet.from_progression), spreading the progressions over a pool of
+    worker processes, and streaming the results to a file as they finish.
+
+    The context action, along with its Cayley table, is saved once in a
+    temporary directory, from which each worker memory-maps it when it
+    starts, so that it is neither pickled for each progression nor copied in
+    each worker.
+
+    Parameters
+    ----------
+    progressions: an iterable of lists of element names in the objects of the
+                  context action.
+    context_action: an instance of CategoryAction
+    output: a string representing the path of the output file.
+    output_format: optional string, either "jsonl" or "parquet". By default,
+                   the format is "parquet" if the path of the output file ends
+                   with ".parquet", and "jsonl" otherwise. Writing Parquet files
+                   requires pyarrow.
+    processes: optional integer, the number of worker processes. By default,
+               the number of CPUs.
+    sample: optional integer. If given, this number of PK-Nets is drawn at
+            random for each progression (see PKNet.sample_progressions),
+            instead of listing all of them.
+    seed: optional integer, the seed used to draw the PK-Nets. The PK-Nets of
+          a progression are drawn with the seed (seed,index), so that they do
+          not depend on the order in which progressions are processed.
+    chunksize: optional integer, the number of progressions sent at once to a
+               worker process.
+    batch_size: optional integer, the number of results in each row group
+                of a Parquet file.
+
+    Returns
+    -------
+    The number of analyzed progressions. Each result is written as a record,
+    in the order in which progressions finish, with:
+        - 'index': the position of the progression in the corpus
+        - 'elements': the list of element names of the progression
+        - 'count': the number of PK-Nets of the progression
+        - 'pknets': the list of the PK-Nets, each one given by the list of the
+                    transformations of its edges f_0,...,f_{n-2}
+        - 'error': None, or the error message if the progression could not
+                   be analyzed, e.g. if no transformation exists between
+                   consecutive elements.
+    """
+    if output_format is None:
+        output_format = "parquet" if output.endswith(".parquet") else "jsonl"
+    if output_format=="jsonl":
+        writer = _JSONLinesWriter(output)
+    elif output_format=="parquet":
+        writer = _ParquetWriter(output,batch_size)
+    else:
+        raise Exception("Unknown output format: {}".format(output_format))
+
+    context_action._get_cayley_table()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir,"context")
+        storage.save_arrays(path,context_action._get_arrays())
+        initargs = ([x for name_x,x in context_action.get_objects()],
+                    [m for name_m,m in context_action.get_generators()],
+                    isinstance(context_action,MonoidAction),path)
+        tasks = ((index,list(elements),sample,seed) for index,elements in enumerate(progressions))
+        pool = multiprocessing.Pool(processes,initializer=_init_worker,initargs=initargs)
+        try:
+            n = 0
+            for record in pool.imap_unordered(_analyze_progression,tasks,chunksize):
+                writer.write(record)
+                n = n+1
+        finally:
+            pool.terminate()
+            pool.join()
+    finally:
+        writer.close()
+        shutil.rmtree(tmp_dir)
+    return n
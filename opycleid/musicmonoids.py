@@ -4,9 +4,35 @@
 ###### Copyright (c) 2016, Alexandre Popoff
 ###
 
+import os
+import shutil
 import numpy as np
+from . import storage
 from .categoryaction import CatObject,CatMorphism,MonoidAction
 
+def _load_tables(monoid):
+    """Loads the morphisms and the Cayley table of a music monoid from the
+    tables prebuilt at installation time (see build_tables), instead of
+    generating them. The objects and the generators of the monoid must be set.
+    The key of these generators is recorded in the monoid, and the tables are
+    only used if they were built from the same generators.
+
+    Parameters
+    ----------
+    monoid: an instance of one of the music monoids
+
+    Returns
+    -------
+    True if the tables have been loaded, False otherwise.
+    """
+    monoid._tables_key = storage.category_key([x for name_x,x in monoid.get_objects()],
+                                              [m for name_m,m in monoid.get_generators()])
+    arrays = storage.load_package_data(type(monoid).__name__)
+    if arrays is None or not "key" in arrays or not str(arrays["key"][()])==monoid._tables_key:
+        return False
+    monoid._set_from_arrays(arrays)
+    return True
+
 class Noll_Monoid(MonoidAction):
     """Defines the Noll monoid acting on the set of the twelve pitch classes.
     The Noll monoid is generated by the two transformations
@@ -32,7 +58,8 @@ class Noll_Monoid(MonoidAction):
         G.set_mapping_matrix(M_G)
 
         self.set_generators([F,G])
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
 
 
 class TI_Group_PC(MonoidAction):
@@ -57,24 +84,25 @@ class TI_Group_PC(MonoidAction):
         I.set_mapping_matrix(M_I)
 
         self.set_generators([T,I])
-        self._add_identities()
-        self._add_morphisms([T,I])
-        for i in range(2,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = T*x
-            x.set_name("T"+str(i))
-            self._add_morphisms([x])
-        for i in range(1,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = T*x
-            y = x*I
-            y.set_name("I"+str(i))
-            self._add_morphisms([y])
+        if not _load_tables(self):
+            self._add_identities()
+            self._add_morphisms([T,I])
+            for i in range(2,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = T*x
+                x.set_name("T"+str(i))
+                self._add_morphisms([x])
+            for i in range(1,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = T*x
+                y = x*I
+                y.set_name("I"+str(i))
+                self._add_morphisms([y])
 
         if use_cayley_table:
-            self._build_cayley_table()
+            self._get_cayley_table()
 
 
 class TI_Group_Triads(MonoidAction):
@@ -102,24 +130,25 @@ class TI_Group_Triads(MonoidAction):
         I.set_mapping_matrix(M_I)
 
         self.set_generators([T,I])
-        self._add_identities()
-        self._add_morphisms([T,I])
-        for i in range(2,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = T*x
-            x.set_name("T"+str(i))
-            self._add_morphisms([x])
-        for i in range(1,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = T*x
-            y = x*I
-            y.set_name("I"+str(i))
-            self._add_morphisms([y])
+        if not _load_tables(self):
+            self._add_identities()
+            self._add_morphisms([T,I])
+            for i in range(2,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = T*x
+                x.set_name("T"+str(i))
+                self._add_morphisms([x])
+            for i in range(1,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = T*x
+                y = x*I
+                y.set_name("I"+str(i))
+                self._add_morphisms([y])
 
         if use_cayley_table:
-            self._build_cayley_table()
+            self._get_cayley_table()
 
 class PRL_Group(MonoidAction):
     """Defines the neo-Riemannian PRL group acting on the set
@@ -154,8 +183,8 @@ class PRL_Group(MonoidAction):
         P.set_mapping_matrix(M_P)
 
         self.set_generators([P,R,L])
-        self._add_identities()
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
 
 class UTT_Group(MonoidAction):
     """Defines Hook's UTT group acting on the set of the 24 major and minor triads.
@@ -188,30 +217,31 @@ class UTT_Group(MonoidAction):
         I.set_mapping_matrix(M_I)
 
         self.set_generators([T,I])
-        self.generate_category()
-
-        ## Quick rewriting of the operation names to conform to
-        ## Hook's terminology for UTTs
-
-        new_operations = []
-        for name_f,f in self.get_morphisms():
-            op = [0,0,0]
-            for j in name_f[::-1]:
-                if j=="T":
-                    op[op[2]]=op[op[2]]+1
-                if j=="I":
-                    op[2]=1-op[2]
-            new_name = "<"+str(op[0])+","+str(op[1])+","+("+"*(op[2]==0)+"-"*(op[2]==1))+">"
-            new_morphism = CatMorphism(new_name,X,X)
-            new_morphism.set_mapping_matrix(f.get_mapping_matrix())
-            new_operations.append(new_morphism)
-
-        self.set_objects([X]) ## This erases previous morphisms
-        self._add_morphisms(new_operations)
+        if not _load_tables(self):
+            self.generate_category()
+
+            ## Quick rewriting of the operation names to conform to
+            ## Hook's terminology for UTTs
+
+            new_operations = []
+            for name_f,f in self.get_morphisms():
+                op = [0,0,0]
+                for j in name_f[::-1]:
+                    if j=="T":
+                        op[op[2]]=op[op[2]]+1
+                    if j=="I":
+                        op[2]=1-op[2]
+                new_name = "<"+str(op[0])+","+str(op[1])+","+("+"*(op[2]==0)+"-"*(op[2]==1))+">"
+                new_morphism = CatMorphism(new_name,X,X)
+                new_morphism.set_mapping_matrix(f.get_mapping_matrix())
+                new_operations.append(new_morphism)
+
+            self.set_objects([X]) ## This erases previous morphisms
+            self._add_morphisms(new_operations)
         self.generators = {"<1,0,+>":self.morphisms["<1,0,+>"],"<0,0,->":self.morphisms["<0,0,->"]}
 
         if use_cayley_table:
-            self._build_cayley_table()
+            self._get_cayley_table()
 
 class Left_Z3Q8_Group(MonoidAction):
     """Defines a simply transitive generalized neo-Riemannian group acting
@@ -240,31 +270,32 @@ class Left_Z3Q8_Group(MonoidAction):
         J.set_mapping_matrix(M_J)
 
         self.set_generators([T,J])
-        self._add_identities()
-        self._add_morphisms([T,J])
-        for i in range(2,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = x*T
-            x.set_name("T"+str(i))
-            self._add_morphisms([x])
-        for i in range(1,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = x*T
-            y=x*J
-            y.set_name("J"+str(i))
-            self._add_morphisms([y])
+        if not _load_tables(self):
+            self._add_identities()
+            self._add_morphisms([T,J])
+            for i in range(2,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = x*T
+                x.set_name("T"+str(i))
+                self._add_morphisms([x])
+            for i in range(1,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = x*T
+                y=x*J
+                y.set_name("J"+str(i))
+                self._add_morphisms([y])
 
         if use_cayley_table:
-            self._build_cayley_table()
+            self._get_cayley_table()
 
 class Right_Z3Q8_Group(MonoidAction):
     """Defines a simply transitive generalized neo-Riemannian group acting
         on the right on the set of the 24 major and minor triads.
         The group is an extension of Z_12 by Z_2 with a non-trivial cocycle.
     """
-    def __init__(self,build_cayley_table=False):
+    def __init__(self,use_cayley_table=False):
         super(Right_Z3Q8_Group,self).__init__(use_cayley_table)
 
         X = CatObject(".",["C_M","Cs_M","D_M","Eb_M","E_M","F_M","Fs_M","G_M","Gs_M","A_M","Bb_M","B_M",
@@ -286,24 +317,25 @@ class Right_Z3Q8_Group(MonoidAction):
         J.set_mapping_matrix(M_J)
 
         self.set_generators([T,J])
-        self._add_identities()
-        self._add_morphisms([T,J])
-        for i in range(2,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = x*T
-            x.set_name("T"+str(i))
-            self._add_morphisms([x])
-        for i in range(1,12):
-            x = self.morphisms['id_.']
-            for j in range(i):
-                x = x*T
-            y=x*J
-            y.set_name("J"+str((-i)%12))
-            self._add_morphisms([y])
+        if not _load_tables(self):
+            self._add_identities()
+            self._add_morphisms([T,J])
+            for i in range(2,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = x*T
+                x.set_name("T"+str(i))
+                self._add_morphisms([x])
+            for i in range(1,12):
+                x = self.morphisms['id_.']
+                for j in range(i):
+                    x = x*T
+                y=x*J
+                y.set_name("J"+str((-i)%12))
+                self._add_morphisms([y])
 
         if use_cayley_table:
-            self._build_cayley_table()
+            self._get_cayley_table()
 
 
 class UPL_Monoid(MonoidAction):
@@ -353,7 +385,8 @@ class UPL_Monoid(MonoidAction):
         U.set_mapping_matrix(M_U)
 
         self.set_generators([P,L,U])
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
 
 
 class S_Monoid(MonoidAction):
@@ -363,7 +396,7 @@ class S_Monoid(MonoidAction):
         whenever the chord x differ from y by the movement
         of a single note by a semitone.
     """
-    def __init__(self,use_cayley_table):
+    def __init__(self,use_cayley_table=False):
         super(S_Monoid,self).__init__(use_cayley_table)
 
         X = CatObject(".",["C_M","Cs_M","D_M","Eb_M","E_M","F_M","Fs_M","G_M","Gs_M","A_M","Bb_M","B_M",
@@ -388,7 +421,8 @@ class S_Monoid(MonoidAction):
         S.set_mapping_matrix(M_S)
 
         self.set_generators([S])
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
 
 
 
@@ -399,7 +433,7 @@ class T_Monoid(MonoidAction):
         whenever the chord x differ from y by the movement
         of two notes by a semitone each.
     """
-    def __init__(self,use_cayley_table):
+    def __init__(self,use_cayley_table=False):
         super(T_Monoid,self).__init__(use_cayley_table)
 
         X = CatObject(".",["C_M","Cs_M","D_M","Eb_M","E_M","F_M","Fs_M","G_M","Gs_M","A_M","Bb_M","B_M",
@@ -437,7 +471,8 @@ class T_Monoid(MonoidAction):
         T.set_mapping_matrix(M_T)
 
         self.set_generators([T])
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
 
 
 class K_Monoid(MonoidAction):
@@ -447,7 +482,7 @@ class K_Monoid(MonoidAction):
         whenever the chord x differ from y by the movement of two notes
         by a semitone each, and the remaining note by a tone.
     """
-    def __init__(self,use_cayley_table):
+    def __init__(self,use_cayley_table=False):
         super(K_Monoid,self).__init__(use_cayley_table)
 
         X = CatObject(".",["C_M","Cs_M","D_M","Eb_M","E_M","F_M","Fs_M","G_M","Gs_M","A_M","Bb_M","B_M",
@@ -472,7 +507,8 @@ class K_Monoid(MonoidAction):
         K.set_mapping_matrix(M_K)
 
         self.set_generators([K])
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
 
 
 class W_Monoid(MonoidAction):
@@ -482,7 +518,7 @@ class W_Monoid(MonoidAction):
         whenever the chord x differ from y by the movement of a single note
         by a semitone, and the remaining notes by a tone each.
     """
-    def __init__(self,build_cayley_table):
+    def __init__(self,use_cayley_table=False):
         super(W_Monoid,self).__init__(use_cayley_table)
 
         X = CatObject(".",["C_M","Cs_M","D_M","Eb_M","E_M","F_M","Fs_M","G_M","Gs_M","A_M","Bb_M","B_M",
@@ -507,7 +543,8 @@ class W_Monoid(MonoidAction):
         W.set_mapping_matrix(M_W)
 
         self.set_generators([W])
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
 
 
 
@@ -516,7 +553,7 @@ class ST_Monoid(MonoidAction):
         and augmented triads by relations.
         It is generated by the S and T operations presented above.
     """
-    def __init__(self,use_cayley_table):
+    def __init__(self,use_cayley_table=False):
         super(ST_Monoid,self).__init__(use_cayley_table)
 
         X = CatObject(".",["C_M","Cs_M","D_M","Eb_M","E_M","F_M","Fs_M","G_M","Gs_M","A_M","Bb_M","B_M",
@@ -570,4 +607,38 @@ class ST_Monoid(MonoidAction):
         T.set_mapping_matrix(M_T)
 
         self.set_generators([S,T])
-        self.generate_category()
+        if not _load_tables(self):
+            self.generate_category()
+
+
+## Music monoids whose tables are built at installation time
+PREBUILT_MONOIDS = [Noll_Monoid,TI_Group_PC,TI_Group_Triads,PRL_Group,UTT_Group,
+                    Left_Z3Q8_Group,Right_Z3Q8_Group,UPL_Monoid,S_Monoid,
+                    T_Monoid,K_Monoid,W_Monoid,ST_Monoid]
+
+def build_tables(path=None):
+    """Builds the tables of the music monoids, i.e. their morphisms and their
+    Cayley tables, and saves them as memory-mappable arrays, so that the
+    monoids can later be instantiated without being generated. This is run
+    when the package is built (see setup.py).
+
+    Parameters
+    ----------
+    path: optional string representing the directory in which the tables are
+          saved. Defaults to the data directory of the package.
+
+    Returns
+    -------
+    None
+    """
+    if path is None:
+        path = storage.PACKAGE_DATA_DIR
+    for monoid_class in PREBUILT_MONOIDS:
+        monoid = monoid_class()
+        monoid._get_cayley_table()
+        arrays = monoid._get_arrays()
+        arrays["key"] = np.array(monoid._tables_key)
+        monoid_path = os.path.join(path,monoid_class.__name__)
+        if os.path.isdir(monoid_path):
+            shutil.rmtree(monoid_path)
+        storage.save_arrays(monoid_path,arrays)
@@ -561,6 +561,23 @@ class QMorphism(object):
 
         return np.all(np.sum(self.matrix,axis=0)>self.qtype.Zero())
 
+    def _key(self):
+        """Returns a hashable key identifying the morphism by its content
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        A tuple made of the names of the domain and codomain, the shape of the
+        mapping matrix and the bytes of the array of quantale values. Two
+        morphisms are equal if and only if they have the same key.
+        """
+        values = np.array([v.x for v in self.matrix.flat],dtype=float)
+        return (self.source.name,self.target.name,self.matrix.shape,
+                values.tobytes())
+
 
     def __str__(self):
         """Returns a verbose description of the morphism
@@ -755,6 +772,7 @@ class CategoryQAction(object):
         self.generators={}
         self.morphisms={}
         self.equivalences=[]
+        self._morphism_index={}
         if objects is not None:
             self.set_objects(objects)
         if generators is not None:
@@ -780,6 +798,7 @@ class CategoryQAction(object):
         self.generators={}
         self.morphisms={}
         self.equivalences=[]
+        self._morphism_index={}
 
         ob_names = [catobject.name for catobject in list_objects]
         if not len(ob_names)==len(np.unique(ob_names)):
@@ -853,6 +872,7 @@ class CategoryQAction(object):
         self.generators={}
         self.morphisms={}
         self.equivalences=[]
+        self._morphism_index={}
 
         all_gennames = [m.name for m in list_morphisms]
         if not len(all_gennames)==len(np.unique(all_gennames)):
@@ -897,6 +917,31 @@ class CategoryQAction(object):
             if m.name in cat_mor_names:
                 raise Exception("Morphisms should have distinct names")
             self.morphisms[m.name] = m
+            ## Identities take precedence in the index over the other
+            ## morphisms with the same content, e.g. a generator acting as
+            ## an identity
+            if m.name=="id_"+m.source.name:
+                self._morphism_index[m._key()] = m.name
+            else:
+                self._morphism_index.setdefault(m._key(),m.name)
+
+    def _find_morphism(self,morphism):
+        """Finds the name of the morphism of the category action which is
+        equal to the given morphism, using the content-addressed index of
+        morphisms.
+
+        Parameters
+        ----------
+        morphism: an instance of QMorphism
+
+        Returns
+        -------
+        A string representing the name of the equal morphism in the category
+        action, or None if no such morphism exists. If several morphisms are
+        equal to the given morphism, this is the identity if it is one of
+        them, and the first of them to have been added otherwise.
+        """
+        return self._morphism_index.get(morphism._key())
 
     def _add_identities(self):
         """Automatically add identity morphisms on each object of the category
@@ -922,6 +967,10 @@ class CategoryQAction(object):
         category action, but the performance would be prohibitive for very
         large categories containing many morphisms.
 
+        Each new product is looked up in a content-addressed index of the
+        morphisms, so that checking whether it already exists does not depend
+        on the number of morphisms generated so far.
+
         Parameters
         ----------
         None
@@ -930,7 +979,9 @@ class CategoryQAction(object):
         -------
         None
         """
-        self.morphisms = self.generators.copy()
+        self.morphisms = {}
+        self._morphism_index = {}
+        self._add_morphisms([m for name_m,m in self.get_generators()])
         self._add_identities()
         new_liste = self.generators.copy()
         added_liste = self.generators.copy()
@@ -940,14 +991,13 @@ class CategoryQAction(object):
                 for name_g,morphism_g in self.get_generators():
                     new_morphism = morphism_g*morphism_x
                     if not new_morphism is None:
-                        c=0
-                        for name_y,morphism_y in self.get_morphisms():
-                            if new_morphism==morphism_y:
-                                c=1
-                                self.equivalences.append([new_morphism.name,morphism_y.name])
-                        if c==0:
+                        name_y = self._find_morphism(new_morphism)
+                        if name_y is not None:
+                            self.equivalences.append([new_morphism.name,name_y])
+                        else:
                             added_liste[new_morphism.name] = new_morphism
                             self.morphisms[new_morphism.name] = new_morphism
+                            self._morphism_index[new_morphism._key()] = new_morphism.name
             new_liste = added_liste
 
     def mult(self,name_g,name_f):
@@ -1024,6 +1074,8 @@ class CategoryQAction(object):
         new_op.set_name(new_name)
         del self.morphisms[name_f]
         self.morphisms[new_name] = new_op
+        if self._morphism_index.get(new_op._key())==name_f:
+            self._morphism_index[new_op._key()] = new_name
 
     def rewrite_operations(self):
         """Rewrites morphism names in the category action by trying to reduce
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+
+################################################
+###### Copyright (c) 2016, Alexandre Popoff
+###
+
+import os
+import hashlib
+import shutil
+import tempfile
+import numpy as np
+
+## Version of the layout of the stored arrays. It is part of every cache key,
+## so that entries written with an older layout are never read.
+FORMAT_VERSION = 3
+
+_cache_dir = os.environ.get("OPYCLEID_CACHE_DIR")
+
+## Directory of the arrays built at installation time, such as the tables of
+## the music monoids
+PACKAGE_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),"data")
+
+def set_cache_dir(path):
+    """Sets the directory of the on-disk cache of generated category actions.
+    The cache is disabled by default, unless the environment variable
+    OPYCLEID_CACHE_DIR is set.
+
+    Parameters
+    ----------
+    path: a string representing the path of the cache directory, or None to
+          disable the cache.
+
+    Returns
+    -------
+    None
+    """
+    global _cache_dir
+    _cache_dir = path
+
+def get_cache_dir():
+    """Returns the directory of the on-disk cache of generated category actions.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    A string representing the path of the cache directory, or None if the
+    cache is disabled.
+    """
+    return _cache_dir
+
+def category_key(objects,generators):
+    """Computes the content-addressed key of a category action, i.e. a hash of
+    its objects and of the mappings of its generators. Two category actions
+    with the same key generate the same morphisms, with the same names.
+
+    Parameters
+    ----------
+    objects: a list of CatObject instances
+    generators: a list of CatMorphism instances
+
+    Returns
+    -------
+    A string representing the hexadecimal digest of the key.
+    """
+    digest = hashlib.sha256()
+    digest.update(("opycleid-%d" % FORMAT_VERSION).encode("utf-8"))
+    for catobject in sorted(objects,key=lambda x:x.name):
+        elements = [catobject.get_name_by_idx(i) for i in range(catobject.get_cardinality())]
+        digest.update(repr((catobject.name,elements)).encode("utf-8"))
+    for morphism in sorted(generators,key=lambda x:x.name):
+        digest.update(repr((morphism.name,morphism.source.name,
+                            morphism.target.name,bool(morphism.packed))).encode("utf-8"))
+        matrix = np.asarray(morphism.get_mapping_matrix(),dtype=bool)
+        digest.update(repr(matrix.shape).encode("utf-8"))
+        digest.update(np.packbits(matrix).tobytes())
+    return digest.hexdigest()
+
+def save_arrays(path,arrays):
+    """Saves a collection of arrays as a directory of .npy files, which can be
+    memory-mapped when loaded. The directory is written under a temporary name
+    and renamed once complete, so that an incomplete directory is never read.
+
+    Parameters
+    ----------
+    path: a string representing the path of the directory
+    arrays: a dictionary, with:
+            - keys: the names of the arrays
+            - values: NumPy arrays
+
+    Returns
+    -------
+    None
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    tmp_path = tempfile.mkdtemp(dir=parent)
+    try:
+        for name,array in arrays.items():
+            np.save(os.path.join(tmp_path,name+".npy"),array)
+        os.rename(tmp_path,path)
+    except OSError:
+        ## Another process has written the same directory in the meantime
+        if not os.path.isdir(path):
+            raise
+    finally:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+
+def add_array(path,name,array):
+    """Adds an array to a directory written by save_arrays.
+
+    Parameters
+    ----------
+    path: a string representing the path of the directory
+    name: a string representing the name of the array
+    array: a NumPy array
+
+    Returns
+    -------
+    None
+    """
+    fd,tmp_file = tempfile.mkstemp(dir=path,suffix=".tmp")
+    try:
+        with os.fdopen(fd,"wb") as f:
+            np.save(f,array)
+        os.replace(tmp_file,os.path.join(path,name+".npy"))
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+def load_arrays(path,mmap_mode="r"):
+    """Loads a collection of arrays saved by save_arrays.
+
+    Parameters
+    ----------
+    path: a string representing the path of the directory
+    mmap_mode: optional argument passed to numpy.load. By default, the arrays
+               are memory-mapped read-only, and can thus be shared between
+               processes.
+
+    Returns
+    -------
+    A dictionary, with:
+        - keys: the names of the arrays
+        - values: NumPy arrays
+    """
+    arrays = {}
+    for file_name in os.listdir(path):
+        if file_name.endswith(".npy"):
+            arrays[file_name[:-4]] = np.load(os.path.join(path,file_name),
+                                             mmap_mode=mmap_mode)
+    return arrays
+
+def load_cache_entry(key):
+    """Loads the arrays of a category action from the on-disk cache.
+
+    Parameters
+    ----------
+    key: a string representing the key of the category action, as returned by
+         category_key
+
+    Returns
+    -------
+    A dictionary of memory-mapped arrays (see load_arrays), or None if the
+    cache is disabled or has no entry for this key.
+    """
+    if _cache_dir is None:
+        return None
+    path = os.path.join(_cache_dir,key)
+    if not os.path.isdir(path):
+        return None
+    try:
+        return load_arrays(path)
+    except (OSError,ValueError):
+        return None
+
+def save_cache_entry(key,arrays):
+    """Saves the arrays of a category action in the on-disk cache. Failures to
+    write the cache are silently ignored.
+
+    Parameters
+    ----------
+    key: a string representing the key of the category action
+    arrays: a dictionary of NumPy arrays
+
+    Returns
+    -------
+    None
+    """
+    if _cache_dir is None:
+        return
+    try:
+        save_arrays(os.path.join(_cache_dir,key),arrays)
+    except OSError:
+        pass
+
+def add_to_cache_entry(key,name,array):
+    """Adds an array to an existing entry of the on-disk cache. Failures to
+    write the cache are silently ignored.
+
+    Parameters
+    ----------
+    key: a string representing the key of the category action
+    name: a string representing the name of the array
+    array: a NumPy array
+
+    Returns
+    -------
+    None
+    """
+    if _cache_dir is None:
+        return
+    path = os.path.join(_cache_dir,key)
+    if not os.path.isdir(path):
+        return
+    try:
+        add_array(path,name,array)
+    except OSError:
+        pass
+
+def load_package_data(name):
+    """Loads arrays shipped as package data, i.e. built at installation time
+    in the data directory of the package (see setup.py).
+
+    Parameters
+    ----------
+    name: a string representing the name of the collection of arrays
+
+    Returns
+    -------
+    A dictionary of memory-mapped arrays (see load_arrays), or None if the
+    package data is not available.
+    """
+    path = os.path.join(PACKAGE_DATA_DIR,name)
+    if not os.path.isdir(path):
+        return None
+    try:
+        return load_arrays(path)
+    except (OSError,ValueError):
+        return None
+
+def save_checkpoint(path,arrays):
+    """Saves a collection of arrays in a single .npz file, used to checkpoint
+    long computations. The file is written under a temporary name and renamed
+    once complete, so that a previous checkpoint is only replaced by a
+    complete one.
+
+    Parameters
+    ----------
+    path: a string representing the path of the file
+    arrays: a dictionary, with:
+            - keys: the names of the arrays
+            - values: NumPy arrays
+
+    Returns
+    -------
+    None
+    """
+    tmp_path = path+".tmp"
+    with open(tmp_path,"wb") as f:
+        np.savez(f,**arrays)
+    os.replace(tmp_path,path)
+
+def load_checkpoint(path):
+    """Loads a collection of arrays saved by save_checkpoint.
+
+    Parameters
+    ----------
+    path: a string representing the path of the file
+
+    Returns
+    -------
+    A dictionary of NumPy arrays, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return dict((name,data[name]) for name in data.files)
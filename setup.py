@@ -1,6 +1,8 @@
 from __future__ import print_function
+import os
 import sys
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 with open('requirements.txt') as f:
     INSTALL_REQUIRES = [l.strip() for l in f.readlines() if l]
@@ -12,6 +14,23 @@ except ImportError:
     print('numpy is required during installation')
     sys.exit(1)
 
+
+class BuildPyWithTables(build_py):
+    """Builds the package along with the prebuilt tables of the music monoids,
+    which are saved in the data directory of the built package.
+    """
+    def run(self):
+        build_py.run(self)
+        if self.dry_run:
+            return
+        sys.path.insert(0,os.path.abspath(self.build_lib))
+        try:
+            from opycleid.musicmonoids import build_tables
+            build_tables(os.path.join(self.build_lib,'opycleid','data'))
+        finally:
+            sys.path.pop(0)
+
+
 setup(name='opycleid',
       version='0.5.1',
       description='Transformational music analysis in Python',
@@ -21,4 +40,5 @@ setup(name='opycleid',
       install_requires=INSTALL_REQUIRES,
       url='https://github.com/AlexPof/opycleid.git',
       license='BSD-3',
+      cmdclass={'build_py': BuildPyWithTables},
       )
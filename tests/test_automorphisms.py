@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+from opycleid.musicmonoids import PRL_Group,TI_Group_PC,UPL_Monoid,Noll_Monoid,S_Monoid
+
+
+def closure(generators,N):
+    identity = np.arange(N,dtype=np.int32)
+    elements = {identity.tobytes():identity}
+    queue = [identity]
+    while len(queue):
+        element = queue.pop()
+        for generator in generators:
+            product = generator[element]
+            if not product.tobytes() in elements:
+                elements[product.tobytes()] = product
+                queue.append(product)
+    return set(elements.keys())
+
+
+## Monoids along with the orders of their automorphism groups. PRL and the
+## T/I group are dihedral groups of order 24, with 12*phi(12) automorphisms
+EXAMPLES = [(PRL_Group,48),(TI_Group_PC,48),(UPL_Monoid,12),(Noll_Monoid,2),(S_Monoid,1)]
+
+
+@pytest.mark.parametrize("monoid,order",EXAMPLES,ids=lambda x:getattr(x,"__name__",str(x)))
+def test_automorphism_group(monoid,order):
+    M = monoid()
+    G = M.get_automorphisms(as_group=True)
+    assert len(G)==order
+    N = len(M.morphisms)
+    table = M._get_cayley_table()
+    elements = set(permutation.tobytes() for permutation in G)
+    assert len(elements)==order
+    assert np.arange(N,dtype=np.int32).tobytes() in elements
+
+    for i,p in enumerate(G):
+        ## Each automorphism preserves products
+        assert np.array_equal(p[table],table[np.ix_(p,p)])
+        assert G.index(p)==i
+        assert p in G
+        assert G.get_functor(p).is_automorphism()
+        assert G.index(G.get_functor(p))==i
+        inverse = G.invert(p)
+        assert inverse in G
+        assert np.array_equal(G.compose(p,inverse),np.arange(N))
+        assert np.array_equal(G.compose(inverse,p),np.arange(N))
+        for q in G:
+            ## Closure of the group, applying q first
+            pq = G.compose(p,q)
+            assert pq.tobytes() in elements
+            assert np.array_equal(pq,p[q])
+    assert G.index(np.arange(N+1)) is None
+
+
+@pytest.mark.parametrize("monoid,order",EXAMPLES,ids=lambda x:getattr(x,"__name__",str(x)))
+def test_automorphism_generators(monoid,order):
+    G = monoid().get_automorphisms(as_group=True)
+    N = G.permutations.shape[1]
+    generators = G.get_generators()
+    assert len(generators)<=max(0,int(np.log2(order)))
+    assert closure(generators,N)==set(p.tobytes() for p in G)
+    ## No generator belongs to the subgroup generated by the previous ones
+    for k in range(len(generators)):
+        assert not generators[k].tobytes() in closure(generators[:k],N)
+
+
+def test_automorphism_samples():
+    G = PRL_Group().get_automorphisms(as_group=True)
+    samples = G.sample(100,seed=3)
+    assert samples.shape==(100,24)
+    assert all(p in G for p in samples)
+    assert np.array_equal(G.sample(100,seed=3),samples)
+    assert not np.array_equal(G.sample(100,seed=4),samples)
+    ## With 100 draws, most of the 48 automorphisms are drawn
+    assert len(set(p.tobytes() for p in samples))>24
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import itertools
+import pytest
+import numpy as np
+from opycleid.categoryaction import CatObject,CatMorphism,CategoryAction,CategoryFunctor
+from opycleid.categoryaction import GenerationLimitExceeded
+from opycleid.musicmonoids import Noll_Monoid,K_Monoid,PRL_Group
+
+
+def identity_generator_category():
+    ## A one-object category whose only generator acts as the identity
+    X = CatObject(".",["a","b"])
+    g = CatMorphism("g",X,X)
+    g.set_to_identity()
+    return CategoryAction(objects=[X],generators=[g],generate=True)
+
+
+def transformation_category(generate=True):
+    ## The monoid of transformations generated by a cycle and a collapse
+    X = CatObject(".",["a","b","c"])
+    f = CatMorphism("f",X,X)
+    f.set_mapping({"a":["b"],"b":["c"],"c":["a"]})
+    g = CatMorphism("g",X,X)
+    g.set_mapping({"a":["a"],"b":["a"],"c":["c"]})
+    return CategoryAction(objects=[X],generators=[f,g],generate=generate)
+
+
+def two_object_category():
+    X = CatObject("X",["a","b"])
+    Y = CatObject("Y",["c","d","e"])
+    f = CatMorphism("f",X,Y)
+    f.set_mapping({"a":["c"],"b":["d"]})
+    g = CatMorphism("g",Y,X)
+    g.set_mapping({"c":["a"],"d":["b"],"e":["b"]})
+    h = CatMorphism("h",Y,Y)
+    h.set_mapping({"c":["d"],"d":["c"],"e":["e"]})
+    return CategoryAction(objects=[X,Y],generators=[f,g,h],generate=True)
+
+
+def two_object_groupoid():
+    X = CatObject("X",["a","b"])
+    Y = CatObject("Y",["c","d"])
+    f = CatMorphism("f",X,Y)
+    f.set_mapping({"a":["c"],"b":["d"]})
+    g = CatMorphism("g",Y,X)
+    g.set_mapping({"c":["a"],"d":["b"]})
+    s = CatMorphism("s",X,X)
+    s.set_mapping({"a":["b"],"b":["a"]})
+    return CategoryAction(objects=[X,Y],generators=[f,g,s],generate=True)
+
+
+def brute_force_functors(source,target):
+    ## Every morphism of the source is written as a word in the generators,
+    ## whose image is then determined by the images of the generators and of
+    ## the objects. All these images are tried, and kept if they define a
+    ## functor.
+    table = source._get_cayley_table()
+    identities = source._get_identities()
+    target_identities = target._get_identities()
+    words = dict((x,(name_obj,[])) for name_obj,x in identities.items())
+    queue = list(words)
+    for x in queue:
+        for name_g in sorted(source.generators):
+            gx = table[source._morphism_idx[name_g],x]
+            if gx>=0 and not gx in words:
+                words[gx] = (words[x][0],[name_g]+words[x][1])
+                queue.append(gx)
+
+    gen_names = sorted(source.generators)
+    objects = sorted(source.objects)
+    functors = set()
+    for images in itertools.product(sorted(target.morphisms),repeat=len(gen_names)):
+        gen_mapping = dict(zip(gen_names,images))
+        for image_objects in itertools.product(sorted(target.objects),repeat=len(objects)):
+            object_mapping = dict(zip(objects,image_objects))
+            morphism_mapping = {}
+            for x,(name_obj,word) in words.items():
+                if len(word)==0:
+                    image = target._morphism_names[target_identities[object_mapping[name_obj]]]
+                else:
+                    image = gen_mapping[word[-1]]
+                    for name_g in word[-2::-1]:
+                        if image is not None:
+                            image = target.mult(gen_mapping[name_g],image)
+                if image is None:
+                    break
+                morphism_mapping[source._morphism_names[x]] = image
+            else:
+                if CategoryFunctor(source,target).set_fullmapping(object_mapping,morphism_mapping):
+                    functors.add((tuple(sorted(morphism_mapping.items())),
+                                  tuple(sorted(object_mapping.items()))))
+    return functors
+
+
+def relabeled_category(cat_action,seed,extra_element=False):
+    ## A copy of the category action with renamed objects, elements and
+    ## generators, given in a shuffled order. With extra_element, a fixed
+    ## point is added to each object, which breaks the isomorphism.
+    rng = random.Random(seed)
+    objects = {}
+    permutations = {}
+    for name_obj,catobject in rng.sample(cat_action.get_objects(),len(cat_action.objects)):
+        N = catobject.get_cardinality()
+        permutations[name_obj] = rng.sample(range(N),N)
+        elements = ["e{}_{}".format(i,name_obj) for i in range(N+extra_element)]
+        objects[name_obj] = CatObject("O_"+name_obj,rng.sample(elements,len(elements)))
+
+    generators = []
+    for name_g,g in rng.sample(cat_action.get_generators(),len(cat_action.generators)):
+        source = objects[g.source.name]
+        target = objects[g.target.name]
+        matrix = np.zeros((target.get_cardinality(),source.get_cardinality()),dtype=bool)
+        for j,i in zip(*np.nonzero(g.get_mapping_matrix())):
+            y = "e{}_{}".format(permutations[g.target.name][j],g.target.name)
+            x = "e{}_{}".format(permutations[g.source.name][i],g.source.name)
+            matrix[target.get_idx_by_name(y),source.get_idx_by_name(x)] = True
+        if extra_element:
+            y = "e{}_{}".format(matrix.shape[0]-1,g.target.name)
+            x = "e{}_{}".format(matrix.shape[1]-1,g.source.name)
+            matrix[target.get_idx_by_name(y),source.get_idx_by_name(x)] = True
+        generators.append(CatMorphism("G_"+name_g,source,target,matrix))
+    return CategoryAction(objects=list(objects.values()),generators=generators,generate=True)
+
+
+def test_identity_content_is_indexed_by_identity():
+    C = identity_generator_category()
+    assert sorted(C.morphisms.keys())==["g","id_."]
+    assert ["gg","id_."] in C.equivalences
+    assert C._find_morphism(C.morphisms["g"])=="id_."
+
+
+def test_checkpoint_when_time_limit_exceeded_before_first_yield(tmp_path):
+    checkpoint = str(tmp_path/"checkpoint")
+    C = transformation_category(generate=False)
+    with pytest.raises(GenerationLimitExceeded):
+        for name_f,f in C.iter_generate(max_time=-1.,checkpoint=checkpoint):
+            pass
+    assert os.path.exists(checkpoint)
+
+    C.generate_category(checkpoint=checkpoint)
+    assert not os.path.exists(checkpoint)
+    assert sorted(C.morphisms.keys())==sorted(transformation_category().morphisms.keys())
+
+
+def test_automorphisms_of_identity_generator_category():
+    C = identity_generator_category()
+    assert C._morphism_names[C._get_identities()["."]]=="id_."
+    assert C.mult("id_.","id_.")=="id_."
+    automorphisms = C.get_automorphisms()
+    assert len(automorphisms)==1
+    assert automorphisms[0].is_automorphism()
+
+
+@pytest.mark.parametrize("source,target",[
+    (two_object_category,two_object_groupoid),
+    (two_object_groupoid,two_object_category),
+    (two_object_groupoid,two_object_groupoid),
+    (identity_generator_category,transformation_category),
+    (transformation_category,transformation_category),
+    (K_Monoid,Noll_Monoid),
+    (Noll_Monoid,Noll_Monoid),
+])
+def test_enumerate_functors_matches_brute_force(source,target):
+    S = source()
+    T = target()
+    functors = list(CategoryFunctor.enumerate(S,T))
+    found = [(tuple(sorted(F.morphisms_mapping.items())),tuple(sorted(F.object_mapping.items())))
+             for F in functors]
+    assert len(set(found))==len(found)
+    assert set(found)==brute_force_functors(S,T)
+    assert all(F.is_valid() for F in functors)
+
+
+@pytest.mark.parametrize("category",[two_object_category,two_object_groupoid,
+                                     transformation_category,Noll_Monoid])
+def test_automorphisms_are_the_bijective_functors(category):
+    C = category()
+    endofunctors = [F for F in CategoryFunctor.enumerate(C,C) if F.is_automorphism()]
+    automorphisms = C.get_automorphisms()
+    assert sorted(sorted(F.morphisms_mapping.items()) for F in endofunctors)== \
+        sorted(sorted(F.morphisms_mapping.items()) for F in automorphisms)
+
+
+@pytest.mark.parametrize("category",[two_object_category,two_object_groupoid,
+                                     transformation_category,Noll_Monoid,PRL_Group])
+@pytest.mark.parametrize("seed",[0,1,2])
+def test_canonical_hash_is_invariant_under_relabeling(category,seed):
+    C = category()
+    R = relabeled_category(C,seed)
+    assert R.get_canonical_hash()==C.get_canonical_hash()
+    assert C.is_isomorphic(R)
+    assert R.is_isomorphic(C)
+
+
+@pytest.mark.parametrize("category",[two_object_category,two_object_groupoid,
+                                     transformation_category,Noll_Monoid])
+def test_canonical_hash_separates_non_isomorphic_actions(category):
+    C = category()
+    X = relabeled_category(C,0,extra_element=True)
+    assert not X.get_canonical_hash()==C.get_canonical_hash()
+    assert not C.is_isomorphic(X)
+    assert not two_object_category().is_isomorphic(two_object_groupoid())
+
+
+@pytest.mark.parametrize("image_g",["id_.","P"])
+def test_generator_mapping_with_identity_generator(image_g):
+    C = identity_generator_category()
+    P = PRL_Group()
+    F = CategoryFunctor(C,P)
+    assert F.set_from_generator_mapping({"g":image_g})
+    assert F.get_morphism_mapping()=={"g":image_g,"id_.":"id_."}
+    assert np.array_equal(F._get_morphism_array(),[P._morphism_idx[image_g],P._morphism_idx["id_."]])
+    assert F.is_valid()
+
+    ## The generator is an involution, so it cannot be mapped to an operation
+    ## of higher order
+    name_f = sorted(name_f for name_f in P.morphisms if not P.mult(name_f,name_f)=="id_.")[0]
+    assert not CategoryFunctor(C,P).set_from_generator_mapping({"g":name_f})
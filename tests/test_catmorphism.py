@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+from opycleid.categoryaction import CatObject,CatMorphism
+
+
+def random_relation(name,source,target,rng,density=0.05,left_total=True):
+    matrix = rng.random((target.get_cardinality(),source.get_cardinality()))<density
+    if left_total:
+        matrix[rng.integers(target.get_cardinality(),size=source.get_cardinality()),
+               np.arange(source.get_cardinality())] = True
+    return matrix
+
+
+## Cardinalities above 64, so that columns span several words
+X = CatObject("X",["x{}".format(i) for i in range(70)])
+Y = CatObject("Y",["y{}".format(i) for i in range(130)])
+Z = CatObject("Z",["z{}".format(i) for i in range(200)])
+
+
+@pytest.mark.parametrize("seed",[0,1,2])
+def test_packed_composition_matches_dense(seed):
+    rng = np.random.default_rng(seed)
+    M_f = random_relation("f",X,Y,rng)
+    M_g = random_relation("g",Y,Z,rng,density=0.02)
+    for packed_f in [False,True]:
+        for packed_g in [False,True]:
+            f = CatMorphism("f",X,Y,M_f,packed=packed_f)
+            g = CatMorphism("g",Y,Z,M_g,packed=packed_g)
+            gf = g*f
+            expected = (M_g.astype(int).dot(M_f.astype(int)))>0
+            assert np.array_equal(gf.get_mapping_matrix(),expected)
+            assert gf.packed==(packed_f or packed_g)
+
+
+@pytest.mark.parametrize("seed",[0,1])
+def test_packed_comparisons_match_dense(seed):
+    rng = np.random.default_rng(seed)
+    M = random_relation("f",X,Y,rng)
+    N = M.copy()
+    N[rng.integers(130),rng.integers(70)] = True
+    for packed_1 in [False,True]:
+        for packed_2 in [False,True]:
+            f = CatMorphism("f",X,Y,M,packed=packed_1)
+            f_copy = CatMorphism("f2",X,Y,M.copy(),packed=packed_2)
+            h = CatMorphism("h",X,Y,N,packed=packed_2)
+            assert f==f_copy
+            assert hash(f)==hash(f_copy)
+            assert f._key()==f_copy._key()
+            assert f<=h
+            assert f<=f_copy
+            assert (h<=f)==np.array_equal(M,N)
+            assert (f==h)==np.array_equal(M,N)
+
+
+def test_packed_left_totality():
+    rng = np.random.default_rng(3)
+    M = random_relation("f",X,Y,rng,density=0.,left_total=False)
+    M[0,:69] = True
+    for packed in [False,True]:
+        f = CatMorphism("f",X,Y,M,packed=packed)
+        assert not f._is_lefttotal()
+        M_total = M.copy()
+        M_total[129,69] = True
+        f.set_mapping_matrix(M_total)
+        assert f._is_lefttotal()
+
+
+def test_set_packed_keeps_mapping():
+    rng = np.random.default_rng(4)
+    M = random_relation("f",X,Y,rng)
+    f = CatMorphism("f",X,Y,M)
+    f.set_packed(True)
+    assert f.packed
+    assert np.array_equal(f.get_mapping_matrix(),M)
+    f.set_packed(False)
+    assert np.array_equal(f.get_mapping_matrix(),M)
+
+
+def random_function(source,target,rng):
+    matrix = np.zeros((target.get_cardinality(),source.get_cardinality()),dtype=bool)
+    matrix[rng.integers(target.get_cardinality(),size=source.get_cardinality()),
+           np.arange(source.get_cardinality())] = True
+    return matrix
+
+
+@pytest.mark.parametrize("seed",[0,1,2])
+def test_functional_composition_matches_dense(seed):
+    rng = np.random.default_rng(seed)
+    F_f = random_function(X,Y,rng)
+    F_g = random_function(Y,Z,rng)
+    R_f = random_relation("f",X,Y,rng)
+    R_g = random_relation("g",Y,Z,rng,density=0.02)
+    ## Partial relations: some elements have no image
+    P_f = random_relation("f",X,Y,rng,density=0.01,left_total=False)
+    P_g = random_relation("g",Y,Z,rng,density=0.01,left_total=False)
+    for M_f,M_g in [(F_f,F_g),(F_f,R_g),(R_f,F_g),(F_f,P_g),(P_f,F_g),(P_f,R_g)]:
+        for packed in [False,True]:
+            f = CatMorphism("f",X,Y,M_f,packed=packed)
+            g = CatMorphism("g",Y,Z,M_g)
+            gf = g*f
+            expected = (M_g.astype(int).dot(M_f.astype(int)))>0
+            assert np.array_equal(gf.get_mapping_matrix(),expected)
+            assert gf==CatMorphism("e",X,Z,expected)
+            assert (gf._images is not None)==bool(np.all(expected.sum(axis=0)==1))
+
+
+def test_functional_morphism_equals_matrix_storage():
+    rng = np.random.default_rng(4)
+    M = random_function(X,Y,rng)
+    f = CatMorphism("f",X,Y,M)
+    assert f._images is not None
+    for packed in [False,True]:
+        ## The same function, held as a matrix or as packed words
+        g = CatMorphism("g",X,Y,packed=packed)
+        if packed:
+            g._words = f._get_words()
+        else:
+            g._matrix = M.copy()
+        assert f==g
+        assert g==f
+        assert f<=g and g<=f
+        assert not f<g
+    N = M.copy()
+    N[0,:] = True
+    h = CatMorphism("h",X,Y,N)
+    assert not f==h
+    assert f<=h and f<h
+
+
+def test_functional_matrix_is_a_copy():
+    rng = np.random.default_rng(5)
+    M = random_function(X,Y,rng)
+    f = CatMorphism("f",X,Y,M)
+    f.matrix[:,0] = True
+    assert np.array_equal(f.get_mapping_matrix(),M)
+    N = M.copy()
+    N[:,0] = True
+    f.matrix = N
+    assert np.array_equal(f.get_mapping_matrix(),N)
+    assert f._images is None
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+from opycleid.categoryaction import CatObject,CatMorphism,CategoryAction
+from opycleid.musicmonoids import PRL_Group,S_Monoid
+
+
+def two_object_category(use_cayley_table=False):
+    X = CatObject("X",["a","b"])
+    Y = CatObject("Y",["c","d","e"])
+    f = CatMorphism("f",X,Y)
+    f.set_mapping({"a":["c"],"b":["d","e"]})
+    g = CatMorphism("g",Y,X)
+    g.set_mapping({"c":["a"],"d":["b"],"e":["b"]})
+    h = CatMorphism("h",Y,Y)
+    h.set_mapping({"c":["d"],"d":["e"],"e":["c"]})
+    C = CategoryAction(objects=[X,Y],generators=[f,g,h],use_cayley_table=use_cayley_table)
+    C.generate_category()
+    return C
+
+
+@pytest.mark.parametrize("category",[two_object_category,PRL_Group,S_Monoid])
+def test_cayley_table_matches_composition(category):
+    C = category(False)
+    table = C._get_cayley_table()
+    names = C._morphism_names
+    assert table.shape==(len(names),len(names))
+    for i,name_g in enumerate(names):
+        for j,name_f in enumerate(names):
+            name_prod = C._mult_morphisms(name_g,name_f)
+            if name_prod is None:
+                assert table[i,j]==-1
+            else:
+                assert names[table[i,j]]==name_prod
+            assert C.mult(name_g,name_f)==name_prod
+
+
+def test_cayley_table_of_multi_object_category_has_non_composable_pairs():
+    C = two_object_category(use_cayley_table=True)
+    assert C.cayley_table is not None
+    assert (C.cayley_table==-1).any()
+    assert C.mult("f","f") is None
+    assert C.mult("g","f")==C._mult_morphisms("g","f")
+
+
+@pytest.mark.parametrize("category",[two_object_category,PRL_Group,S_Monoid])
+def test_cayley_graph_walk_matches_composition(category):
+    C = category(False)
+    names = C._morphism_names
+    for i,name_g in enumerate(names):
+        for j,name_f in enumerate(names):
+            name_prod = C._mult_morphisms(name_g,name_f)
+            idx_prod = C._mult_cayley_graph(i,j)
+            if name_prod is None:
+                assert idx_prod==-1
+            else:
+                assert names[idx_prod]==name_prod
+            assert C.mult(name_g,name_f)==name_prod
+    ## The products are not read from a Cayley table
+    assert C.cayley_table is None
+
+
+def transformation_generators():
+    X = CatObject(".",["0","1","2"])
+    generators = []
+    for name,images in [("c",[1,2,0]),("t",[1,0,2]),("k",[0,0,2])]:
+        M = np.zeros((3,3),dtype=bool)
+        M[images,np.arange(3)] = True
+        generators.append(CatMorphism(name,X,X,M))
+    return [X],generators
+
+
+def two_object_generators():
+    C = two_object_category()
+    return [x for name_x,x in C.get_objects()],[m for name_m,m in C.get_generators()]
+
+
+def morphism_content(C,idx):
+    morphism = C.morphisms[C._morphism_names[idx]]
+    return (morphism.source.name,morphism.target.name,
+            morphism.get_mapping_matrix().tobytes())
+
+
+@pytest.mark.parametrize("example",[transformation_generators,two_object_generators])
+@pytest.mark.parametrize("use_cayley_table",[False,True])
+@pytest.mark.parametrize("n_first",[1,2])
+def test_add_generators_matches_generation(example,use_cayley_table,n_first):
+    objects,generators = example()
+    C = CategoryAction(objects=objects,generators=generators[:n_first],
+                       use_cayley_table=use_cayley_table)
+    C.generate_category()
+    old_names = list(C._morphism_names)
+    old_morphisms = [C.morphisms[name] for name in old_names]
+    old_table = None if C.cayley_table is None else C.cayley_table.copy()
+    C.add_generators(generators[n_first:])
+
+    D = CategoryAction(objects=objects,generators=generators,use_cayley_table=use_cayley_table)
+    D.generate_category()
+    N = len(D._morphism_names)
+
+    ## Existing morphisms keep their names and indices
+    assert C._morphism_names[:len(old_names)]==old_names
+    for name,morphism in zip(old_names,old_morphisms):
+        assert C.morphisms[name] is morphism
+    ## Same morphisms as a generation from scratch
+    to_D = dict((morphism_content(D,i),i) for i in range(N))
+    assert len(C._morphism_names)==N
+    perm = np.array([to_D[morphism_content(C,i)] for i in range(N)])
+    assert sorted(perm.tolist())==list(range(N))
+
+    ## Each name spells the normal form of its morphism
+    gen_names = [C._morphism_names[a] for a in C._letters]
+    for idx,name in enumerate(C._morphism_names):
+        word = C._get_word(idx)
+        if len(word):
+            assert "".join(gen_names[a] for a in word)==name
+            product = C.generators[gen_names[word[-1]]]
+            for a in reversed(word[:-1]):
+                product = C.generators[gen_names[a]]*product
+            assert np.array_equal(product.get_mapping_matrix(),
+                                  C.morphisms[name].get_mapping_matrix())
+
+    ## Same Cayley graphs and Cayley table, up to the order of the morphisms
+    ## and of the generators
+    columns = [[name for name,m in D.get_generators()].index(name) for name in gen_names]
+    def relabel(graph):
+        graph = np.asarray(graph)
+        return np.where(graph>=0,perm[graph],-1)
+    left_D = D._left_graph[:,columns]
+    right_D = D._right_graph[:,columns]
+    assert np.array_equal(relabel(C._left_graph),left_D[perm])
+    assert np.array_equal(relabel(C._right_graph),right_D[perm])
+    table = C._get_cayley_table()
+    assert np.array_equal(relabel(table),D._get_cayley_table()[np.ix_(perm,perm)])
+    if old_table is not None:
+        assert np.array_equal(table[:len(old_names),:len(old_names)],old_table)
+    names = C._morphism_names
+    for i,name_g in enumerate(names):
+        for j,name_f in enumerate(names):
+            assert C.mult(name_g,name_f)==C._mult_morphisms(name_g,name_f)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import numpy as np
+from opycleid.categoryaction import CatMorphism,CategoryFunctor,CategoryActionFunctor
+from opycleid.musicmonoids import PRL_Group
+
+
+def identity_functor(C):
+    F = CategoryFunctor(C,C)
+    assert F.set_from_generator_mapping(dict((name_g,name_g) for name_g in C.generators))
+    return F
+
+
+def transposition(X,k):
+    ## Transposition by k semitones of the major and minor triads
+    M = np.zeros((24,24),dtype=bool)
+    for i in range(24):
+        M[12*(i//12)+(i+k)%12,i] = True
+    return CatMorphism("T{}".format(k),X,X,M)
+
+
+def brute_force_violations(C,eta):
+    ## Morphisms f for which eta*f is not included in f*eta
+    return [i for i,name_f in enumerate(C._morphism_names)
+            if not (eta*C.morphisms[name_f])<=(C.morphisms[name_f]*eta)]
+
+
+def test_valid_functor_has_no_violations():
+    C = PRL_Group()
+    X = C.get_object()[1]
+    F = identity_functor(C)
+    for k in range(12):
+        ## Transpositions commute with the PRL group
+        N = CategoryActionFunctor(C,C,F,{".":transposition(X,k)})
+        assert len(N.get_violations())==0
+        assert N.is_valid()
+
+
+def test_violations_of_a_non_natural_transformation():
+    C = PRL_Group()
+    X = C.get_object()[1]
+    F = identity_functor(C)
+    eta = C.morphisms["P"]
+    N = CategoryActionFunctor(C,C,F,{".":eta})
+    violations = N.get_violations()
+    assert not N.is_valid()
+    assert violations.tolist()==brute_force_violations(C,eta)
+    names = [C._morphism_names[i] for i in violations]
+    assert "R" in names and "L" in names
+    assert not "P" in names and not "id_." in names
+    ## P*R takes C_M to A_M, but R*P takes C_M to Eb_M
+    assert C.apply_operation("R","C_M")==["A_m"]
+    assert (eta*C.morphisms["R"])("C_M")==["A_M"]
+    assert (C.morphisms["R"]*eta)("C_M")==["Eb_M"]
+
+
+def test_violations_match_brute_force():
+    C = PRL_Group()
+    F = identity_functor(C)
+    for name_eta,eta in C.get_morphisms():
+        N = CategoryActionFunctor(C,C,F,{".":eta})
+        assert N.get_violations().tolist()==brute_force_violations(C,eta)
+    ## A component which is not a function: the union of P and the identity
+    X = C.get_object()[1]
+    M = C.morphisms["P"].get_mapping_matrix()|np.eye(24,dtype=bool)
+    eta = CatMorphism("eta",X,X,M)
+    N = CategoryActionFunctor(C,C,F,{".":eta})
+    assert N.get_violations().tolist()==brute_force_violations(C,eta)
+
+
+def test_missing_component_is_a_violation():
+    C = PRL_Group()
+    F = identity_functor(C)
+    N = CategoryActionFunctor(C,C,F,{})
+    assert N.get_violations().tolist()==list(range(len(C.morphisms)))
+    assert not N.is_valid()
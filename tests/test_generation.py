@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import os
+import pytest
+import numpy as np
+from opycleid import categoryaction
+from opycleid.categoryaction import GenerationLimitExceeded,GENERATION_OVERHEAD_BYTES
+from opycleid.musicmonoids import PRL_Group
+
+
+def generation_bytes(C):
+    return sum(C.morphisms[name]._get_nbytes()+GENERATION_OVERHEAD_BYTES
+               for name in C._morphism_names)
+
+
+def test_max_morphisms():
+    C = PRL_Group()
+    N = len(C.morphisms)
+    assert [name for name,f in C.iter_generate(max_morphisms=N)]==C._morphism_names
+    assert len(C.morphisms)==N
+    with pytest.raises(GenerationLimitExceeded):
+        for name,f in C.iter_generate(max_morphisms=N-1):
+            pass
+    ## The limit is hit by the last morphism
+    assert len(C.morphisms)==N
+    assert C._left_graph is None
+
+    with pytest.raises(GenerationLimitExceeded):
+        for name,f in C.iter_generate(max_morphisms=10):
+            assert len(C.morphisms)<=10
+    assert len(C.morphisms)==11
+
+
+def test_max_memory():
+    C = PRL_Group()
+    N = len(C.morphisms)
+    n_bytes = generation_bytes(C)
+    assert len(list(C.iter_generate(max_memory=n_bytes)))==N
+    with pytest.raises(GenerationLimitExceeded):
+        for name,f in C.iter_generate(max_memory=n_bytes-1):
+            pass
+    assert len(C.morphisms)==N
+    with pytest.raises(GenerationLimitExceeded):
+        for name,f in C.iter_generate(max_memory=n_bytes//2):
+            pass
+    assert generation_bytes(C)>n_bytes//2
+    assert generation_bytes(C)-C.morphisms[C._morphism_names[-1]]._get_nbytes() \
+           -GENERATION_OVERHEAD_BYTES<=n_bytes//2
+
+
+def test_max_time(monkeypatch):
+    C = PRL_Group()
+    N = len(C.morphisms)
+    assert len(list(C.iter_generate(max_time=3600.)))==N
+
+    ## A clock advancing by one second at each reading
+    clock = [0.]
+    def tick():
+        clock[0] += 1.
+        return clock[0]
+    monkeypatch.setattr(categoryaction.time,"time",tick)
+    with pytest.raises(GenerationLimitExceeded):
+        for name,f in C.iter_generate(max_time=10.5):
+            pass
+    ## Every check reads the clock once: the limit is hit at the 11th check
+    assert clock[0]==12.
+    assert 0<len(C.morphisms)<N
+
+
+def test_generator_closed_early():
+    C = PRL_Group()
+    N = len(C.morphisms)
+    full = dict((name,f.get_mapping_matrix()) for name,f in C.get_morphisms())
+    generator = C.iter_generate()
+    found = [next(generator)[0] for i in range(8)]
+    generator.close()
+    ## Only the morphisms found so far are kept, without the Cayley graphs
+    assert sorted(C.morphisms.keys())==sorted(found)
+    assert C._left_graph is None and C.cayley_table is None
+    for name in found:
+        assert np.array_equal(C.morphisms[name].get_mapping_matrix(),full[name])
+    ## Products are computed from the mappings when they have been found
+    assert C.mult("id_.","P")=="P"
+    assert C.mult("P","P")=="id_."
+    with pytest.raises(Exception):
+        [C.mult(name_g,name_f) for name_g in found for name_f in found]
+    C.generate_category()
+    assert len(C.morphisms)==N
+    assert C._left_graph is not None
+
+
+@pytest.mark.parametrize("max_morphisms",[5,10,17,23])
+def test_resume_after_max_morphisms(max_morphisms,tmp_path):
+    checkpoint = str(tmp_path/"checkpoint")
+    expected = PRL_Group()
+    C = PRL_Group()
+    with pytest.raises(GenerationLimitExceeded):
+        for name,f in C.iter_generate(max_morphisms=max_morphisms,checkpoint=checkpoint):
+            pass
+    assert os.path.exists(checkpoint)
+    ## The checkpoint holds the morphism which exceeded the limit
+    assert len(C.morphisms)==max_morphisms+1
+
+    D = PRL_Group()
+    resumed = [name for name,f in D.iter_generate(checkpoint=checkpoint)]
+    assert not os.path.exists(checkpoint)
+    assert resumed[:max_morphisms+1]==C._morphism_names
+    assert D._morphism_names==expected._morphism_names
+    assert sorted(D.equivalences)==sorted(expected.equivalences)
+    for name,array in expected._get_arrays().items():
+        assert np.array_equal(D._get_arrays()[name],array)
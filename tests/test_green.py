@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import pytest
+import numpy as np
+from opycleid.categoryaction import CatObject,CatMorphism,MonoidAction
+from opycleid.musicmonoids import PRL_Group,S_Monoid,T_Monoid
+
+
+def full_transformation_monoid(use_cayley_table=False):
+    ## The full transformation monoid T_3, generated by a cycle, a
+    ## transposition and a collapse
+    X = CatObject(".",["0","1","2"])
+    generators = []
+    for name,images in [("c",[1,2,0]),("t",[1,0,2]),("k",[0,0,2])]:
+        M = np.zeros((3,3),dtype=bool)
+        M[images,np.arange(3)] = True
+        generators.append(CatMorphism(name,X,X,M))
+    T = MonoidAction(use_cayley_table)
+    T.set_objects([X])
+    T.set_generators(generators)
+    T.generate_category()
+    return T
+
+
+def brute_force_classes(monoid):
+    ## Green's relations from the principal ideals xS, Sx and SxS
+    names = sorted(monoid.morphisms.keys())
+    right = dict((x,frozenset(monoid.mult(x,s) for s in names)) for x in names)
+    left = dict((x,frozenset(monoid.mult(s,x) for s in names)) for x in names)
+    two_sided = dict((x,frozenset(monoid.mult(s,y) for s in names for y in right[x]))
+                     for x in names)
+    keys = {'R':lambda x:right[x],
+            'L':lambda x:left[x],
+            'H':lambda x:(right[x],left[x]),
+            'J':lambda x:two_sided[x],
+            'D':lambda x:two_sided[x]}
+    classes = {}
+    for relation,key in keys.items():
+        groups = {}
+        for x in names:
+            groups.setdefault(key(x),[]).append(x)
+        classes[relation] = sorted(groups.values())
+    return classes
+
+
+@pytest.mark.parametrize("monoid",[full_transformation_monoid,PRL_Group,S_Monoid,T_Monoid])
+def test_green_classes_match_brute_force(monoid):
+    M = monoid(False)
+    expected = brute_force_classes(M)
+    assert sorted(M.get_Rclasses())==expected['R']
+    assert sorted(M.get_Lclasses())==expected['L']
+    assert sorted(M.get_Hclasses())==expected['H']
+    assert sorted(M.get_Dclasses())==expected['D']
+    assert sorted(M.get_Jclasses())==expected['J']
+    for name in M.morphisms:
+        assert sorted(M.element_Rclass(name))==[c for c in expected['R'] if name in c][0]
+        assert sorted(M.element_Lclass(name))==[c for c in expected['L'] if name in c][0]
+
+
+def test_green_class_counts_of_full_transformation_monoid():
+    ## T_3 has 27 elements and its J classes are the ranks 3, 2 and 1. As
+    ## operations compose as functions, xS is the set of maps with the same
+    ## image as x: R classes are the images and L classes the kernels
+    T = full_transformation_monoid()
+    assert len(T.morphisms)==27
+    assert len(T.get_Jclasses())==3
+    assert len(T.get_Rclasses())==1+3+3
+    assert len(T.get_Lclasses())==1+3+1
+    assert len(T.get_Hclasses())==1+9+3
+    assert sorted(len(c) for c in T.get_Jclasses())==[3,6,18]
+
+
+def test_green_classes_of_group():
+    G = PRL_Group(False)
+    for relation in ['R','L','H','D','J']:
+        assert len(G._get_classes(relation))==1
+
+
+def brute_force_ideals(monoid,relation):
+    ## Unions of classes which are closed under multiplication on the left
+    ## (resp. on the right)
+    names = sorted(monoid.morphisms.keys())
+    classes = monoid._get_classes(relation)
+    ideals = []
+    for subset in itertools.product([False,True],repeat=len(classes)):
+        X = set(x for keep,c in zip(subset,classes) if keep for x in c)
+        if relation=='L':
+            closed = all(monoid.mult(m,x) in X for m in names for x in X)
+        else:
+            closed = all(monoid.mult(x,m) in X for m in names for x in X)
+        if closed:
+            ideals.append(frozenset(X))
+    return ideals
+
+
+@pytest.mark.parametrize("monoid",[full_transformation_monoid,PRL_Group,S_Monoid,T_Monoid])
+def test_ideals_match_brute_force(monoid):
+    M = monoid(False)
+    for relation,ideals in [('L',M.get_leftIdeals()),('R',M.get_rightIdeals())]:
+        expected = brute_force_ideals(M,relation)
+        assert len(ideals)==len(expected)
+        assert set(frozenset(I) for I in ideals)==set(expected)
+        ## Ideals are sorted by their number of classes
+        class_idx = M._get_green_classes()[relation]
+        n_classes = [len(set(class_idx[M._morphism_idx[x]] for x in I)) for I in ideals]
+        assert n_classes==sorted(n_classes)
+
+
+def test_ideal_counts_of_full_transformation_monoid():
+    ## Left ideals are the down-sets of the kernels: the empty set, the
+    ## constant maps, the constant maps with any non-empty set of the 3
+    ## kernels of rank 2, and T_3. Right ideals are the down-sets of the
+    ## images: 8 sets of constant maps, 6+3+1 sets of rank 2 images with the
+    ## required constant maps, and T_3
+    T = full_transformation_monoid()
+    assert len(T.get_leftIdeals())==1+1+7+1
+    assert len(T.get_rightIdeals())==8+6+3+1+1
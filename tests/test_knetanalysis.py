@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import itertools
+import pytest
+import numpy as np
+from opycleid.categoryaction import CatObject,CatMorphism,CategoryFunctor,CategoryActionFunctor
+from opycleid.musicmonoids import PRL_Group,S_Monoid,T_Monoid,UTT_Group,UPL_Monoid
+from opycleid.knetanalysis import PKNet,analyze_progressions
+
+
+def loop_pknet():
+    ## A PK-net whose diagram has a loop acting as the identity of Y
+    X = CatObject("X",["x"])
+    Y = CatObject("Y",["y"])
+    f = CatMorphism("f",X,Y)
+    f.set_mapping({"x":["y"]})
+    g = CatMorphism("g",Y,Y)
+    g.set_mapping({"y":["y"]})
+    knet = PKNet(PRL_Group())
+    knet.set_edges([f,g])
+    return knet
+
+
+def test_set_mappings_with_identity_loop():
+    knet = loop_pknet()
+    knet.set_mappings({"f":"P","g":"id_."},{"x":["C_M"],"y":["C_m"]})
+    assert knet.get_edge_mapping()=={"f":"P","g":"id_.","id_X":"id_.","id_Y":"id_."}
+    assert knet.cat_action_functor.cat_functor.is_valid()
+
+
+@pytest.mark.parametrize("monoid,elements",[(S_Monoid,["C_M","C_m","E_M","C_aug"]),
+                                            (UTT_Group,["C_M","C_m","E_M"]),
+                                            (PRL_Group,["C_M","C_m","Gs_M","E_m"])])
+def test_count_progressions(monoid,elements):
+    knet = PKNet(monoid())
+    knets = list(knet.from_progression(elements))
+    assert knet.count_progressions(elements)==len(knets)
+    assert len(set(tuple(sorted(x.get_edge_mapping().items())) for x in knets))==len(knets)
+    assert all(x.cat_action_functor.is_valid() for x in knets)
+
+
+def test_sample_progressions():
+    knet = PKNet(UTT_Group())
+    elements = ["C_M","C_m","E_M"]
+    all_mappings = set(tuple(sorted(x.get_edge_mapping().items()))
+                       for x in knet.from_progression(elements))
+    samples = [tuple(sorted(x.get_edge_mapping().items()))
+               for x in knet.sample_progressions(elements,50,seed=1)]
+    assert len(samples)==50
+    assert set(samples)<=all_mappings
+    assert len(set(samples))>1
+    ## Seeded samples are reproducible
+    assert samples==[tuple(sorted(x.get_edge_mapping().items()))
+                     for x in knet.sample_progressions(elements,50,seed=1)]
+    assert not samples==[tuple(sorted(x.get_edge_mapping().items()))
+                         for x in knet.sample_progressions(elements,50,seed=2)]
+    assert all(x.cat_action_functor.is_valid() for x in
+               knet.sample_progressions(elements,5,seed=1))
+
+
+def test_count_progressions_without_transformation():
+    knet = PKNet(T_Monoid())
+    ## No operation of T takes C_M to Cs_M
+    assert knet.context_action.get_operation("C_M","Cs_M")==[]
+    with pytest.raises(Exception):
+        knet.count_progressions(["C_M","C_M","Cs_M"])
+    with pytest.raises(Exception):
+        list(knet.sample_progressions(["C_M","C_M","Cs_M"],3,seed=0))
+
+
+CORPUS = [["C_M","A_m","C_M"],["C_M","Cs_M"],["C_M","E_M","A_m","F_aug"],["C_aug","E_m"],["E_M"]]
+
+
+def expected_records(knet,progressions):
+    records = {}
+    for index,elements in enumerate(progressions):
+        try:
+            pknets = [[x.get_edge_mapping()["f_{}".format(i)] for i in range(len(elements)-1)]
+                      for x in knet.from_progression(elements)]
+            records[index] = {"index":index,"elements":elements,"count":len(pknets),
+                              "pknets":pknets,"error":None}
+        except Exception as e:
+            records[index] = {"index":index,"elements":elements,"count":0,
+                              "pknets":[],"error":str(e)}
+    return records
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return dict((r["index"],r) for r in (json.loads(line) for line in f))
+
+
+def test_analyze_progressions_jsonl(tmp_path):
+    context = T_Monoid()
+    output = str(tmp_path/"results.jsonl")
+    assert analyze_progressions(CORPUS,context,output,processes=2)==len(CORPUS)
+    records = read_jsonl(output)
+    assert records==expected_records(PKNet(context),CORPUS)
+    ## No operation of T takes C_M to Cs_M
+    assert records[1]["error"] is not None and records[1]["count"]==0
+    assert all(records[i]["error"] is None and records[i]["count"]>0 for i in [0,2,3,4])
+
+
+def test_analyze_progressions_sample(tmp_path):
+    context = T_Monoid()
+    outputs = [str(tmp_path/"results_{}.jsonl".format(i)) for i in range(2)]
+    for output in outputs:
+        analyze_progressions(CORPUS,context,output,processes=2,sample=4,seed=5)
+    records = read_jsonl(outputs[0])
+    assert records==read_jsonl(outputs[1])
+    expected = expected_records(PKNet(context),CORPUS)
+    for index,record in records.items():
+        assert record["count"]==expected[index]["count"]
+        assert (record["error"] is None)==(expected[index]["error"] is None)
+        if record["error"] is None:
+            assert len(record["pknets"])==4
+            assert all(x in expected[index]["pknets"] for x in record["pknets"])
+
+
+def test_analyze_progressions_parquet(tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    context = T_Monoid()
+    output = str(tmp_path/"results.parquet")
+    assert analyze_progressions(CORPUS,context,output,processes=2,batch_size=2)==len(CORPUS)
+    rows = pyarrow_parquet.read_table(output).to_pylist()
+    expected = expected_records(PKNet(context),CORPUS)
+    assert len(rows)==len(CORPUS)
+    for row in rows:
+        record = expected[row["index"]]
+        assert row["count"]==str(record["count"])
+        assert row["pknets"]==record["pknets"]
+        assert row["error"]==record["error"]
+
+
+def test_parquet_requires_pyarrow(tmp_path,monkeypatch):
+    monkeypatch.setitem(sys.modules,"pyarrow",None)
+    with pytest.raises(ImportError):
+        analyze_progressions(CORPUS,T_Monoid(),str(tmp_path/"results.parquet"),processes=1)
+
+
+def check_singleton_violations(knet,edges_map,elements_map):
+    ## Compares the fast path with the generic check of the category action
+    ## functor built from the components
+    F = CategoryFunctor(knet.diagram_action,knet.context_action)
+    assert F.set_from_generator_mapping(edges_map)
+    object_mapping = F.get_object_mapping()
+    singletons = knet._get_singletons()
+    assert singletons is not None
+    node_elements = knet._get_node_elements(object_mapping,elements_map,singletons)
+    violations = knet._get_singleton_violations(F,node_elements,singletons)
+    phi = knet._get_components(object_mapping,elements_map)
+    N = CategoryActionFunctor(knet.diagram_action,knet.context_action,F,phi)
+    assert violations.tolist()==N.get_violations().tolist()
+    if N.is_valid():
+        knet.set_mappings(edges_map,elements_map)
+        assert knet.cat_action_functor.is_valid()
+    else:
+        with pytest.raises(Exception):
+            knet.set_mappings(edges_map,elements_map)
+    return len(violations)==0
+
+
+@pytest.mark.parametrize("monoid,elements",[(PRL_Group,["C_M","E_m","C_M","A_m"]),
+                                            (S_Monoid,["C_M","C_m","E_M","C_aug"])])
+def test_singleton_violations_match_generic_check(monoid,elements):
+    context = monoid()
+    rng = np.random.RandomState(0)
+    all_elements = context.get_object()[1].get_elements()
+    n_valid = 0
+    n_invalid = 0
+    for knet in PKNet(context).sample_progressions(elements,5,seed=0):
+        edges_map = dict((name,knet.get_edge_mapping()[name]) for name in knet.diagram_action.generators)
+        elements_map = knet.get_elements_mapping()
+        ## Valid PK-net from the progression
+        assert check_singleton_violations(knet,edges_map,elements_map)
+        n_valid += 1
+        ## Other images, with one or two elements per node
+        for k in range(10):
+            random_map = dict((elem,list(rng.choice(all_elements,size=rng.randint(1,3))))
+                              for elem in elements_map)
+            if check_singleton_violations(knet,edges_map,random_map):
+                n_valid += 1
+            else:
+                n_invalid += 1
+    assert n_valid>0 and n_invalid>0
+
+
+def test_singleton_violations_of_loop():
+    knet = loop_pknet()
+    edges_map = {"f":"P","g":"id_."}
+    assert check_singleton_violations(knet,edges_map,{"x":["C_M"],"y":["C_m"]})
+    ## P does not take C_M to E_m
+    assert not check_singleton_violations(knet,edges_map,{"x":["C_M"],"y":["E_m"]})
+    ## Relational images: each image of y must be the image by P of an image
+    ## of x
+    assert check_singleton_violations(knet,edges_map,{"x":["C_M","E_M"],"y":["C_m","E_m"]})
+    assert not check_singleton_violations(knet,edges_map,{"x":["C_M"],"y":["C_m","E_m"]})
+    assert check_singleton_violations(knet,edges_map,{"x":["C_M","E_M"],"y":["C_m"]})
+
+
+def test_progression_of_a_single_element():
+    knet = PKNet(PRL_Group())
+    knets = list(knet.from_progression(["C_M"]))
+    assert len(knets)==knet.count_progressions(["C_M"])==1
+    assert knets[0].cat_action_functor.is_valid()
+
+
+def brute_force_orbit(knet):
+    ## Applies local_transform for every automorphism and every assignment of
+    ## morphisms to the objects of the diagram
+    context = knet.context_action
+    objects = [name_obj for name_obj,obj in knet.diagram_action.get_objects()]
+    names = [name_f for name_f,f in context.get_morphisms()]
+    key = knet.get_key()
+    keys = set()
+    stabilizer_size = 0
+    n_transforms = 0
+    for automorphism in context.get_automorphisms():
+        for local_names in itertools.product(names,repeat=len(objects)):
+            try:
+                new_knet = knet.local_transform(automorphism,dict(zip(objects,local_names)))
+            except Exception:
+                continue
+            if any(len(images)==0 for images in new_knet.get_elements_mapping().values()):
+                continue
+            n_transforms += 1
+            keys.add(new_knet.get_key())
+            if new_knet.get_key()==key:
+                stabilizer_size += 1
+    return keys,stabilizer_size,n_transforms
+
+
+@pytest.mark.parametrize("monoid,elements",[(PRL_Group,["C_M","A_m"]),(UPL_Monoid,["C_M","E_m"])])
+def test_orbit_matches_brute_force(monoid,elements):
+    context = monoid()
+    for knet in list(PKNet(context).from_progression(elements))[:2]:
+        orbit,stabilizer_size = knet.get_orbit()
+        keys,expected_size,n_transforms = brute_force_orbit(knet)
+        assert set(orbit.keys())==keys
+        assert stabilizer_size==expected_size
+        assert all(key==x.get_key() for key,x in orbit.items())
+        assert knet.get_key() in orbit
+        if monoid is PRL_Group:
+            ## In a group, every automorphism has one natural transformation
+            ## per image of the first object
+            assert n_transforms==len(context.get_automorphisms())*len(context.morphisms)
+            assert len(orbit)*stabilizer_size==n_transforms
+
+
+def test_orbit_of_a_single_element():
+    ## The diagram action has no object: every automorphism, with the empty
+    ## natural transformation, leaves the PK-net unchanged
+    context = PRL_Group()
+    knet = next(PKNet(context).from_progression(["C_M"]))
+    orbit,stabilizer_size = knet.get_orbit()
+    assert list(orbit.keys())==[knet.get_key()]
+    assert stabilizer_size==len(context.get_automorphisms())
+    assert brute_force_orbit(knet)==(set(orbit.keys()),stabilizer_size,stabilizer_size)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import os
+import pytest
+import numpy as np
+from opycleid import storage
+from opycleid import musicmonoids
+from opycleid.musicmonoids import PREBUILT_MONOIDS
+
+
+@pytest.fixture(scope="module")
+def tables_dir(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("data"))
+    empty = str(tmp_path_factory.mktemp("empty"))
+    previous = storage.PACKAGE_DATA_DIR
+    storage.PACKAGE_DATA_DIR = empty
+    try:
+        musicmonoids.build_tables(path)
+        ## Monoids generated without any prebuilt table
+        fresh = dict((monoid_class.__name__,monoid_class()) for monoid_class in PREBUILT_MONOIDS)
+    finally:
+        storage.PACKAGE_DATA_DIR = previous
+    return path,fresh
+
+
+@pytest.mark.parametrize("monoid_class",PREBUILT_MONOIDS,ids=lambda x:x.__name__)
+def test_prebuilt_tables_match_generation(monoid_class,tables_dir,monkeypatch):
+    path,fresh = tables_dir
+    assert sorted(os.listdir(path))==sorted(x.__name__ for x in PREBUILT_MONOIDS)
+    monkeypatch.setattr(storage,"PACKAGE_DATA_DIR",path)
+    expected = fresh[monoid_class.__name__]
+    monoid = monoid_class()
+    ## The tables are memory-mapped instead of generated
+    assert not monoid.cayley_table.flags.writeable
+    assert expected.cayley_table is None
+
+    assert monoid._morphism_names==expected._morphism_names
+    assert sorted(monoid.equivalences)==sorted(expected.equivalences)
+    for name_f,f in expected.get_morphisms():
+        assert np.array_equal(monoid.morphisms[name_f].get_mapping_matrix(),
+                              f.get_mapping_matrix())
+    names = expected._morphism_names
+    for name_g in names:
+        for name_f in names:
+            assert monoid.mult(name_g,name_f)==expected.mult(name_g,name_f)
+
+
+def test_prebuilt_tables_of_other_generators_are_ignored(tables_dir,monkeypatch):
+    path,fresh = tables_dir
+    monkeypatch.setattr(storage,"PACKAGE_DATA_DIR",path)
+    PRL = musicmonoids.PRL_Group()
+    ## Tables built from other generators are not used
+    P = PRL.generators["P"]
+    L = PRL.generators["L"]
+    PRL.set_generators([P,L])
+    assert not musicmonoids._load_tables(PRL)
+    PRL.generate_category()
+    assert len(PRL.get_morphisms())==6
+    assert musicmonoids._load_tables(musicmonoids.PRL_Group())
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from opycleid.categoryaction import CatObject,CatMorphism,CategoryAction
+from opycleid.musicmonoids import PRL_Group,S_Monoid
+
+
+def two_object_category():
+    X = CatObject("X",["a","b"])
+    Y = CatObject("Y",["c","d","e"])
+    f = CatMorphism("f",X,Y)
+    f.set_mapping({"a":["c"],"b":["d","e"]})
+    g = CatMorphism("g",Y,X)
+    g.set_mapping({"c":["a"],"d":["b"],"e":["b"]})
+    h = CatMorphism("h",Y,Y)
+    h.set_mapping({"c":["d"],"d":["e"],"e":["c"]})
+    C = CategoryAction(objects=[X,Y],generators=[f,g,h])
+    C.generate_category()
+    return C
+
+
+def linear_scan(category,element_1,element_2):
+    ## Applies every morphism, in the order of get_morphisms
+    res = []
+    for name_f,f in category.get_morphisms():
+        try:
+            if element_2 in f(element_1):
+                res.append(name_f)
+        except:
+            pass
+    return res
+
+
+def all_elements(category):
+    return [x for name_obj,catobject in category.get_objects() for x in catobject.get_elements()]
+
+
+def check_operations(category):
+    elements = all_elements(category)+["unknown"]
+    pairs = [(x,y) for x in elements for y in elements]
+    expected = [linear_scan(category,x,y) for x,y in pairs]
+    assert [category.get_operation(x,y) for x,y in pairs]==expected
+    assert category.get_operations(pairs)==expected
+    assert any(len(ops) for ops in expected)
+
+
+@pytest.mark.parametrize("category",[two_object_category,PRL_Group,S_Monoid])
+def test_operations_match_linear_scan(category):
+    check_operations(category())
+
+
+@pytest.mark.parametrize("category",[two_object_category,PRL_Group])
+def test_operations_after_rename(category):
+    C = category()
+    check_operations(C)
+    name_f = [name for name,f in C.get_morphisms() if not name.startswith("id_")][-1]
+    C.rename_operation(name_f,"A")
+    assert "A" in C.morphisms and not name_f in C.morphisms
+    check_operations(C)
+    assert any("A" in C.get_operation(x,y) for x in all_elements(C) for y in all_elements(C))
+
+
+def test_operations_of_empty_pairs():
+    C = two_object_category()
+    assert C.get_operations([])==[]
+    assert C.get_operation("a","unknown")==[]
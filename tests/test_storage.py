@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import os
+import pytest
+import numpy as np
+from opycleid import storage
+from opycleid.categoryaction import CatObject,CatMorphism,MonoidAction
+from opycleid.musicmonoids import PRL_Group,S_Monoid
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    previous = storage.get_cache_dir()
+    storage.set_cache_dir(str(tmp_path))
+    yield str(tmp_path)
+    storage.set_cache_dir(previous)
+
+
+@pytest.fixture
+def no_cache():
+    previous = storage.get_cache_dir()
+    storage.set_cache_dir(None)
+    yield
+    storage.set_cache_dir(previous)
+
+
+def cyclic_monoid(elements,use_cayley_table=False):
+    X = CatObject(".",elements)
+    M = np.zeros((len(elements),len(elements)),dtype=bool)
+    M[np.roll(np.arange(len(elements)),-1),np.arange(len(elements))] = True
+    T = MonoidAction(use_cayley_table)
+    T.set_objects([X])
+    T.set_generators([CatMorphism("t",X,X,M)])
+    T.generate_category()
+    return T
+
+
+def assert_same_arrays(arrays,expected):
+    assert sorted(arrays.keys())==sorted(expected.keys())
+    for name in expected:
+        assert np.array_equal(np.asarray(arrays[name]),np.asarray(expected[name]))
+
+
+def test_save_and_load_arrays(tmp_path):
+    path = os.path.join(str(tmp_path),"entry")
+    arrays = {"a":np.arange(10,dtype=np.int32),
+              "b":np.array([["x","y"],["z","t"]],dtype=str)}
+    storage.save_arrays(path,arrays)
+    ## Saving a directory which already exists keeps the first one
+    storage.save_arrays(path,{"a":np.zeros(3)})
+    loaded = storage.load_arrays(path)
+    assert_same_arrays(loaded,arrays)
+    assert isinstance(loaded["a"],np.memmap)
+    assert not loaded["a"].flags.writeable
+    storage.add_array(path,"c",np.ones(4,dtype=bool))
+    assert np.array_equal(storage.load_arrays(path)["c"],np.ones(4,dtype=bool))
+    assert not [x for x in os.listdir(str(tmp_path)) if not x=="entry"]
+    assert sorted(os.listdir(path))==["a.npy","b.npy","c.npy"]
+
+
+def test_cache_entries(cache_dir):
+    key = "0"*64
+    assert storage.load_cache_entry(key) is None
+    ## Arrays cannot be added to a missing entry
+    storage.add_to_cache_entry(key,"c",np.ones(3))
+    assert storage.load_cache_entry(key) is None
+    storage.save_cache_entry(key,{"a":np.arange(3)})
+    storage.add_to_cache_entry(key,"c",np.ones(3))
+    assert_same_arrays(storage.load_cache_entry(key),{"a":np.arange(3),"c":np.ones(3)})
+    storage.set_cache_dir(None)
+    assert storage.load_cache_entry(key) is None
+
+
+@pytest.mark.parametrize("monoid",[PRL_Group,S_Monoid])
+def test_generation_round_trip(monoid,cache_dir,monkeypatch):
+    storage.set_cache_dir(None)
+    fresh = monoid(True)
+    storage.set_cache_dir(cache_dir)
+
+    saved = []
+    save_cache_entry = storage.save_cache_entry
+    def save_and_count(key,arrays):
+        saved.append(key)
+        save_cache_entry(key,arrays)
+    monkeypatch.setattr(storage,"save_cache_entry",save_and_count)
+
+    ## Miss: the category is generated and saved, along with its Cayley table
+    first = monoid(True)
+    assert len(saved)==1
+    assert os.listdir(cache_dir)==saved
+    assert "cayley_table.npy" in os.listdir(os.path.join(cache_dir,saved[0]))
+    ## Hit: the category is read from the memory-mapped arrays
+    second = monoid(True)
+    assert len(saved)==1
+    for array in [second.cayley_table,second._left_graph,second._right_graph]:
+        assert not array.flags.writeable
+        assert not array.flags.owndata
+
+    for loaded in [first,second]:
+        assert loaded._morphism_names==fresh._morphism_names
+        assert sorted(loaded.equivalences)==sorted(fresh.equivalences)
+        assert_same_arrays(loaded._get_arrays(),fresh._get_arrays())
+        for name_f,f in fresh.get_morphisms():
+            assert np.array_equal(loaded.morphisms[name_f].get_mapping_matrix(),
+                                  f.get_mapping_matrix())
+            for name_g,g in fresh.get_morphisms():
+                assert loaded.mult(name_g,name_f)==fresh.mult(name_g,name_f)
+                assert loaded._mult_morphisms(name_g,name_f)==fresh.mult(name_g,name_f)
+
+
+def test_generation_without_cayley_table(cache_dir):
+    cyclic_monoid(["a","b","c"])
+    (key,) = os.listdir(cache_dir)
+    assert "cayley_table.npy" not in os.listdir(os.path.join(cache_dir,key))
+    T = cyclic_monoid(["a","b","c"])
+    T._get_cayley_table()
+    assert "cayley_table.npy" in os.listdir(os.path.join(cache_dir,key))
+    assert np.array_equal(cyclic_monoid(["a","b","c"],True).cayley_table,T.cayley_table)
+
+
+def test_key_depends_on_element_order(cache_dir):
+    ## The same elements listed in a different order: the rows and columns of
+    ## the generator matrix index different elements, so the keys differ
+    T = cyclic_monoid(["a","b","c"])
+    U = cyclic_monoid(["c","b","a"])
+    assert U.get_object()[1].get_elements()==T.get_object()[1].get_elements()
+    key_T = storage.category_key([T.get_object()[1]],[T.generators["t"]])
+    key_U = storage.category_key([U.get_object()[1]],[U.generators["t"]])
+    assert not key_T==key_U
+    assert len(os.listdir(cache_dir))==2
+    assert key_T==storage.category_key([cyclic_monoid(["a","b","c"]).get_object()[1]],
+                                       [T.generators["t"]])
+    assert T.apply_operation("t","a")==["b"]
+    assert U.apply_operation("t","a")==["c"]